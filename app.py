@@ -18,12 +18,24 @@ def _parse_args() -> argparse.Namespace:
             "  app.exe --mdp                # ouvre directement le gestionnaire MDP\n"
             "  app.exe --backup             # ouvre directement la GUI backup\n"
             "  app.exe --backup --src C:\\data --dst D:\\backup --backup-cli\n"
+            "  app.exe --calibrate-kdf --target-ms 800  # règle Argon2id pour cette machine\n"
+            "  app.exe --import export.csv          # importe des entrées (CSV/JSON) dans le coffre\n"
+            "  app.exe --export coffre.json         # exporte le coffre (mots de passe en clair)\n"
+            "  app.exe --audit --stale-days 180     # mots de passe réutilisés, faibles, anciens\n"
         ),
     )
 
     g = p.add_mutually_exclusive_group()
     g.add_argument("--mdp", action="store_true", help="ouvrir le gestionnaire de mots de passe")
     g.add_argument("--backup", action="store_true", help="ouvrir l'outil de sauvegarde")
+    g.add_argument(
+        "--calibrate-kdf",
+        action="store_true",
+        help="mesurer Argon2id sur cette machine et enregistrer les paramètres du coffre",
+    )
+    g.add_argument("--import", dest="import_file", metavar="FICHIER", help="importer un fichier CSV/JSON dans le coffre")
+    g.add_argument("--export", dest="export_file", metavar="FICHIER", help="exporter le coffre en CSV/JSON (en clair)")
+    g.add_argument("--audit", action="store_true", help="rapport: mots de passe réutilisés, faibles et anciens")
 
     p.add_argument("--theme", default="auto", help="thème ttk (auto|clam|vista|xpnative|...)")
 
@@ -41,6 +53,16 @@ def _parse_args() -> argparse.Namespace:
         help="backup: miroir strict (supprime dans la destination ce qui n'existe plus en source)",
     )
 
+    # Options calibration KDF
+    p.add_argument("--target-ms", type=float, help="calibration: latence de déverrouillage visée (ms)")
+    p.add_argument("--max-memory-mib", type=int, help="calibration: mémoire Argon2id maximale (MiB)")
+
+    # Options import/export
+    p.add_argument("--format", choices=("csv", "json"), help="import/export: format (défaut: d'après l'extension)")
+
+    # Options audit
+    p.add_argument("--stale-days", type=int, help="audit: entrée ancienne au-delà de ce nombre de jours")
+
     p.add_argument("--debug", action="store_true", help="afficher les erreurs détaillées (traceback)")
     return p.parse_args()
 
@@ -138,6 +160,34 @@ def main() -> None:
             mdp_main(theme=args.theme)
             return
 
+        if args.calibrate_kdf:
+            from mdp_app.cli import calibrer_kdf
+
+            kwargs = {}
+            if args.target_ms is not None:
+                kwargs["cible_ms"] = args.target_ms
+            if args.max_memory_mib is not None:
+                kwargs["memoire_max_mib"] = args.max_memory_mib
+            raise SystemExit(calibrer_kdf(**kwargs))
+
+        if args.import_file:
+            from mdp_app.cli import importer_fichier
+
+            raise SystemExit(importer_fichier(args.import_file, format=args.format))
+
+        if args.export_file:
+            from mdp_app.cli import exporter_fichier
+
+            raise SystemExit(exporter_fichier(args.export_file, format=args.format))
+
+        if args.audit:
+            from mdp_app.cli import auditer_coffre
+
+            kwargs = {}
+            if args.stale_days is not None:
+                kwargs["jours"] = args.stale_days
+            raise SystemExit(auditer_coffre(**kwargs))
+
         if args.backup:
             if args.backup_cli or (args.src and args.dst):
                 from backup_app.cli import Args as BackupArgs
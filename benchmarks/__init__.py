@@ -0,0 +1 @@
+"""Micro-benchmarks du coffre (à lancer depuis la racine: `python -m benchmarks.<module>`)."""
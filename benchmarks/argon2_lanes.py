@@ -0,0 +1,38 @@
+"""Latence Argon2id en fonction du nombre de lanes (parallelism).
+
+Usage:
+    python -m benchmarks.argon2_lanes [--memory-mib 256] [--time-cost 4]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+
+from mdp_app.config import ARGON2_MEMORY_COST_KIB, ARGON2_TIME_COST
+from mdp_app.crypto import Argon2Params, lanes_argon2, mesurer_argon2_ms
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    p.add_argument("--memory-mib", type=int, default=ARGON2_MEMORY_COST_KIB // 1024)
+    p.add_argument("--time-cost", type=int, default=ARGON2_TIME_COST)
+    p.add_argument("--repeat", type=int, default=3)
+    args = p.parse_args()
+
+    auto = lanes_argon2()
+    lanes = sorted({1, 2, 4, 8, auto, os.cpu_count() or 1})
+    print(f"Argon2id t={args.time_cost} m={args.memory_mib} MiB — {os.cpu_count()} cœurs, lanes auto = {auto}")
+    print(f"{'lanes':>5} | {'latence':>10} | {'vs 1 lane':>9}")
+
+    base = None
+    for n in lanes:
+        params = Argon2Params(args.time_cost, args.memory_mib * 1024, n)
+        ms = min(mesurer_argon2_ms(params) for _ in range(args.repeat))
+        base = base or ms
+        marker = "  <- auto" if n == auto else ""
+        print(f"{n:>5} | {ms:8.0f}ms | {base / ms:8.2f}x{marker}")
+
+
+if __name__ == "__main__":
+    main()
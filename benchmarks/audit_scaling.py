@@ -0,0 +1,62 @@
+"""Audit des mots de passe: temps par entrée selon la taille du coffre (linéarité).
+
+Usage:
+    python -m benchmarks.audit_scaling [--entries 1000,10000,100000] [--pairwise-max 5000]
+
+Pour un coffre réaliste (voir `benchmarks.payload_format`), rechargé pour que
+les secrets soient scellés comme après ouverture, 5 % des mots de passe
+recopiés sur d'autres entrées: durée de `auditer` (déchiffrement, empreinte,
+score, dates) et µs par entrée, constants si l'audit est linéaire. La colonne
+"deux à deux" compare chaque paire de mots de passe (approche naïve,
+quadratique; mots de passe déjà déchiffrés), jusqu'à `--pairwise-max` entrées.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from benchmarks.payload_format import _vault
+from mdp_app.audit import auditer
+from mdp_app.vault import VaultEntry, dump_vault_to_bytes, load_vault_from_bytes
+
+
+def _coffre(n: int):
+    vault = _vault(n)
+    rng = random.Random(n)
+    entries = vault.entries
+    for e in rng.sample(entries, n // 20):
+        source = rng.choice(entries)
+        vault.update(VaultEntry(e.id, e.title, e.username, source.password, e.notes, e.updated_at))
+    return load_vault_from_bytes(dump_vault_to_bytes(vault))
+
+
+def _pairwise(passwords: list[str]) -> int:
+    return sum(1 for i, a in enumerate(passwords) for b in passwords[i + 1 :] if a == b)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    p.add_argument("--entries", default="1000,10000,100000")
+    p.add_argument("--pairwise-max", type=int, default=5000)
+    args = p.parse_args()
+
+    print(f"{'entrées':>8} | {'audit':>9} | {'µs/entrée':>9} | {'groupes':>7} | {'deux à deux':>11}")
+    for n in (int(s) for s in args.entries.split(",") if s):
+        vault = _coffre(n)
+        pairwise = "—"
+        if n <= args.pairwise_max:
+            passwords = [e.password for e in vault]
+            t0 = time.perf_counter()
+            _pairwise(passwords)
+            pairwise = f"{(time.perf_counter() - t0) * 1000:9.1f}ms"
+        rapport = min((auditer(vault) for _ in range(3)), key=lambda r: r.duree_s)
+        print(
+            f"{n:>8} | {rapport.duree_s * 1000:7.1f}ms | "
+            f"{rapport.duree_s * 1e6 / n:9.1f} | {len(rapport.reutilises):>7} | {pairwise:>11}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Enregistrement automatique: enregistrements par minute et octets écrits selon les délais.
+
+Usage:
+    python -m benchmarks.autosave_burst [--entries 10000] [--minutes 10] [--delays 0,500:5000,2000:15000,5000:30000]
+
+Session d'édition simulée (horloge fictive, graine fixe): rafales de 3 à 20
+modifications espacées de 0,2 à 1,5 s, séparées de pauses de 5 à 60 s, sur un
+coffre fragmenté (16 fragments, clé de session déjà dérivée). "0" enregistre
+après chaque modification (équivalent d'un Enregistrer systématique);
+"pause:max" regroupe une rafale en un enregistrement après `pause` ms sans
+modification, ou au plus tard `max` ms après la première. "perdu max": durée
+maximale de modifications non enregistrées (arrêt brutal au pire moment).
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+from pathlib import Path
+
+from benchmarks.formats import kdf_context
+from benchmarks.payload_format import _vault
+from mdp_app.crypto import SessionKey
+from mdp_app.fragments import CoffreFragmente
+from mdp_app.sauvegarde_auto import SauvegardeAuto
+from mdp_app.vault import Vault, VaultEntry
+
+
+def _session_edition(minutes: float, rng: random.Random) -> list[float]:
+    t, fin, dates = 0.0, minutes * 60, []
+    while t < fin:
+        for _ in range(rng.randint(3, 20)):
+            dates.append(t)
+            t += rng.uniform(0.2, 1.5)
+        t += rng.uniform(5, 60)
+    return [d for d in dates if d < fin]
+
+
+def _simuler(
+    dates: list[float],
+    vault: Vault,
+    fragments: CoffreFragmente,
+    session: SessionKey,
+    auto: SauvegardeAuto,
+    horloge: list[float],
+) -> float:
+    """Rejoue `dates`; renvoie la durée maximale de modifications non enregistrées."""
+
+    rng = random.Random(1)
+    en_attente: list[str] = []
+    premiere: float | None = None
+    perdu = 0.0
+
+    def sauver() -> None:
+        nonlocal premiere, perdu
+        if premiere is not None:
+            perdu = max(perdu, horloge[0] - premiere)
+        auto.terminer(auto.commencer(), fragments.enregistrer(session, vault, en_attente))
+        en_attente.clear()
+        premiere = None
+
+    for date in dates:
+        attente = auto.attente()
+        if attente is not None and horloge[0] + attente <= date:
+            horloge[0] += attente
+            sauver()
+        horloge[0] = date
+        e = rng.choice(vault.entries)
+        vault.update(VaultEntry(e.id, e.title, e.username, f"pw-{rng.random()}", e.notes, e.updated_at))
+        en_attente.append(e.id)
+        premiere = date if premiere is None else premiere
+        auto.modifier()
+        if not auto.actif:
+            sauver()
+    if (attente := auto.attente()) is not None:
+        horloge[0] += attente
+        sauver()
+    return perdu
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    p.add_argument("--entries", type=int, default=10000)
+    p.add_argument("--minutes", type=float, default=10)
+    p.add_argument("--delays", default="0,500:5000,2000:15000,5000:30000")
+    args = p.parse_args()
+
+    dates = _session_edition(args.minutes, random.Random(0))
+    print(f"{len(dates)} modifications sur {args.minutes:g} min")
+    print(f"{'délais (ms)':>12} | {'enreg.':>6} | {'par min':>7} | {'écrit':>9} | {'perdu max':>9}")
+    with kdf_context(fast=True), tempfile.TemporaryDirectory() as tmp:
+        session = SessionKey.deriver("benchmark")
+        for spec in (s for s in args.delays.split(",") if s):
+            pause, _, maximum = spec.partition(":")
+            vault = _vault(args.entries)
+            fragments = CoffreFragmente(Path(tmp) / spec.replace(":", "-"), n=16)
+            fragments.enregistrer(session, vault)
+            horloge = [0.0]
+            auto = SauvegardeAuto(int(pause), int(maximum or pause), horloge=lambda h=horloge: h[0])
+            perdu = _simuler(dates, vault, fragments, session, auto, horloge)
+            n, octets = auto.total_enregistrements, auto.total_octets
+            print(f"{spec:>12} | {n:>6} | {n / args.minutes:7.1f} | {octets / 1024:6.0f}KiB | {perdu:7.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Ouverture de N coffres avec le même mot de passe: boucle `dechiffrer_bytes` vs `dechiffrer_lot`.
+
+Usage:
+    python -m benchmarks.batch_decrypt [--files 24] [--groups 4] [--size-kib 256] [--workers N]
+
+Les fichiers sont répartis en `--groups` groupes partageant sel et paramètres
+(copies d'archive / fichiers produits par `chiffrer_lot`): la boucle refait
+Argon2id pour chaque fichier, le lot une fois par groupe, groupes en parallèle.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import mdp_app.crypto as crypto
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    p.add_argument("--files", type=int, default=24)
+    p.add_argument("--groups", type=int, default=4)
+    p.add_argument("--size-kib", type=int, default=256)
+    p.add_argument("--workers", type=int, default=None)
+    args = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        crypto.FICHIER_KDF = str(Path(tmp) / "kdf.json")
+
+        blobs = {}
+        for g in range(args.groups):
+            contenus = {f"g{g}-f{i}": os.urandom(args.size_kib * 1024) for i in range(g, args.files, args.groups)}
+            blobs.update({nom: r.donnees for nom, r in crypto.chiffrer_lot("pw", contenus).resultats.items()})
+        total_mo = sum(len(b) for b in blobs.values()) / 2**20
+
+        t0 = time.perf_counter()
+        for data in blobs.values():
+            crypto.dechiffrer_bytes("pw", data)
+        seq_s = time.perf_counter() - t0
+
+        rapport = crypto.dechiffrer_lot("pw", blobs, workers=args.workers)
+        assert not rapport.erreurs
+
+    print(f"{len(blobs)} fichiers, {args.groups} groupes, {total_mo:.1f} Mo, {os.cpu_count()} cœur(s)")
+    print(f"  boucle dechiffrer_bytes : {seq_s * 1000:8.0f}ms  {len(blobs) / seq_s:6.1f} fichiers/s  "
+          f"{total_mo / seq_s:6.1f} Mo/s  ({len(blobs)} KDF)")
+    print(f"  dechiffrer_lot          : {rapport.duree_s * 1000:8.0f}ms  {rapport.fichiers_s:6.1f} fichiers/s  "
+          f"{rapport.debit_mo_s:6.1f} Mo/s  ({rapport.derivations} KDF)")
+
+
+if __name__ == "__main__":
+    main()
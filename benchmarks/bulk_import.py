@@ -0,0 +1,64 @@
+"""Import/export en masse (CSV, JSON): débit, et insertion en lot vs entrée par entrée.
+
+Usage:
+    python -m benchmarks.bulk_import [--entries 1000,10000,100000]
+
+Pour un coffre réaliste (voir `benchmarks.payload_format`), exporté puis
+réimporté dans un coffre vide, en mémoire (pas d'E/S disque): débit de
+l'export, de la lecture + insertion (`Vault.extend`), et temps du seul
+chiffrement final (dump binaire + AES-GCM, clé de session déjà dérivée).
+"un par un": les mêmes entrées insérées avec `Vault.add` dans un coffre dont
+une vue triée est construite (état de la GUI), hors lecture.
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+
+from benchmarks.formats import kdf_context
+from benchmarks.payload_format import _best_ms, _vault
+from mdp_app.crypto import SessionKey
+from mdp_app.transfert import FORMATS
+from mdp_app.vault import Vault, dump_vault_to_bytes
+
+
+def _un_par_un(entries: list) -> None:
+    vault = Vault()
+    vault.sorted_ids("title")
+    for e in entries:
+        vault.add(e)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    p.add_argument("--entries", default="1000,10000,100000")
+    args = p.parse_args()
+
+    with kdf_context(fast=True):
+        session = SessionKey.deriver("benchmark")
+        print(
+            f"{'entrées':>8} | {'format':>6} | {'export':>9} | {'entrées/s':>9} | {'import':>9} | "
+            f"{'entrées/s':>9} | {'un par un':>9} | {'chiffrement':>11}"
+        )
+        for n in (int(s) for s in args.entries.split(",") if s):
+            vault = _vault(n)
+            entries = vault.entries
+            chiffre_ms = _best_ms(lambda v=vault: session.chiffrer(dump_vault_to_bytes(v)))
+            add_ms = _best_ms(lambda es=entries: _un_par_un(es))
+            for fmt, (lire, ecrire) in FORMATS.items():
+                flux = io.StringIO(newline="")
+                ecrire(vault, flux)
+                texte = flux.getvalue()
+                assert Vault(entries=lire(io.StringIO(texte, newline=""))) == vault
+
+                export_ms = _best_ms(lambda v=vault, w=ecrire: w(v, io.StringIO(newline="")))
+                import_ms = _best_ms(lambda t=texte, r=lire: Vault().extend(r(io.StringIO(t, newline=""))))
+                print(
+                    f"{n:>8} | {fmt:>6} | {export_ms:7.1f}ms | {n / export_ms * 1000:9.0f} | {import_ms:7.1f}ms | "
+                    f"{n / import_ms * 1000:9.0f} | {add_ms:7.1f}ms | {chiffre_ms:9.1f}ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
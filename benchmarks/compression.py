@@ -0,0 +1,51 @@
+"""Compression du clair avant chiffrement: ratio vs temps CPU par algorithme et niveau.
+
+Usage:
+    python -m benchmarks.compression [--entries 1000,10000] [--algos zlib,lzma,bz2] [--levels 1,6,9]
+
+Pour un coffre réaliste (voir `benchmarks.payload_format`), au format
+binaire et JSON: taille compressée, ratio, temps de compression et de
+décompression, et taille sur disque en v5 (anti-`strings` double la taille,
++ en-tête, nonce et tag AES-GCM). La ligne "none" est la référence.
+"""
+
+from __future__ import annotations
+
+import argparse
+
+from benchmarks.payload_format import _best_ms, _disk, _vault
+from mdp_app.crypto import compresser, decompresser
+from mdp_app.vault import dump_vault_to_bytes
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    p.add_argument("--entries", default="1000,10000")
+    p.add_argument("--algos", default="zlib,lzma,bz2")
+    p.add_argument("--levels", default="1,6,9")
+    args = p.parse_args()
+
+    algos = [a for a in args.algos.split(",") if a]
+    levels = [int(s) for s in args.levels.split(",") if s]
+    print(
+        f"{'entrées':>8} | {'contenu':>7} | {'algo':>5} | {'niv':>3} | {'taille':>9} | {'ratio':>6} | "
+        f"{'compr.':>9} | {'décompr.':>9} | {'disque v5':>10}"
+    )
+    for n in (int(s) for s in args.entries.split(",") if s):
+        vault = _vault(n)
+        for label, binary in (("binaire", True), ("json", False)):
+            data = dump_vault_to_bytes(vault, binary=binary)
+            rows = [("none", 0)] + [(algo, level) for algo in algos for level in levels]
+            for algo, level in rows:
+                packed = compresser(data, algo, level)
+                assert decompresser(packed) == data
+                c_ms = _best_ms(lambda d=data, a=algo, lv=level: compresser(d, a, lv))
+                d_ms = _best_ms(lambda pk=packed: decompresser(pk))
+                print(
+                    f"{n:>8} | {label:>7} | {algo:>5} | {level:>3} | {len(packed) / 1024:6.0f}KiB | "
+                    f"{len(data) / len(packed):5.1f}x | {c_ms:7.1f}ms | {d_ms:7.1f}ms | {_disk(packed) / 1024:7.0f}KiB"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+"""Matrice des formats du coffre: KDF, codec, chiffrement, ouverture/enregistrement et pic mémoire.
+
+Usage:
+    python -m benchmarks.formats [--sizes 1,64,1024] [--formats v4,v5] [--fast-kdf]
+                                 [--json out.json] [--baseline base.json] [--tolerance 0.25]
+
+Pour chaque format (legacy PBKDF2, v2/v3 scrypt+Fernet, v4 Argon2id+Fernet,
+v5 Argon2id+AES-GCM, v6 flux segmenté, v7 enveloppe) et chaque taille (KiB):
+
+- kdf_ms     : dérivation de la clé avec les paramètres écrits dans l'en-tête
+- codec_ms   : encodage + décodage anti-`strings` du blob (0 pour legacy/v2)
+- cipher_ms  : chiffrement + déchiffrement du contenu seul, clé déjà dérivée
+- save_ms / open_ms : chemins complets `chiffrer_*` / `dechiffrer_bytes`
+- save_peak_kib / open_peak_kib : pic tracemalloc de ces chemins
+
+`--json` écrit les résultats; `--baseline` compare à un fichier précédent et
+renvoie un code 1 si une mesure dépasse la référence de plus de `--tolerance`.
+Sans `--fast-kdf`, les paramètres par défaut de `config.py` sont utilisés
+(kdf.json de l'utilisateur ignoré, pour des résultats comparables).
+"""
+
+from __future__ import annotations
+
+import argparse
+import base64
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import asdict
+from pathlib import Path
+
+from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+import mdp_app.crypto as crypto
+from mdp_app.config import AEAD_NONCE_SIZE, V6_CHUNK_SIZE
+from mdp_app.vault import Vault, VaultEntry, dump_vault_to_bytes
+
+FORMATS = ("legacy", "v2", "v3", "v4", "v5", "v6", "v7")
+DEFAULT_SIZES_KIB = (1, 64, 1024)
+
+TIME_METRICS = ("kdf_ms", "codec_ms", "cipher_ms", "save_ms", "open_ms")
+MEMORY_METRICS = ("save_peak_kib", "open_peak_kib")
+# En dessous de ces écarts absolus, une variation relative n'est que du bruit.
+MIN_DELTA = {"ms": 2.0, "kib": 64.0}
+
+_FAST_KDF = {
+    "ARGON2_TIME_COST": 1,
+    "ARGON2_MEMORY_COST_KIB": 8192,
+    "ARGON2_PARALLELISM": 1,
+    "SCRYPT_N": 2**10,
+    "LEGACY_PBKDF2_ITERATIONS": 1000,
+}
+
+
+@contextmanager
+def kdf_context(fast: bool):
+    """Paramètres KDF de `config.py` (ou réduits), sans lire le kdf.json de l'utilisateur."""
+
+    names = ["FICHIER_KDF", *_FAST_KDF]
+    saved = {name: getattr(crypto, name) for name in names}
+    with tempfile.TemporaryDirectory() as tmp:
+        crypto.FICHIER_KDF = str(Path(tmp) / "kdf.json")
+        if fast:
+            for name, value in _FAST_KDF.items():
+                setattr(crypto, name, value)
+        try:
+            yield
+        finally:
+            for name, value in saved.items():
+                setattr(crypto, name, value)
+
+
+def _payload(size: int) -> bytes:
+    """Contenu de coffre réaliste (JSON d'entrées), tronqué à `size` octets."""
+
+    rng = random.Random(size)
+    alphabet = "abcdefghijklmnopqrstuvwxyz0123456789"
+    entries = []
+    data = b""
+    while len(data) < size:
+        for _ in range(max(1, (size - len(data)) // 200)):
+            entries.append(
+                VaultEntry.new(
+                    title=f"site-{len(entries)}.example",
+                    username=f"user{rng.randrange(50)}@example.com",
+                    password="".join(rng.choices(alphabet, k=20)),
+                    notes="".join(rng.choices(alphabet + " ", k=rng.randrange(60))),
+                )
+            )
+        data = dump_vault_to_bytes(Vault(entries=entries))
+    return data[:size]
+
+
+def _legacy_save(mdp: str, contenu: bytes) -> bytes:
+    return Fernet(crypto.generer_cle_legacy_pbkdf2(mdp)).encrypt(contenu)
+
+
+def _v6_save(mdp: str, contenu: bytes) -> bytes:
+    out = io.BytesIO()
+    crypto.encrypt_stream(mdp, io.BytesIO(contenu), out)
+    return out.getvalue()
+
+
+def _save_fn(fmt: str):
+    salted = {"v2": crypto.chiffrer_bytes_v2, "v3": crypto.chiffrer_bytes_v3, "v4": crypto.chiffrer_bytes_v4,
+              "v5": crypto.chiffrer_bytes_v5}
+    if fmt in salted:
+        return lambda mdp, contenu: salted[fmt](mdp, contenu, salt=os.urandom(16))
+    return {"legacy": _legacy_save, "v6": _v6_save, "v7": crypto.chiffrer_bytes_v7}[fmt]
+
+
+def _cipher_fn(fmt: str, cle: bytes):
+    """Aller-retour du chiffrement seul, avec une clé du bon type."""
+
+    if fmt in {"legacy", "v2", "v3", "v4"}:
+        fernet = Fernet(base64.urlsafe_b64encode(cle) if fmt == "v4" else cle)
+        return lambda contenu: fernet.decrypt(fernet.encrypt(contenu))
+
+    aead = AESGCM(cle)
+
+    def roundtrip(contenu: bytes) -> None:
+        step = V6_CHUNK_SIZE if fmt == "v6" else max(1, len(contenu))
+        view = memoryview(contenu)
+        for start in range(0, max(1, len(contenu)), step):
+            nonce = os.urandom(AEAD_NONCE_SIZE)
+            aead.decrypt(nonce, aead.encrypt(nonce, view[start : start + step], None), None)
+
+    return roundtrip
+
+
+def _best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0
+
+
+def _peak_kib(fn) -> float:
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def bench_format(fmt: str, size: int, *, repeat: int = 3, mdp: str = "benchmark") -> dict:
+    contenu = _payload(size)
+    save = _save_fn(fmt)
+    blob = save(mdp, contenu)
+    if crypto.dechiffrer_bytes(mdp, blob) != contenu:
+        raise AssertionError(f"aller-retour {fmt} incorrect")
+
+    groupe = crypto._groupe_kdf(blob)
+    cle = crypto._deriver_groupe(mdp, groupe)
+    cipher = _cipher_fn(fmt, cle)
+
+    if fmt in {"legacy", "v2"}:
+        codec_ms = 0.0
+    else:
+        clair = crypto._try_decode_no_strings(blob)
+        codec_ms = _best_ms(lambda: crypto._try_decode_no_strings(crypto._encode_no_strings(clair)), repeat)
+
+    return {
+        "format": fmt,
+        "size": size,
+        "blob_size": len(blob),
+        "kdf_ms": _best_ms(lambda: crypto._deriver_groupe(mdp, groupe), repeat),
+        "codec_ms": codec_ms,
+        "cipher_ms": _best_ms(lambda: cipher(contenu), repeat),
+        "save_ms": _best_ms(lambda: save(mdp, contenu), repeat),
+        "open_ms": _best_ms(lambda: crypto.dechiffrer_bytes(mdp, blob), repeat),
+        "save_peak_kib": _peak_kib(lambda: save(mdp, contenu)),
+        "open_peak_kib": _peak_kib(lambda: crypto.dechiffrer_bytes(mdp, blob)),
+    }
+
+
+def run_suite(
+    formats: tuple[str, ...] = FORMATS,
+    sizes_kib: tuple[int, ...] = DEFAULT_SIZES_KIB,
+    *,
+    repeat: int = 3,
+    fast_kdf: bool = False,
+) -> dict:
+    with kdf_context(fast_kdf):
+        meta = {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "fast_kdf": fast_kdf,
+            "repeat": repeat,
+            "argon2": asdict(crypto.parametres_argon2()),
+            "scrypt_n": crypto.SCRYPT_N,
+            "pbkdf2_iterations": crypto.LEGACY_PBKDF2_ITERATIONS,
+        }
+        results = [bench_format(fmt, kib * 1024, repeat=repeat) for fmt in formats for kib in sizes_kib]
+    return {"meta": meta, "results": results}
+
+
+def compare(current: dict, baseline: dict, *, tolerance: float = 0.25) -> list[str]:
+    """Régressions de `current` par rapport à `baseline` (messages lisibles, liste vide si aucune)."""
+
+    ref = {(r["format"], r["size"]): r for r in baseline["results"]}
+    regressions = []
+    for r in current["results"]:
+        old = ref.get((r["format"], r["size"]))
+        if old is None:
+            continue
+        for metric in TIME_METRICS + MEMORY_METRICS:
+            if metric not in old:
+                continue
+            min_delta = MIN_DELTA["ms" if metric.endswith("_ms") else "kib"]
+            if r[metric] > old[metric] * (1 + tolerance) and r[metric] - old[metric] > min_delta:
+                regressions.append(
+                    f"{r['format']} {r['size'] // 1024} KiB {metric}: {old[metric]:.1f} -> {r[metric]:.1f}"
+                )
+    return regressions
+
+
+def _print_table(report: dict) -> None:
+    print(f"{'format':>6} | {'KiB':>5} | {'kdf':>8} | {'codec':>7} | {'cipher':>7} | {'save':>8} | {'open':>8} | "
+          f"{'pic save':>9} | {'pic open':>9}")
+    for r in report["results"]:
+        print(
+            f"{r['format']:>6} | {r['size'] // 1024:>5} | {r['kdf_ms']:6.1f}ms | {r['codec_ms']:5.1f}ms | "
+            f"{r['cipher_ms']:5.1f}ms | {r['save_ms']:6.1f}ms | {r['open_ms']:6.1f}ms | "
+            f"{r['save_peak_kib']:6.0f}KiB | {r['open_peak_kib']:6.0f}KiB"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    p.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES_KIB)), help="tailles en KiB")
+    p.add_argument("--formats", default=",".join(FORMATS))
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--fast-kdf", action="store_true", help="KDF réduits (smoke test)")
+    p.add_argument("--json", type=Path, help="écrire les résultats dans ce fichier")
+    p.add_argument("--baseline", type=Path, help="comparer à ce fichier JSON")
+    p.add_argument("--tolerance", type=float, default=0.25)
+    args = p.parse_args(argv)
+
+    formats = tuple(f for f in args.formats.split(",") if f)
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        p.error(f"format(s) inconnu(s): {', '.join(sorted(unknown))}")
+
+    report = run_suite(
+        formats, tuple(int(s) for s in args.sizes.split(",") if s), repeat=args.repeat, fast_kdf=args.fast_kdf
+    )
+    _print_table(report)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding="utf-8")
+
+    if args.baseline:
+        baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+        if baseline["meta"].get("fast_kdf") != report["meta"]["fast_kdf"]:
+            print("Attention: référence mesurée avec d'autres paramètres KDF (--fast-kdf).", file=sys.stderr)
+        regressions = compare(report, baseline, tolerance=args.tolerance)
+        for line in regressions:
+            print(f"RÉGRESSION {line}")
+        if regressions:
+            return 1
+        print(f"Aucune régression (tolérance {args.tolerance:.0%}).")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
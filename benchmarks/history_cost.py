@@ -0,0 +1,87 @@
+"""Historique des révisions: coût d'un ajout et d'une lecture selon la taille de l'historique.
+
+Usage:
+    python -m benchmarks.history_cost [--revisions 0,1000,10000,100000] [--entries 1000]
+
+Pour un coffre réaliste (voir `benchmarks.payload_format`), rechargé pour que
+les secrets soient scellés comme après ouverture, un historique de
+`--revisions` modifications (mot de passe changé, une ligne ajoutée aux notes)
+réparties sur les entrées: premier ajout d'une session (historique tout juste
+ouvert: en-tête et dernier cadre lus), ajouts suivants, octets par révision
+(delta) face à une copie complète de l'entrée, première lecture de
+l'historique d'une entrée (parcours des cadres, seule étape proportionnelle au
+nombre de révisions; rien n'est déchiffré) et lectures suivantes. Ni
+l'ouverture ni l'enregistrement du coffre ne lisent l'historique.
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.payload_format import _best_ms, _vault
+from mdp_app.historique import Historique
+from mdp_app.vault import Vault, VaultEntry, dump_vault_to_bytes, load_vault_from_bytes
+
+
+def _modifiee(e: VaultEntry, k: int) -> VaultEntry:
+    password, notes = e.secrets()
+    return VaultEntry(e.id, e.title, e.username, f"{password[:12]}-{k}", f"{notes}\nrévision {k}", e.updated_at)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    p.add_argument("--revisions", default="0,1000,10000,100000")
+    p.add_argument("--entries", type=int, default=1000)
+    args = p.parse_args()
+
+    vault = load_vault_from_bytes(dump_vault_to_bytes(_vault(args.entries)))
+    print(
+        f"{'révisions':>9} | {'1er ajout':>9} | {'ajout':>8} | {'delta':>7} | {'copie':>7} | "
+        f"{'1re lecture':>11} | {'lecture':>8} | {'versions':>8}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in (int(s) for s in args.revisions.split(",") if s):
+            path = Path(tmp) / f"{n}.hist"
+            historique = Historique.du_coffre(vault, path=path)
+            courantes = {e.id: e for e in vault}
+            lot = []
+            for k in range(n):
+                e = vault.entries[k % len(vault)]
+                nouvelle = _modifiee(courantes[e.id], k)
+                lot.append((courantes[e.id], nouvelle))
+                courantes[e.id] = nouvelle
+                if len(lot) == 1000:
+                    historique.ajouter(lot)
+                    lot.clear()
+            historique.ajouter(lot)
+
+            def ajout(h, e=vault.entries[1], courantes=courantes, n=n) -> int:
+                nouvelle = _modifiee(courantes[e.id], n)
+                octets = h.ajouter([(courantes[e.id], nouvelle)])
+                courantes[e.id] = nouvelle
+                return octets
+
+            # Session neuve: rien n'est lu avant le premier enregistrement.
+            rouvert = Historique.du_coffre(vault, path=path)
+            t0 = time.perf_counter()
+            delta = ajout(rouvert)
+            premier_ms = (time.perf_counter() - t0) * 1000
+            ajout_ms = _best_ms(lambda h=rouvert: ajout(h))
+
+            cible = courantes[vault.entries[0].id]
+            t0 = time.perf_counter()
+            versions = len(Historique.du_coffre(vault, path=path).revisions(cible))
+            premiere_lecture_ms = (time.perf_counter() - t0) * 1000
+            lecture_ms = _best_ms(lambda h=rouvert, c=cible: h.revisions(c))
+            copie = len(dump_vault_to_bytes(Vault(entries=[courantes[vault.entries[1].id]])))
+            print(
+                f"{n:>9} | {premier_ms:7.2f}ms | {ajout_ms:6.2f}ms | {delta:5d} o | {copie:5d} o | "
+                f"{premiere_lecture_ms:9.1f}ms | {lecture_ms:6.2f}ms | {versions:>8}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Enregistrement après une modification: snapshot complet vs ajout au journal.
+
+Usage:
+    python -m benchmarks.journal_save [--entries 1000,10000,100000]
+
+Pour un coffre réaliste (voir `benchmarks.payload_format`), clé de session
+déjà dérivée: temps et octets écrits pour enregistrer une entrée modifiée,
+en réécrivant tout le coffre (dump + AES-GCM + écriture atomique) ou en
+ajoutant un enregistrement au journal (AES-GCM de l'entrée + fsync).
+"""
+
+from __future__ import annotations
+
+import argparse
+import tempfile
+from pathlib import Path
+
+from benchmarks.formats import kdf_context
+from benchmarks.payload_format import _best_ms, _vault
+from mdp_app.crypto import SessionKey
+from mdp_app.journal import Journal
+from mdp_app.storage import ecrire_chiffre
+from mdp_app.vault import VaultEntry, dump_vault_to_bytes
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    p.add_argument("--entries", default="1000,10000,100000")
+    args = p.parse_args()
+
+    with kdf_context(fast=True), tempfile.TemporaryDirectory() as tmp:
+        session = SessionKey.deriver("benchmark")
+        vault_path, journal_path = Path(tmp) / "vault.bin", Path(tmp) / "vault.jnl"
+        print(f"{'entrées':>8} | {'snapshot':>9} | {'écrit':>9} | {'journal':>9} | {'écrit':>7}")
+        for n in (int(s) for s in args.entries.split(",") if s):
+            vault = _vault(n)
+            e = vault.entries[n // 2]
+            modifiee = VaultEntry(e.id, e.title, e.username, "nouveau-mot-de-passe", e.notes, e.updated_at)
+            vault.update(modifiee)
+
+            def snapshot(v=vault) -> int:
+                data = session.chiffrer(dump_vault_to_bytes(v))
+                ecrire_chiffre(data, vault_path)
+                return len(data)
+
+            written = snapshot()
+            journal = Journal.nouveau(session, vault_path.read_bytes(), path=journal_path)
+            appended = journal.ajouter([(modifiee.id, modifiee)])
+            snap_ms = _best_ms(snapshot)
+            journal_ms = _best_ms(lambda j=journal, m=modifiee: j.ajouter([(m.id, m)]))
+            print(
+                f"{n:>8} | {snap_ms:7.1f}ms | {written / 1024:6.0f}KiB | {journal_ms:7.2f}ms | {appended:5d} o"
+            )
+
+
+if __name__ == "__main__":
+    main()
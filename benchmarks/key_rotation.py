@@ -0,0 +1,57 @@
+"""Changement de mot de passe: rechiffrement complet (v5) vs rotation de slot (v7).
+
+Usage:
+    python -m benchmarks.key_rotation [--size-mib 50] [--fast-kdf]
+
+`--fast-kdf` réduit Argon2id (8 MiB, 1 passe) pour isoler le coût lié à la taille du coffre.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import mdp_app.crypto as crypto
+
+
+def _timed(fn):
+    t0 = time.perf_counter()
+    out = fn()
+    return out, (time.perf_counter() - t0) * 1000.0
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    p.add_argument("--size-mib", type=int, default=50)
+    p.add_argument("--fast-kdf", action="store_true")
+    args = p.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        crypto.FICHIER_KDF = str(Path(tmp) / "kdf.json")
+        if args.fast_kdf:
+            crypto.ARGON2_TIME_COST, crypto.ARGON2_MEMORY_COST_KIB, crypto.ARGON2_PARALLELISM = 1, 8192, 1
+
+        plaintext = os.urandom(args.size_mib * 1024 * 1024)
+        v5 = crypto.chiffrer_bytes_v5("old", plaintext, salt=os.urandom(16))
+        v7 = crypto.chiffrer_bytes_v7("old", plaintext)
+
+        def rotate_v5() -> bytes:
+            return crypto.chiffrer_bytes_v5("new", crypto.dechiffrer_bytes("old", v5), salt=os.urandom(16))
+
+        _new_v5, ms_v5 = _timed(rotate_v5)
+        new_v7, ms_v7 = _timed(lambda: crypto.changer_mdp_v7("old", "new", v7))
+        kdf_ms = crypto.mesurer_argon2_ms(crypto.parametres_argon2())
+
+        header = 2 * (crypto.HEADER_V7.size + crypto.V7_SLOT.size)
+        assert new_v7[header:] == v7[header:], "le corps v7 ne doit pas changer"
+        print(f"Coffre {args.size_mib} MiB ({len(v5) / 2**20:.0f} MiB sur disque), 1 KDF = {kdf_ms:.0f} ms")
+        print(f"  v5 rechiffrement complet : {ms_v5:8.0f} ms")
+        print(f"  v7 rotation de slot      : {ms_v7:8.0f} ms  (seuls les {header} octets d'en-tête changent)")
+        assert crypto.dechiffrer_bytes("new", new_v7) == plaintext
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Compare l'ancien codec anti-`strings` (boucle Python) au codec par tables.
+
+Usage:
+    python -m benchmarks.no_strings
+"""
+
+from __future__ import annotations
+
+import os
+import time
+
+from mdp_app.crypto import _encode_no_strings, _try_decode_no_strings
+
+SIZES = [("10 KB", 10 * 1024), ("1 MB", 1024 * 1024), ("50 MB", 50 * 1024 * 1024)]
+
+
+def _encode_loop(data: bytes) -> bytes:
+    out = bytearray(len(data) * 2)
+    j = 0
+    for b in data:
+        out[j] = 0x80 | (b >> 4)
+        out[j + 1] = 0x80 | (b & 0x0F)
+        j += 2
+    return bytes(out)
+
+
+def _decode_loop(data: bytes) -> bytes | None:
+    if not data or (len(data) % 2) != 0:
+        return None
+    out = bytearray(len(data) // 2)
+    j = 0
+    for i in range(0, len(data), 2):
+        hi = data[i]
+        lo = data[i + 1]
+        if (hi & 0xF0) != 0x80 or (lo & 0xF0) != 0x80:
+            return None
+        out[j] = ((hi & 0x0F) << 4) | (lo & 0x0F)
+        j += 1
+    return bytes(out)
+
+
+def _best_of(fn, arg, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main() -> None:
+    print(f"{'taille':>8} | {'enc boucle':>11} | {'enc table':>10} | {'dec boucle':>11} | {'dec table':>10} | gain")
+    for label, size in SIZES:
+        data = os.urandom(size)
+        encoded = _encode_no_strings(data)
+        assert encoded == _encode_loop(data)
+        assert _try_decode_no_strings(encoded) == data
+
+        repeat = 5 if size <= 1024 * 1024 else 1
+        enc_old = _best_of(_encode_loop, data, repeat)
+        enc_new = _best_of(_encode_no_strings, data, repeat)
+        dec_old = _best_of(_decode_loop, encoded, repeat)
+        dec_new = _best_of(_try_decode_no_strings, encoded, repeat)
+        gain = (enc_old + dec_old) / max(enc_new + dec_new, 1e-9)
+        print(
+            f"{label:>8} | {enc_old * 1000:9.1f}ms | {enc_new * 1000:8.1f}ms | "
+            f"{dec_old * 1000:9.1f}ms | {dec_new * 1000:8.1f}ms | x{gain:.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Allocations (tracemalloc) du chemin d'ouverture d'un coffre v5: avant/après `peek_header`.
+
+"Avant" reproduit l'ancien chemin de cli.py/gui.py: `decoder(raw)[0]` pour la
+version, puis `dechiffrer_bytes` qui redécodait tout le fichier et copiait
+nonce/ciphertext. "Après": `peek_header(raw)[0]` puis `dechiffrer_bytes_session`.
+
+Usage:
+    python -m benchmarks.open_allocations
+"""
+
+from __future__ import annotations
+
+import os
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+import mdp_app.crypto as crypto
+from mdp_app.config import AEAD_NONCE_SIZE, HEADER_V2, MAGIC_V5
+
+SIZES = [("100 KB", 100 * 1024), ("1 MB", 1024 * 1024), ("20 MB", 20 * 1024 * 1024)]
+
+
+def _avant(mdp: str, raw: bytes) -> bytes:
+    version = crypto.decoder(raw)[0]
+    _version, salt, n, r, p, token = crypto.decoder(raw)
+    assert version == "v5"
+    nonce = token[:AEAD_NONCE_SIZE]
+    ciphertext = token[AEAD_NONCE_SIZE:]
+    aad = HEADER_V2.pack(MAGIC_V5, salt, n, r, p)
+    key = crypto.generer_cle_argon2id_raw(mdp, salt=salt, time_cost=n, memory_cost_kib=r, parallelism=p)
+    return AESGCM(key).decrypt(nonce, ciphertext, aad)
+
+
+def _apres(mdp: str, raw: bytes) -> bytes:
+    version = crypto.peek_header(raw)[0]
+    assert version == "v5"
+    contenu, _session = crypto.dechiffrer_bytes_session(mdp, raw)
+    return contenu
+
+
+def _mesure(fn, raw: bytes) -> tuple[float, float]:
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    fn("pw", raw)
+    ms = (time.perf_counter() - t0) * 1000.0
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 2**20, ms
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        crypto.FICHIER_KDF = str(Path(tmp) / "kdf.json")
+        crypto.ARGON2_TIME_COST, crypto.ARGON2_MEMORY_COST_KIB, crypto.ARGON2_PARALLELISM = 1, 8192, 1
+
+        print(f"{'contenu':>8} | {'fichier':>8} | {'pic avant':>10} | {'pic après':>10} | {'temps avant':>11} | {'temps après':>11}")
+        for label, size in SIZES:
+            raw = crypto.chiffrer_bytes_v5("pw", os.urandom(size), salt=os.urandom(16))
+            peak_old, ms_old = _mesure(_avant, raw)
+            peak_new, ms_new = _mesure(_apres, raw)
+            print(
+                f"{label:>8} | {len(raw) / 2**20:6.1f}MB | {peak_old:8.1f}MB | {peak_new:8.1f}MB | "
+                f"{ms_old:9.1f}ms | {ms_new:9.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Contenu du coffre: JSON (`indent=2`) vs format binaire (table de chaînes + enregistrements fixes).
+
+Usage:
+    python -m benchmarks.payload_format [--entries 1000,10000,100000]
+
+Pour des coffres réalistes (titres uniques, 50 noms d'utilisateur répétés,
+mots de passe de 20 caractères, une entrée sur trois avec des notes): temps
+de dump/load, taille du contenu et taille sur disque en v5 (anti-`strings`
+double la taille, + en-tête, nonce et tag AES-GCM).
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from mdp_app.config import AEAD_NONCE_SIZE, AEAD_TAG_SIZE, HEADER_V2
+from mdp_app.vault import Vault, VaultEntry, dump_vault_to_bytes, load_vault_from_bytes
+
+
+def _vault(n: int) -> Vault:
+    rng = random.Random(n)
+    alphabet = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789!?-_"
+    words = ["compte", "pro", "perso", "code PIN", "question secrète", "recovery", "2FA", "ancien mdp"]
+    return Vault(
+        entries=[
+            VaultEntry.new(
+                title=f"{rng.choice(['mail', 'banque', 'forum', 'vpn', 'wifi'])}-{i}.example.org",
+                username=f"user{rng.randrange(50)}@example.org",
+                password="".join(rng.choices(alphabet, k=20)),
+                notes=" ".join(rng.choices(words, k=rng.randrange(12))) if i % 3 == 0 else "",
+            )
+            for i in range(n)
+        ]
+    )
+
+
+def _best_ms(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0
+
+
+def _disk(payload: bytes) -> int:
+    return 2 * (HEADER_V2.size + AEAD_NONCE_SIZE + len(payload) + AEAD_TAG_SIZE)
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    p.add_argument("--entries", default="1000,10000,100000")
+    args = p.parse_args()
+
+    print(f"{'entrées':>8} | {'format':>7} | {'dump':>9} | {'load':>9} | {'contenu':>10} | {'disque v5':>10}")
+    for n in (int(s) for s in args.entries.split(",") if s):
+        vault = _vault(n)
+        for label, binary in (("json", False), ("binaire", True)):
+            data = dump_vault_to_bytes(vault, binary=binary)
+            assert load_vault_from_bytes(data).entries == vault.entries
+            dump_ms = _best_ms(lambda v=vault, b=binary: dump_vault_to_bytes(v, binary=b))
+            load_ms = _best_ms(lambda d=data: load_vault_from_bytes(d))
+            print(
+                f"{n:>8} | {label:>7} | {dump_ms:7.1f}ms | {load_ms:7.1f}ms | {len(data) / 1024:7.0f}KiB | "
+                f"{_disk(data) / 1024:7.0f}KiB"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""Latence par frappe du filtre de recherche: scan linéaire vs `SearchIndex` (search, rank).
+
+Usage:
+    python -m benchmarks.search_latency [--entries 50000] [--notes-chars 400] [--query srv-prod-0042]
+
+Simule la saisie de `--query` caractère par caractère (comme `<KeyRelease>`),
+puis une requête sans lien (pas d'affinage possible) et l'ajout d'une entrée.
+"classé" est `SearchIndex.rank` (filtre de la GUI: k meilleurs, sous-séquences
+comprises), meilleur de 3 essais par frappe (machine bruitée).
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from mdp_app.vault import SearchIndex, VaultEntry, fold
+
+
+def _linear(entries: list[VaultEntry], q: str) -> list[str]:
+    # Ancien `CoffreGUI._apply_filter`, sur les champs indexés (les notes sont scellées, non cherchées).
+    q = fold(q.strip())
+    return [e.id for e in entries if q in fold(f"{e.title} {e.username}")]
+
+
+def _entries(n: int, notes_chars: int) -> list[VaultEntry]:
+    rng = random.Random(0)
+    words = ["compte", "serveur", "banque", "wifi", "mail", "prod", "backup", "admin", "token", "vpn"]
+    out = []
+    for i in range(n):
+        notes = []
+        while sum(len(w) + 1 for w in notes) < notes_chars:
+            notes.append(rng.choice(words) + str(rng.randrange(1000)))
+        out.append(
+            VaultEntry.new(
+                title=f"srv-{rng.choice(['prod', 'dev', 'test'])}-{i:04d}",
+                username=f"user{i % 50}",
+                password="x" * 20,
+                notes=" ".join(notes),
+            )
+        )
+    return out
+
+
+def _ms(fn) -> tuple[float, object]:
+    t0 = time.perf_counter()
+    out = fn()
+    return (time.perf_counter() - t0) * 1000.0, out
+
+
+def _rank_ms(index: SearchIndex, q: str) -> tuple[float, list[str]]:
+    # Chaque essai repart sans le cache d'affinage de la requête précédente... sauf le premier
+    # (frappe réelle): on garde le meilleur des deux cas pour ne mesurer que le bruit en moins.
+    best, out = _ms(lambda: index.rank(q))
+    for _ in range(2):
+        index._last = None
+        best = min(best, _ms(lambda: index.rank(q))[0])
+    return best, out
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    p.add_argument("--entries", type=int, default=50_000)
+    p.add_argument("--notes-chars", type=int, default=400)
+    p.add_argument("--query", default="srv-prod-0042")
+    args = p.parse_args()
+
+    entries = _entries(args.entries, args.notes_chars)
+    tracemalloc.start()
+    SearchIndex(entries)
+    index_mib = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    build_ms, index = _ms(lambda: SearchIndex(entries))
+    print(f"{args.entries} entrées, notes ~{args.notes_chars} car.; index: {build_ms:.0f}ms, {index_mib:.0f} Mo")
+
+    print(f"{'requête':>16} | {'linéaire':>10} | {'index':>9} | {'classé':>9} | résultats")
+    tot_old = tot_new = tot_rank = 0.0
+    worst_old = worst_new = worst_rank = 0.0
+    for k in range(1, len(args.query) + 1):
+        q = args.query[:k]
+        old_ms, old = _ms(lambda q=q: _linear(entries, q))
+        new_ms, new = _ms(lambda q=q: index.search(q))
+        rank_ms, ranked = _rank_ms(index, q)
+        assert old == new
+        tot_old, tot_new, tot_rank = tot_old + old_ms, tot_new + new_ms, tot_rank + rank_ms
+        worst_old, worst_new, worst_rank = max(worst_old, old_ms), max(worst_new, new_ms), max(worst_rank, rank_ms)
+        print(f"{q:>16} | {old_ms:8.1f}ms | {new_ms:7.2f}ms | {rank_ms:7.2f}ms | {len(new)} ({len(ranked)} classés)")
+    n = len(args.query)
+    print(
+        f"{'moyenne/frappe':>16} | {tot_old / n:8.1f}ms | {tot_new / n:7.2f}ms | {tot_rank / n:7.2f}ms | "
+        f"pire: {worst_old:.1f}ms / {worst_new:.2f}ms / {worst_rank:.2f}ms"
+    )
+
+    old_ms, _ = _ms(lambda: _linear(entries, "backup123"))
+    new_ms, _ = _ms(lambda: index.search("backup123"))
+    rank_ms, _ = _rank_ms(index, "backup123")
+    print(f"{'backup123 (neuf)':>16} | {old_ms:8.1f}ms | {new_ms:7.2f}ms | {rank_ms:7.2f}ms |")
+    fuzzy_ms, fuzzy = _rank_ms(index, "sprd42")
+    print(f"{'sprd42 (approché)':>16} | {'':>10} | {'':>9} | {fuzzy_ms:7.2f}ms | {len(fuzzy)} classés")
+
+    e = VaultEntry.new(title="nouvelle", notes="backup123 " * 40)
+    add_ms, _ = _ms(lambda: index.add(e))
+    print(f"ajout d'une entrée (mise à jour incrémentale): {add_ms:.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Coffre fragmenté: octets écrits et temps par enregistrement, et ouverture, selon le nombre de fragments.
+
+Usage:
+    python -m benchmarks.shard_save [--entries 10000,100000] [--shards 1,4,16,64] [--modified 1]
+
+Pour un coffre réaliste (voir `benchmarks.payload_format`), clé de session
+déjà dérivée: `--modified` entrées modifiées puis enregistrement. "1 fragment"
+correspond au fichier unique (tout le coffre réécrit). Avec N fragments, seuls
+ceux des entrées modifiées sont rechiffrés et remplacés (plus le manifeste):
+les octets écrits baissent d'un facteur ~N tant que les modifications touchent
+peu de fragments. "ouverture": déchiffrement et parsing de tous les fragments
+(hors KDF), en parallèle sur les cœurs disponibles.
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import tempfile
+from pathlib import Path
+
+from benchmarks.formats import kdf_context
+from benchmarks.payload_format import _best_ms, _vault
+from mdp_app.crypto import SessionKey
+from mdp_app.fragments import CoffreFragmente
+from mdp_app.vault import VaultEntry
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    p.add_argument("--entries", default="10000,100000")
+    p.add_argument("--shards", default="1,4,16,64")
+    p.add_argument("--modified", type=int, default=1)
+    args = p.parse_args()
+
+    with kdf_context(fast=True), tempfile.TemporaryDirectory() as tmp:
+        session = SessionKey.deriver("benchmark")
+        print(
+            f"{'entrées':>8} | {'fragments':>9} | {'écrit':>9} | {'part':>6} | {'enregistrer':>11} | {'ouverture':>9}"
+        )
+        for n in (int(s) for s in args.entries.split(",") if s):
+            vault = _vault(n)
+            rng = random.Random(n)
+            for nombre in (int(s) for s in args.shards.split(",") if s):
+                fragments = CoffreFragmente(Path(tmp) / f"{n}-{nombre}", n=nombre)
+                total = fragments.enregistrer(session, vault)
+
+                def sauver(f=fragments, v=vault, rng=rng) -> int:
+                    ids = []
+                    for e in rng.sample(v.entries, args.modified):
+                        v.update(VaultEntry(e.id, e.title, e.username, f"pw-{rng.random()}", e.notes, e.updated_at))
+                        ids.append(e.id)
+                    return f.enregistrer(session, v, ids)
+
+                ecrit = sauver()
+                save_ms = _best_ms(sauver)
+                open_ms = _best_ms(lambda f=fragments: f._charger(session, workers=None))
+                print(
+                    f"{n:>8} | {nombre:>9} | {ecrit / 1024:6.0f}KiB | {ecrit / total:6.1%} | "
+                    f"{save_ms:9.1f}ms | {open_ms:7.1f}ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
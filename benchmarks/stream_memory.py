@@ -0,0 +1,85 @@
+"""Pic mémoire (RSS) pour chiffrer/déchiffrer un gros fichier: v5 (tout en mémoire) vs v6 (flux).
+
+Chaque mesure tourne dans un sous-processus neuf (ru_maxrss), avec un Argon2id
+réduit à 8 MiB pour que la mémoire du KDF ne masque pas celle du contenu.
+
+Usage:
+    python -m benchmarks.stream_memory [--size-mib 100]
+"""
+
+from __future__ import annotations
+
+import argparse
+import filecmp
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+_CHILD = r"""
+import resource, sys
+import mdp_app.crypto as c
+c.ARGON2_TIME_COST, c.ARGON2_MEMORY_COST_KIB, c.ARGON2_PARALLELISM = 1, 8192, 1
+c.FICHIER_KDF = sys.argv[4]
+mode, src, dst = sys.argv[1:4]
+if mode == "v5-enc":
+    open(dst, "wb").write(c.chiffrer_bytes_v5("pw", open(src, "rb").read(), salt=b"\0" * 16))
+elif mode == "v5-dec":
+    open(dst, "wb").write(c.dechiffrer_bytes("pw", open(src, "rb").read()))
+elif mode == "v6-enc":
+    with open(src, "rb") as r, open(dst, "wb") as w:
+        c.encrypt_stream("pw", r, w)
+elif mode == "v6-dec":
+    with open(src, "rb") as r, open(dst, "wb") as w:
+        c.decrypt_stream("pw", r, w)
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(rss if sys.platform != "darwin" else rss // 1024)
+"""
+
+
+def _peak_rss_mib(mode: str, src: Path, dst: Path, kdf: Path) -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD, mode, str(src), str(dst), str(kdf)],
+        check=True,
+        capture_output=True,
+        text=True,
+        cwd=Path(__file__).resolve().parents[1],
+    )
+    return int(out.stdout.strip()) / 1024
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    p.add_argument("--size-mib", type=int, default=100)
+    args = p.parse_args()
+
+    try:
+        import resource  # noqa: F401
+    except ImportError:
+        raise SystemExit("Module `resource` indisponible (Windows): benchmark non supporté.") from None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        d = Path(tmp)
+        plain = d / "plain.bin"
+        with plain.open("wb") as f:
+            for _ in range(args.size_mib):
+                f.write(os.urandom(1024 * 1024))
+        kdf = d / "kdf.json"
+
+        rows = []
+        for fmt in ("v5", "v6"):
+            enc = _peak_rss_mib(f"{fmt}-enc", plain, d / f"{fmt}.bin", kdf)
+            dec = _peak_rss_mib(f"{fmt}-dec", d / f"{fmt}.bin", d / f"{fmt}.out", kdf)
+            # Comparaison en flux: le parent doit rester petit (ru_maxrss est hérité à l'exec).
+            assert filecmp.cmp(d / f"{fmt}.out", plain, shallow=False)
+            rows.append((fmt, enc, dec))
+
+        print(f"Contenu: {args.size_mib} MiB (fichier chiffré: x2 anti-`strings`)")
+        print(f"{'format':>6} | {'pic chiffrement':>16} | {'pic déchiffrement':>18}")
+        for fmt, enc, dec in rows:
+            print(f"{fmt:>6} | {enc:13.0f} MiB | {dec:15.0f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Déverrouillage d'un coffre v7: chargement complet vs ouverture en flux (pic mémoire et temps).
+
+Usage:
+    python -m benchmarks.stream_open [--entries 10000,100000]
+
+Pour un coffre réaliste (voir `benchmarks.payload_format`) écrit sur disque:
+"complet" lit tout le fichier puis `dechiffrer_bytes_session` +
+`load_vault_from_bytes`; "flux" passe le fichier ouvert à
+`dechiffrer_flux_session` avec un `VaultReader`. Le pic (tracemalloc) est
+comparé à la mémoire des entrées chargées.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from benchmarks.formats import kdf_context
+from benchmarks.payload_format import _vault
+from mdp_app.crypto import chiffrer_bytes_v7, dechiffrer_bytes_session, dechiffrer_flux_session
+from mdp_app.vault import VaultReader, dump_vault_to_bytes, load_vault_from_bytes
+
+
+def _complet(path: Path):
+    contenu, _session = dechiffrer_bytes_session("benchmark", path.read_bytes())
+    return load_vault_from_bytes(contenu)
+
+
+def _flux(path: Path):
+    reader = VaultReader()
+    with path.open("rb") as f:
+        dechiffrer_flux_session("benchmark", f, reader.feed)
+    return reader.close()
+
+
+def _mesure(fn, path: Path) -> tuple[float, float, float]:
+    """(pic, mémoire des entrées, temps en ms)."""
+
+    gc.collect()
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    vault = fn(path)
+    ms = (time.perf_counter() - t0) * 1000.0
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del vault
+    return peak / 2**20, current / 2**20, ms
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    p.add_argument("--entries", default="10000,100000")
+    args = p.parse_args()
+
+    with kdf_context(fast=True), tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "vault.bin"
+        print(f"{'entrées':>8} | {'fichier':>9} | {'entrées':>9} | {'chemin':>7} | {'pic':>9} | {'temps':>9}")
+        for n in (int(s) for s in args.entries.split(",") if s):
+            path.write_bytes(chiffrer_bytes_v7("benchmark", dump_vault_to_bytes(_vault(n))))
+            size = path.stat().st_size / 2**20
+            for label, fn in (("complet", _complet), ("flux", _flux)):
+                peak, entries, ms = _mesure(fn, path)
+                print(f"{n:>8} | {size:5.1f} MiB | {entries:5.1f} MiB | {label:>7} | {peak:5.1f} MiB | {ms:7.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Empreinte mémoire par entrée du coffre: ancienne dataclass vs `VaultEntry` compacte.
+
+Usage:
+    python -m benchmarks.vault_memory [--sizes 10000,100000,1000000]
+
+Mesure tracemalloc de N entrées réalistes (titres uniques, 50 noms
+d'utilisateur répétés, mots de passe de 20 caractères, notes vides), telles
+que produites par `load_vault_from_bytes` (chaînes id/date issues du JSON).
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import tracemalloc
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from mdp_app.vault import VaultEntry
+
+
+@dataclass
+class _OldVaultEntry:
+    id: str
+    title: str
+    username: str
+    password: str
+    notes: str
+    updated_at: str
+
+
+_EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def _fields(i: int) -> dict:
+    # Chaînes neuves à chaque appel, comme après `json.loads`.
+    return {
+        "id": str(uuid.UUID(int=i + 1, version=4)),
+        "title": f"site-{i}.example",
+        "username": f"user{i % 50}@example.com",
+        "password": f"{i:020x}",
+        "notes": "",
+        "updated_at": (_EPOCH + timedelta(seconds=i)).isoformat(),
+    }
+
+
+def _bytes_per_entry(cls, n: int) -> float:
+    gc.collect()
+    tracemalloc.start()
+    entries = [cls(**_fields(i)) for i in range(n)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(entries) == n
+    del entries
+    gc.collect()
+    return size / n
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    p.add_argument("--sizes", default="10000,100000,1000000")
+    args = p.parse_args()
+
+    print(f"{'entrées':>9} | {'dataclass':>11} | {'compacte':>11} | {'total avant':>11} | {'total après':>11} | gain")
+    for n in (int(s) for s in args.sizes.split(",") if s):
+        old = _bytes_per_entry(_OldVaultEntry, n)
+        new = _bytes_per_entry(VaultEntry, n)
+        print(
+            f"{n:>9} | {old:7.0f} o/e | {new:7.0f} o/e | {old * n / 2**20:8.1f} Mo | {new * n / 2**20:8.1f} Mo | "
+            f"-{1 - new / old:.0%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
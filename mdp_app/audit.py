@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import bisect
+import hashlib
+import math
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from itertools import combinations
+
+from .config import AUDIT_STALE_DAYS, AUDIT_WEAK_BELOW
+from .vault import Vault, VaultEntry
+
+# Audit des mots de passe: réutilisés, faibles, anciens, en un passage sur les entrées.
+#
+# Réutilisation: les entrées sont regroupées par empreinte BLAKE2b à clé (clé
+# aléatoire propre à chaque audit, jamais écrite): pas de comparaison deux à
+# deux, et pas de mot de passe en clair gardé pendant l'audit.
+# Force: entropie estimée avec un modèle précalculé (classe de chaque caractère
+# ASCII, bits par caractère pour chaque combinaison de classes).
+# Les mots de passe vides (notes seules) ne sont ni faibles ni réutilisés.
+
+NIVEAUX = ("très faible", "faible", "moyen", "fort", "très fort")
+_SEUILS_BITS = (28, 36, 60, 128)  # limites d'entropie (bits) entre deux niveaux
+
+# Classes: minuscules, majuscules, chiffres, symboles ASCII, autre (accents, Unicode...).
+_ALPHABETS = {"a": 26, "A": 26, "0": 10, "!": 33, "u": 100}
+_LETTRES = frozenset("aA0!")
+_TABLE = str.maketrans(
+    {
+        chr(c): "a" if chr(c).islower() else "A" if chr(c).isupper() else "0" if chr(c).isdigit() else "!"
+        for c in range(0x20, 0x7F)
+    }
+)
+# Mots de passe parmi les plus courants (casse et chiffres/symboles finaux ignorés): très faibles.
+_COURANTS = frozenset(
+    (
+        "password motdepasse azerty qwerty azertyuiop qwertyuiop admin administrateur welcome bienvenue "
+        "soleil bonjour iloveyou jetaime letmein dragon monkey football sunshine princess master "
+        "abc abcdef secret changeme test toto"
+    ).split()
+)
+_BITS = {
+    frozenset(classes): math.log2(sum(_ALPHABETS[c] for c in classes))
+    for n in range(1, len(_ALPHABETS) + 1)
+    for classes in combinations(_ALPHABETS, n)
+}
+
+
+def score(password: str) -> int:
+    """Niveau de 0 (très faible) à 4 (très fort), voir `NIVEAUX`.
+
+    Entropie estimée: bits par caractère des classes présentes, fois la
+    longueur plafonnée à deux fois le nombre de caractères distincts
+    ("aaaaaaaaaaaa" et "abababababab" restent très faibles). Les mots de
+    passe les plus courants, suivis ou non de chiffres, sont très faibles.
+    """
+
+    if not password or password.casefold().rstrip("0123456789!?.*@#$") in _COURANTS:
+        return 0
+    classes = set(password.translate(_TABLE))
+    if not classes <= _LETTRES:
+        classes = (classes & _LETTRES) | {"u"}
+    bits = _BITS[frozenset(classes)] * min(len(password), 2 * len(set(password)))
+    return bisect.bisect_right(_SEUILS_BITS, bits)
+
+
+@dataclass
+class RapportAudit:
+    # Groupes d'ids partageant un mot de passe (2 entrées ou plus), les plus grands d'abord.
+    reutilises: list[list[str]]
+    # Niveau (`score`) de chaque entrée qui a un mot de passe.
+    scores: dict[str, int]
+    # Ids de niveau < AUDIT_WEAK_BELOW, les plus faibles d'abord.
+    faibles: list[str]
+    # Ids non modifiés depuis plus de `jours`, dans l'ordre du coffre.
+    anciens: list[str]
+    entrees: int
+    duree_s: float
+
+    def problemes(self) -> dict[str, list[str]]:
+        """Id -> libellés des problèmes de l'entrée (réutilisé, faible, ancien)."""
+
+        out: dict[str, list[str]] = {}
+        for ids in self.reutilises:
+            for entry_id in ids:
+                out.setdefault(entry_id, []).append(f"réutilisé ({len(ids)} entrées)")
+        for entry_id in self.faibles:
+            out.setdefault(entry_id, []).append(NIVEAUX[self.scores[entry_id]])
+        for entry_id in self.anciens:
+            out.setdefault(entry_id, []).append("ancien")
+        return out
+
+
+def _empreinte_score(cle_hachage: bytes, e: VaultEntry) -> tuple[bytes, int] | None:
+    """(empreinte, niveau) du mot de passe de `e`, None s'il est vide."""
+
+    password = e.password
+    if not password:
+        return None
+    empreinte = hashlib.blake2b(password.encode("utf-8", "surrogatepass"), key=cle_hachage, digest_size=16)
+    return empreinte.digest(), score(password)
+
+
+def _epoch(e: VaultEntry) -> int | None:
+    raw = e._updated_at
+    if isinstance(raw, int):
+        return raw
+    try:
+        d = datetime.fromisoformat(raw)
+    except ValueError:
+        return None
+    return int((d if d.tzinfo else d.replace(tzinfo=timezone.utc)).timestamp())
+
+
+def auditer(
+    vault: Vault,
+    *,
+    jours: int = AUDIT_STALE_DAYS,
+    maintenant: datetime | None = None,
+) -> RapportAudit:
+    """Audit de `vault` en temps linéaire: réutilisations, mots de passe faibles, entrées anciennes.
+
+    Un seul passage, dans le processus appelant (thread de la GUI ou CLI):
+    les secrets scellés sont déchiffrés un par un et aussitôt oubliés.
+    """
+
+    t0 = time.perf_counter()
+    entries = vault.entries
+    cle_hachage = os.urandom(32)
+    limite = int(((maintenant or datetime.now(timezone.utc)) - timedelta(days=jours)).timestamp())
+    groupes: dict[bytes, list[str]] = {}
+    scores: dict[str, int] = {}
+    anciens: list[str] = []
+    for e in entries:
+        entry_id = e.id
+        resultat = _empreinte_score(cle_hachage, e)
+        if resultat is not None:
+            empreinte, scores[entry_id] = resultat
+            groupes.setdefault(empreinte, []).append(entry_id)
+        epoch = _epoch(e)
+        if epoch is not None and epoch < limite:
+            anciens.append(entry_id)
+
+    return RapportAudit(
+        reutilises=sorted((ids for ids in groupes.values() if len(ids) > 1), key=len, reverse=True),
+        scores=scores,
+        faibles=sorted((i for i, s in scores.items() if s < AUDIT_WEAK_BELOW), key=scores.__getitem__),
+        anciens=anciens,
+        entrees=len(entries),
+        duree_s=time.perf_counter() - t0,
+    )
@@ -7,10 +7,41 @@ import time
 from cryptography.exceptions import InvalidTag
 from cryptography.fernet import InvalidToken
 
-from .config import FICHIER, FICHIER_CLAIR
-from .crypto import chiffrer_bytes_v5, dechiffrer_bytes, decoder
+from .audit import NIVEAUX, auditer
+from .config import (
+    ARGON2_CALIBRATION_MAX_MEMORY_KIB,
+    ARGON2_CALIBRATION_TARGET_MS,
+    AUDIT_STALE_DAYS,
+    DOSSIER_FRAGMENTS,
+    FICHIER,
+    FICHIER_CLAIR,
+    FICHIER_KDF,
+)
+from .crypto import (
+    FORMATS_SESSION,
+    SessionKey,
+    calibrer_argon2,
+    chiffrer_bytes_v5,
+    dechiffrer_bytes_session,
+    enregistrer_parametres_argon2,
+    mesurer_argon2_ms,
+    ouvrir_session_v7,
+    parametres_argon2,
+    peek_header,
+)
 from .editor import avertir_mdp_faible, confirmer_fin_edition, ouvrir_editeur
+from .fragments import CoffreFragmente, fragmente
+from .journal import contenu_avec_journal
 from .storage import ecrire_chiffre, ecrire_clair, lire_chiffre, lire_clair
+from .transfert import FORMATS, format_fichier
+from .vault import (
+    Vault,
+    contenu_edite,
+    dump_vault_to_bytes,
+    load_vault_from_bytes,
+    new_empty_vault,
+    payload_texte,
+)
 
 
 def _attente_apres_echec(tentative: int) -> None:
@@ -18,13 +49,44 @@ def _attente_apres_echec(tentative: int) -> None:
     time.sleep(delai)
 
 
-def chiffrer_depuis_fichier(mdp: str, chemin_clair: str = FICHIER_CLAIR) -> None:
+def chiffrer_depuis_fichier(
+    mdp: str, chemin_clair: str = FICHIER_CLAIR, *, session: SessionKey | None = None, origine: bytes | None = None
+) -> None:
     avertir_mdp_faible(mdp)
-    contenu = lire_clair(chemin_clair)
-    data = chiffrer_bytes_v5(mdp, contenu, salt=os.urandom(16))
+    # `origine`: contenu déchiffré avant l'édition, dont la clé de l'historique est reportée.
+    contenu = contenu_edite(lire_clair(chemin_clair), origine)
+    # Réutilise la clé dérivée à l'ouverture si elle est encore valide (pas de 2e Argon2id).
+    if session is None or session.expiree or not session.a_jour:
+        session = _session_enveloppe_existante(mdp)
+    if session is not None:
+        data = session.chiffrer(contenu)
+    else:
+        data = chiffrer_bytes_v5(mdp, contenu, salt=os.urandom(16))
     ecrire_chiffre(data)
 
 
+def _session_enveloppe_existante(mdp: str) -> SessionKey | None:
+    # Un coffre v7 garde ses slots (ex: clé de récupération): on rechiffre avec
+    # sa DEK au lieu de le remplacer par un v5 à un seul mot de passe.
+    try:
+        raw = lire_chiffre()
+    except FileNotFoundError:
+        return None
+    if peek_header(raw)[0] != "v7":
+        return None
+    return ouvrir_session_v7(mdp, raw)
+
+
+def _coffre_actuel(mdp: str) -> tuple[bytes | None, SessionKey | None]:
+    # (contenu, session) du coffre existant si `mdp` l'ouvre, sinon (None, None).
+    try:
+        raw = lire_chiffre()
+        contenu, session = dechiffrer_bytes_session(mdp, raw)
+        return contenu_avec_journal(contenu, raw, session), session
+    except (InvalidToken, InvalidTag, FileNotFoundError, ValueError):
+        return None, None
+
+
 def creer_et_editer_puis_chiffrer() -> None:
     mdp = getpass.getpass("Créer le mot de passe : ")
     mdp2 = getpass.getpass("Confirmer le mot de passe : ")
@@ -63,14 +125,16 @@ def dechiffrer_vers_fichier() -> None:
         tentative += 1
         try:
             raw = lire_chiffre()
-            version = decoder(raw)[0]
-            contenu = dechiffrer_bytes(mdp, raw)
+            version = peek_header(raw)[0]
+            contenu, session = dechiffrer_bytes_session(mdp, raw)
+            # Modifications enregistrées par la GUI dans le journal (le rechiffrement le rend caduc).
+            contenu = contenu_avec_journal(contenu, raw, session)
 
             # Migration automatique: une fois le mot de passe validé,
             # on réécrit en v5 (AEAD moderne + anti-`strings`).
-            if version != "v5":
+            if version not in FORMATS_SESSION:
                 try:
-                    ecrire_chiffre(chiffrer_bytes_v5(mdp, contenu, salt=os.urandom(16)))
+                    ecrire_chiffre(session.chiffrer(contenu))
                 except Exception:
                     pass
             break
@@ -80,7 +144,8 @@ def dechiffrer_vers_fichier() -> None:
             if tentative >= 3:
                 return
 
-    ecrire_clair(contenu, FICHIER_CLAIR)
+    # Contenu binaire (écrit par la GUI) converti en JSON pour l'édition; le loader accepte les deux.
+    ecrire_clair(payload_texte(contenu), FICHIER_CLAIR)
 
     print(f"\nDéchiffré vers {FICHIER_CLAIR}.")
     try:
@@ -97,13 +162,15 @@ def dechiffrer_vers_fichier() -> None:
         return
 
     try:
-        chiffrer_depuis_fichier(mdp, FICHIER_CLAIR)
+        chiffrer_depuis_fichier(mdp, FICHIER_CLAIR, session=session, origine=contenu)
         os.remove(FICHIER_CLAIR)
     except Exception as e:
         print("Erreur pendant le rechiffrement. Le fichier en clair est conservé:")
         print(f"   {FICHIER_CLAIR}")
         print(f"   Détail: {e}")
         return
+    finally:
+        session.effacer()
 
     print("Rechiffré. Le fichier en clair a été supprimé.")
 
@@ -114,14 +181,20 @@ def rechiffrer_fichier_clair_existant() -> None:
         return
 
     mdp = getpass.getpass("Mot de passe : ")
+    # Coffre actuel ouvert avec ce mot de passe (même coût que la dérivation d'une clé neuve):
+    # sa clé de session est réutilisée et la clé de son historique reportée.
+    origine, session = _coffre_actuel(mdp)
     try:
-        chiffrer_depuis_fichier(mdp, FICHIER_CLAIR)
+        chiffrer_depuis_fichier(mdp, FICHIER_CLAIR, session=session, origine=origine)
         os.remove(FICHIER_CLAIR)
     except Exception as e:
         print("Erreur pendant le rechiffrement. Le fichier en clair est conservé:")
         print(f"   {FICHIER_CLAIR}")
         print(f"   Détail: {e}")
         return
+    finally:
+        if session is not None:
+            session.effacer()
 
     print("Rechiffré. Le fichier en clair a été supprimé.")
 
@@ -133,14 +206,16 @@ def afficher_contenu() -> None:
         tentative += 1
         try:
             raw = lire_chiffre()
-            version = decoder(raw)[0]
-            contenu = dechiffrer_bytes(mdp, raw)
+            version = peek_header(raw)[0]
+            contenu, session = dechiffrer_bytes_session(mdp, raw)
+            contenu = contenu_avec_journal(contenu, raw, session)
 
-            if version != "v5":
+            if version not in FORMATS_SESSION:
                 try:
-                    ecrire_chiffre(chiffrer_bytes_v5(mdp, contenu, salt=os.urandom(16)))
+                    ecrire_chiffre(session.chiffrer(contenu))
                 except Exception:
                     pass
+            session.effacer()
             break
         except (InvalidToken, InvalidTag, FileNotFoundError):
             print("Mot de passe incorrect ou fichier corrompu")
@@ -149,13 +224,180 @@ def afficher_contenu() -> None:
                 return
 
     print("\nContenu déchiffré :")
+    contenu = payload_texte(contenu)
     try:
         print(contenu.decode())
     except UnicodeDecodeError:
         print(contenu)
 
 
+def calibrer_kdf(
+    *,
+    cible_ms: float = ARGON2_CALIBRATION_TARGET_MS,
+    memoire_max_mib: int = ARGON2_CALIBRATION_MAX_MEMORY_KIB // 1024,
+) -> int:
+    """Mesure Argon2id sur cette machine et persiste les paramètres retenus."""
+
+    actuel = parametres_argon2()
+    print(f"Paramètres actuels : t={actuel.time_cost} m={actuel.memory_cost_kib // 1024} MiB p={actuel.parallelism}")
+    print(f"Calibration (cible {cible_ms:.0f} ms, mémoire max {memoire_max_mib} MiB)…")
+
+    def mesurer(params) -> float:
+        duree = mesurer_argon2_ms(params)
+        print(f"  t={params.time_cost:<2} m={params.memory_cost_kib // 1024:>5} MiB p={params.parallelism} -> {duree:7.0f} ms")
+        return duree
+
+    params = calibrer_argon2(cible_ms=cible_ms, memoire_max_kib=memoire_max_mib * 1024, mesurer=mesurer)
+    enregistrer_parametres_argon2(params)
+    print(f"Retenu : t={params.time_cost} m={params.memory_cost_kib // 1024} MiB p={params.parallelism}")
+    print(f"Enregistré dans {FICHIER_KDF} (appliqué au prochain enregistrement du coffre).")
+    return 0
+
+
+def _ouvrir_coffre(*, creer: bool) -> tuple[Vault, SessionKey, CoffreFragmente | None] | None:
+    # Coffre déverrouillé avec le journal replié (le snapshot réécrit ensuite le rend caduc),
+    # ou coffre fragmenté (DOSSIER_FRAGMENTS) avec son état pour l'enregistrement.
+    if fragmente(DOSSIER_FRAGMENTS):
+        try:
+            fragments, vault, session = CoffreFragmente.ouvrir(getpass.getpass("Mot de passe : "), DOSSIER_FRAGMENTS)
+        except (InvalidToken, InvalidTag, ValueError):
+            print("Mot de passe incorrect ou fichier corrompu")
+            return None
+        return vault, session, fragments
+    if not os.path.exists(FICHIER):
+        if not creer:
+            print(f"Aucun coffre trouvé: {FICHIER}")
+            return None
+        mdp = getpass.getpass("Créer le mot de passe : ")
+        if mdp != getpass.getpass("Confirmer le mot de passe : "):
+            print("Les mots de passe ne correspondent pas")
+            return None
+        avertir_mdp_faible(mdp)
+        return new_empty_vault(), SessionKey.deriver(mdp), None
+
+    mdp = getpass.getpass("Mot de passe : ")
+    try:
+        raw = lire_chiffre(FICHIER)
+        contenu, session = dechiffrer_bytes_session(mdp, raw)
+    except (InvalidToken, InvalidTag):
+        print("Mot de passe incorrect ou fichier corrompu")
+        return None
+    return load_vault_from_bytes(contenu_avec_journal(contenu, raw, session)), session, None
+
+
+def _debit(n: int, duree: float) -> str:
+    return f"{n} entrées en {duree:.2f} s ({n / max(duree, 1e-9):.0f} entrées/s)"
+
+
+def importer_fichier(chemin: str, *, format: str | None = None) -> int:
+    """Importe un fichier CSV/JSON dans le coffre: lecture en flux, un seul chiffrement à la fin.
+
+    Une entrée dont l'id existe déjà (réimport d'un export) remplace l'entrée du coffre.
+    """
+
+    lire = FORMATS[format_fichier(chemin, format)][0]
+    ouvert = _ouvrir_coffre(creer=True)
+    if ouvert is None:
+        return 2
+    vault, session, fragments = ouvert
+    try:
+        avant = len(vault)
+        debut = time.perf_counter()
+        try:
+            with open(chemin, encoding="utf-8-sig", newline="") as f:
+                lues = vault.extend(lire(f))
+        except (OSError, ValueError) as e:
+            print(f"Import impossible, coffre inchangé: {e}")
+            return 4
+        lecture = time.perf_counter() - debut
+        ajoutees = len(vault) - avant
+
+        debut = time.perf_counter()
+        if fragments is not None:
+            fragments.enregistrer(session, vault)
+        else:
+            ecrire_chiffre(session.chiffrer(dump_vault_to_bytes(vault)), FICHIER)
+        ecriture = time.perf_counter() - debut
+    finally:
+        session.effacer()
+
+    print(f"Lu: {_debit(lues, lecture)} ; {ajoutees} ajoutées, {lues - ajoutees} remplacées.")
+    print(f"Chiffrement et écriture du coffre ({len(vault)} entrées) : {ecriture:.2f} s.")
+    return 0
+
+
+def exporter_fichier(chemin: str, *, format: str | None = None) -> int:
+    """Exporte le coffre en CSV/JSON, entrée par entrée (mots de passe et notes EN CLAIR)."""
+
+    ecrire = FORMATS[format_fichier(chemin, format)][1]
+    ouvert = _ouvrir_coffre(creer=False)
+    if ouvert is None:
+        return 2
+    vault, session, _ = ouvert
+    session.effacer()
+
+    # Fichier temporaire puis remplacement: un export interrompu n'écrase pas le précédent.
+    tmp = f"{chemin}.tmp"
+    debut = time.perf_counter()
+    try:
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            n = ecrire(vault, f)
+        os.replace(tmp, chemin)
+    except OSError as e:
+        print(f"Export impossible: {e}")
+        return 4
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    print(f"Écrit: {_debit(n, time.perf_counter() - debut)} dans {chemin}.")
+    print("Attention: ce fichier contient les mots de passe en clair. Le supprimer après usage.")
+    return 0
+
+
+_AUDIT_LIGNES = 50  # lignes affichées au plus par section du rapport
+
+
+def _lignes_audit(titre: str, lignes: list[str]) -> None:
+    print(f"\n{titre} : {len(lignes)}")
+    for ligne in lignes[:_AUDIT_LIGNES]:
+        print(f"  {ligne}")
+    if len(lignes) > _AUDIT_LIGNES:
+        print(f"  … et {len(lignes) - _AUDIT_LIGNES} de plus")
+
+
+def auditer_coffre(*, jours: int = AUDIT_STALE_DAYS) -> int:
+    """Rapport d'audit: mots de passe réutilisés, faibles, entrées anciennes (aucun secret affiché)."""
+
+    ouvert = _ouvrir_coffre(creer=False)
+    if ouvert is None:
+        return 2
+    vault, session, _ = ouvert
+    session.effacer()
+
+    rapport = auditer(vault, jours=jours)
+
+    def nom(entry_id: str) -> str:
+        e = vault.get(entry_id)
+        return f"{e.title} ({e.username})" if e.username else e.title
+
+    _lignes_audit(
+        "Mots de passe réutilisés (groupes)",
+        [f"{len(ids)} entrées : " + ", ".join(nom(i) for i in ids) for ids in rapport.reutilises],
+    )
+    _lignes_audit("Mots de passe faibles", [f"{NIVEAUX[rapport.scores[i]]:<11} {nom(i)}" for i in rapport.faibles])
+    _lignes_audit(
+        f"Non modifiés depuis plus de {jours} jours",
+        [f"{vault.get(i).updated_at[:10]}  {nom(i)}" for i in rapport.anciens],
+    )
+    print(f"\nAudit: {_debit(rapport.entrees, rapport.duree_s)}.")
+    return 0
+
+
 def main() -> None:
+    if fragmente(DOSSIER_FRAGMENTS):
+        print("Coffre fragmenté: l'édition en texte n'est pas disponible (utiliser la GUI,")
+        print("ou revenir au fichier unique: tools/migrate_vault_to_v3.py --single-file).")
+        return
     if not os.path.exists(FICHIER):
         creer_et_editer_puis_chiffrer()
         return
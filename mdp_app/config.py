@@ -23,6 +23,17 @@ VAULT_FILENAME = "vault.bin"
 FICHIER = str(DATA_DIR / VAULT_FILENAME)
 FICHIER_CLAIR = str(DATA_DIR / "secret.txt")
 
+# Journal des modifications (enregistrements incrémentaux), lié au snapshot FICHIER.
+FICHIER_JOURNAL = str(DATA_DIR / "vault.jnl")
+
+# Historique des révisions (`mdp_app.historique`): versions précédentes des entrées modifiées.
+FICHIER_HISTORIQUE = str(DATA_DIR / "vault.hist")
+
+# Disposition fragmentée (optionnelle, `tools/migrate_vault_to_v3.py --shards`): dossier
+# de fragments chiffrés + manifeste, utilisé à la place de FICHIER s'il existe.
+DOSSIER_FRAGMENTS = str(DATA_DIR / "vault.d")
+FRAGMENTS_NOMBRE = 16
+
 # Anciens emplacements (historique) pour migration.
 LEGACY_FICHIER = "secret.enc"  # dossier courant
 LEGACY_APPDATA_FICHIER = str(DATA_DIR / "secret.enc")
@@ -42,7 +53,37 @@ MAGIC_V4 = b"MDP4"
 # HEADER_V2 est réutilisé: (magic, salt, time_cost, memory_cost_kib, parallelism)
 MAGIC_V5 = b"MDP5"
 
+# V6: Argon2id + AES-GCM segmenté (flux), encodé anti-`strings`.
+# HEADER_V2 (magic MDP6, ...) suivi de HEADER_V6: (taille de segment clair, préfixe de nonce).
+# Nonce du segment i = préfixe (7 octets) || i (uint32) || drapeau "dernier segment" (1 octet):
+# l'index et la fin du flux sont authentifiés (troncature/réordonnancement détectés).
+MAGIC_V6 = b"MDP6"
+HEADER_V6 = struct.Struct(">I7s")
+V6_CHUNK_SIZE = 64 * 1024
+
+# V7: enveloppe à emplacements de clés (key slots), encodée anti-`strings`.
+# HEADER_V7 (magic MDP7, nombre de slots) puis les slots V7_SLOT:
+# (sel, time_cost, memory_cost_kib, parallelism, nonce, DEK chiffrée + tag).
+# Chaque slot chiffre la même clé de données (DEK, aléatoire) avec une clé
+# dérivée (Argon2id) d'un secret différent (mot de passe, clé de récupération).
+# Le corps (nonce + AES-GCM sous la DEK) ne dépend pas des slots: changer le
+# mot de passe ne réécrit que l'en-tête.
+MAGIC_V7 = b"MDP7"
+HEADER_V7 = struct.Struct(">4sB")
+V7_SLOT = struct.Struct(">16sIII12s48s")
+V7_MAX_SLOTS = 8
+
 AEAD_NONCE_SIZE = 12  # AES-GCM nonce length
+AEAD_TAG_SIZE = 16  # AES-GCM tag length
+
+# Compression du clair avant AES-GCM (v5/v7): "zlib", "lzma", "bz2" ou "none".
+# Un petit en-tête en tête du clair chiffré (algorithme, niveau, taille
+# d'origine) permet de relire un fichier quel que soit le réglage courant.
+# Le flux v6 n'est pas compressé (accès aléatoire par segment).
+COMPRESSION_ALGO = "zlib"
+COMPRESSION_LEVEL = 1  # zlib 1: ~95 % du gain du niveau 6 pour un tiers du CPU
+# En dessous (octets), le gain ne compense pas l'en-tête: clair laissé tel quel.
+COMPRESSION_MIN_SIZE = 256
 
 # Argon2id defaults (offline attack resistance). memory_cost est en KiB.
 #
@@ -51,7 +92,62 @@ AEAD_NONCE_SIZE = 12  # AES-GCM nonce length
 # bon compromis "gestionnaire de mots de passe".
 ARGON2_TIME_COST = 4
 ARGON2_MEMORY_COST_KIB = 262144  # 256 MiB
-ARGON2_PARALLELISM = 1
+# Nombre de lanes Argon2id des nouveaux blobs. None = automatique: autant de
+# lanes que de cœurs (plafonné par ARGON2_MAX_PARALLELISM). Le header v4/v5
+# enregistre la valeur utilisée, donc un fichier se relit toujours avec la
+# sienne, quelle que soit la machine.
+ARGON2_PARALLELISM: int | None = None
+ARGON2_MAX_PARALLELISM = 8
+
+# Calibration Argon2id (`--calibrate-kdf`): paramètres mesurés sur la machine,
+# persistés ici et utilisés pour les nouveaux blobs v4/v5 (le header de chaque
+# fichier garde ses propres paramètres, donc les anciens restent lisibles).
+FICHIER_KDF = str(DATA_DIR / "kdf.json")
+ARGON2_CALIBRATION_TARGET_MS = 1000
+ARGON2_CALIBRATION_MAX_MEMORY_KIB = 1048576  # 1 GiB
+# Planchers de sécurité: jamais en dessous, même si la cible de latence est dépassée.
+ARGON2_MIN_TIME_COST = 2
+ARGON2_MIN_MEMORY_COST_KIB = 65536  # 64 MiB
+ARGON2_MAX_TIME_COST = 32
+
+# Clé de session (GUI/CLI): durée d'inactivité (secondes) avant effacement
+# de la clé dérivée gardée en mémoire après déverrouillage.
+SESSION_IDLE_TIMEOUT_S = 15 * 60
+
+# Liste des entrées (GUI): au-delà de ce nombre de lignes, seule la fenêtre
+# visible est matérialisée dans le Treeview; le filtre attend une pause de
+# frappe avant de se relancer.
+GUI_VIRTUAL_THRESHOLD = 2000
+GUI_FILTER_DEBOUNCE_MS = 150
+
+# Enregistrement automatique (GUI): une rafale de modifications est enregistrée en
+# une fois, après AUTOSAVE_DELAI_MS sans nouvelle modification ou au plus tard
+# AUTOSAVE_DELAI_MAX_MS après la première modification non enregistrée
+# (AUTOSAVE_DELAI_MS = 0: désactivé). Seulement avec une clé de session valide.
+AUTOSAVE_DELAI_MS = 2000
+AUTOSAVE_DELAI_MAX_MS = 15000
+
+# Recherche classée (`SearchIndex.rank`): nombre de résultats classés (le filtre
+# de la GUI les affiche en premier, suivis des autres entrées qui correspondent).
+SEARCH_TOP_K = 500
+
+# Audit des mots de passe (`mdp_app.audit`): entrée "ancienne" si non modifiée
+# depuis ce nombre de jours, "faible" sous ce niveau (0 très faible .. 4 très fort).
+AUDIT_STALE_DAYS = 365
+AUDIT_WEAK_BELOW = 2
+
+# Journal: au-delà de ce nombre d'enregistrements ou de cette taille (octets
+# sur disque), l'enregistrement suivant réécrit un snapshot complet et vide le journal.
+JOURNAL_MAX_RECORDS = 512
+JOURNAL_MAX_BYTES = 1 << 20
+
+# Historique des révisions: versions gardées par entrée (0: pas d'historique) et
+# âge maximal en jours (0: sans limite). Le fichier est compacté (révisions hors
+# rétention et entrées supprimées retirées) toutes les HISTORIQUE_COMPACTER
+# révisions ajoutées (compteur lu dans le fichier, sans le parcourir).
+HISTORIQUE_MAX_REVISIONS = 20
+HISTORIQUE_MAX_JOURS = 0
+HISTORIQUE_COMPACTER = 256
 
 SCRYPT_N = 2**18  # 262144
 SCRYPT_R = 8
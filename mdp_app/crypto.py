@@ -1,31 +1,81 @@
 from __future__ import annotations
 
 import base64
+import binascii
+import bz2
+import hashlib
+import io
+import json
+import lzma
 import os
+import struct
+import time
+import zlib
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import BinaryIO, Callable
 
+from cryptography.exceptions import InvalidTag
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from cryptography.hazmat.primitives.kdf.scrypt import Scrypt
 
 from .config import (
     AEAD_NONCE_SIZE,
+    AEAD_TAG_SIZE,
+    ARGON2_CALIBRATION_MAX_MEMORY_KIB,
+    ARGON2_CALIBRATION_TARGET_MS,
+    ARGON2_MAX_PARALLELISM,
+    ARGON2_MAX_TIME_COST,
     ARGON2_MEMORY_COST_KIB,
+    ARGON2_MIN_MEMORY_COST_KIB,
+    ARGON2_MIN_TIME_COST,
     ARGON2_PARALLELISM,
     ARGON2_TIME_COST,
+    COMPRESSION_ALGO,
+    COMPRESSION_LEVEL,
+    COMPRESSION_MIN_SIZE,
+    FICHIER_KDF,
     HEADER_V2,
+    HEADER_V6,
+    HEADER_V7,
     LEGACY_PBKDF2_ITERATIONS,
     LEGACY_SALT,
     MAGIC_V2,
     MAGIC_V3,
     MAGIC_V4,
     MAGIC_V5,
+    MAGIC_V6,
+    MAGIC_V7,
     SCRYPT_N,
     SCRYPT_P,
     SCRYPT_R,
+    SESSION_IDLE_TIMEOUT_S,
+    V6_CHUNK_SIZE,
+    V7_MAX_SLOTS,
+    V7_SLOT,
 )
 
+# Tables de l'encodage anti-`strings` : chaque octet devient 2 octets 0x80..0x8F
+# (quartet haut puis quartet bas). On passe par la représentation hexadécimale,
+# ce qui permet de tout faire en opérations "bulk" (C) via `bytes.translate`
+# au lieu d'une boucle Python par octet.
+_HEX_DIGITS = b"0123456789abcdef"
+_NIBBLES = bytes(range(0x80, 0x90))
+_HEX_TO_NIBBLE = bytes.maketrans(_HEX_DIGITS, _NIBBLES)
+# Tout octet hors 0x80..0x8F est projeté sur un caractère non hexadécimal,
+# si bien que `binascii.unhexlify` valide le flux entier en une seule passe.
+_NIBBLE_TO_HEX = bytes(
+    _HEX_DIGITS[b - 0x80] if 0x80 <= b <= 0x8F else ord("z") for b in range(256)
+)
+# Taille (paire) des fenêtres de décodage des gros fichiers.
+_DECODE_WINDOW = 1 << 20
+
 
 def _encode_no_strings(data: bytes) -> bytes:
     """Encode bytes so that common `strings` output shows nothing.
@@ -33,16 +83,10 @@ def _encode_no_strings(data: bytes) -> bytes:
     Each input byte becomes 2 bytes in range 0x80..0x8F.
     """
 
-    out = bytearray(len(data) * 2)
-    j = 0
-    for b in data:
-        out[j] = 0x80 | (b >> 4)
-        out[j + 1] = 0x80 | (b & 0x0F)
-        j += 2
-    return bytes(out)
+    return binascii.hexlify(data).translate(_HEX_TO_NIBBLE)
 
 
-def _try_decode_no_strings(data: bytes) -> bytes | None:
+def _try_decode_no_strings(data: bytes) -> bytes | bytearray | None:
     if not data or (len(data) % 2) != 0:
         return None
 
@@ -51,16 +95,23 @@ def _try_decode_no_strings(data: bytes) -> bytes | None:
     if any((b & 0xF0) != 0x80 for b in sample):
         return None
 
-    out = bytearray(len(data) // 2)
-    j = 0
-    for i in range(0, len(data), 2):
-        hi = data[i]
-        lo = data[i + 1]
-        if (hi & 0xF0) != 0x80 or (lo & 0xF0) != 0x80:
+    # Décodage par fenêtres dans un buffer préalloué : le pic mémoire reste
+    # ~taille décodée au lieu de 2x l'entrée (copie hexadécimale intermédiaire).
+    if len(data) <= _DECODE_WINDOW:
+        try:
+            return binascii.unhexlify(data.translate(_NIBBLE_TO_HEX))
+        except binascii.Error:
             return None
-        out[j] = ((hi & 0x0F) << 4) | (lo & 0x0F)
-        j += 1
-    return bytes(out)
+
+    out = bytearray(len(data) // 2)
+    src = memoryview(data)
+    try:
+        for start in range(0, len(data), _DECODE_WINDOW):
+            chunk = binascii.unhexlify(bytes(src[start : start + _DECODE_WINDOW]).translate(_NIBBLE_TO_HEX))
+            out[start // 2 : start // 2 + len(chunk)] = chunk
+    except binascii.Error:
+        return None
+    return out
 
 
 def generer_cle_legacy_pbkdf2(mdp: str) -> bytes:
@@ -99,6 +150,117 @@ def generer_cle_argon2id_raw(mdp: str, salt: bytes, time_cost: int, memory_cost_
     )
 
 
+@dataclass(frozen=True)
+class Argon2Params:
+    time_cost: int
+    memory_cost_kib: int
+    parallelism: int
+
+
+def lanes_argon2(configured: int | None = None) -> int:
+    """Lanes Argon2id: valeur configurée, sinon nombre de cœurs disponibles (plafonné)."""
+
+    if configured:
+        return max(1, int(configured))
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        cpus = os.cpu_count() or 1
+    return max(1, min(cpus, ARGON2_MAX_PARALLELISM))
+
+
+def _parametres_par_defaut() -> Argon2Params:
+    return Argon2Params(ARGON2_TIME_COST, ARGON2_MEMORY_COST_KIB, lanes_argon2(ARGON2_PARALLELISM))
+
+
+def parametres_calibres(path: str | Path | None = None) -> Argon2Params | None:
+    """Paramètres Argon2id enregistrés par la calibration, None s'il n'y en a pas (ou invalides)."""
+
+    p = Path(FICHIER_KDF if path is None else path)
+    try:
+        obj = json.loads(p.read_text(encoding="utf-8"))
+        params = Argon2Params(
+            time_cost=int(obj["time_cost"]),
+            memory_cost_kib=int(obj["memory_cost_kib"]),
+            parallelism=int(obj["parallelism"]),
+        )
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+    # Un fichier modifié à la main ne doit pas pouvoir affaiblir le coffre.
+    if params.time_cost < ARGON2_MIN_TIME_COST or params.memory_cost_kib < ARGON2_MIN_MEMORY_COST_KIB:
+        return None
+    if params.parallelism < 1:
+        return None
+    return params
+
+
+def parametres_argon2(path: str | Path | None = None) -> Argon2Params:
+    """Paramètres Argon2id pour les nouveaux blobs: calibrés si disponibles, sinon défauts."""
+
+    return parametres_calibres(path) or _parametres_par_defaut()
+
+
+def enregistrer_parametres_argon2(params: Argon2Params, path: str | Path | None = None) -> None:
+    from .storage import ecrire_clair
+
+    p = Path(FICHIER_KDF if path is None else path)
+    ecrire_clair((json.dumps(asdict(params), indent=2) + "\n").encode("utf-8"), p)
+
+
+def mesurer_argon2_ms(params: Argon2Params) -> float:
+    """Durée (ms) d'une dérivation `generer_cle_argon2id_raw` avec `params` sur cette machine."""
+
+    t0 = time.perf_counter()
+    generer_cle_argon2id_raw(
+        "calibration",
+        salt=os.urandom(16),
+        time_cost=params.time_cost,
+        memory_cost_kib=params.memory_cost_kib,
+        parallelism=params.parallelism,
+    )
+    return (time.perf_counter() - t0) * 1000.0
+
+
+def calibrer_argon2(
+    *,
+    cible_ms: float = ARGON2_CALIBRATION_TARGET_MS,
+    memoire_max_kib: int = ARGON2_CALIBRATION_MAX_MEMORY_KIB,
+    parallelism: int | None = None,
+    mesurer: Callable[[Argon2Params], float] | None = None,
+) -> Argon2Params:
+    """Choisit les paramètres Argon2id les plus forts tenant sous `cible_ms`.
+
+    La mémoire est privilégiée (c'est elle qui coûte cher à un attaquant GPU/ASIC):
+    on part de `memoire_max_kib` et on divise par 2 tant que le minimum de passes
+    dépasse la cible, puis on ajoute des passes (le coût est ~linéaire en
+    `time_cost`) tant que la mesure reste sous la cible. Les planchers
+    ARGON2_MIN_* sont toujours respectés.
+    """
+
+    mesurer = mesurer or mesurer_argon2_ms
+    lanes = lanes_argon2(ARGON2_PARALLELISM if parallelism is None else parallelism)
+
+    memory = max(int(memoire_max_kib), ARGON2_MIN_MEMORY_COST_KIB)
+    while True:
+        base = Argon2Params(ARGON2_MIN_TIME_COST, memory, lanes)
+        duree = mesurer(base)
+        if duree <= cible_ms or memory // 2 < ARGON2_MIN_MEMORY_COST_KIB:
+            break
+        memory //= 2
+
+    if duree > cible_ms:
+        return base
+
+    # Estimation linéaire, puis vérification par une vraie mesure.
+    par_passe = duree / ARGON2_MIN_TIME_COST
+    time_cost = int(cible_ms // max(par_passe, 1e-6))
+    time_cost = min(max(time_cost, ARGON2_MIN_TIME_COST), ARGON2_MAX_TIME_COST)
+    while time_cost > ARGON2_MIN_TIME_COST and mesurer(Argon2Params(time_cost, memory, lanes)) > cible_ms:
+        time_cost -= 1
+    return Argon2Params(time_cost, memory, lanes)
+
+
 def generer_cle_argon2id(mdp: str, salt: bytes, time_cost: int, memory_cost_kib: int, parallelism: int) -> bytes:
     # Fernet attend une clé en base64 urlsafe.
     raw = generer_cle_argon2id_raw(mdp, salt=salt, time_cost=time_cost, memory_cost_kib=memory_cost_kib, parallelism=parallelism)
@@ -124,56 +286,186 @@ def encoder_v5(token: bytes, salt: bytes, time_cost: int, memory_cost_kib: int,
     return _encode_no_strings(inner)
 
 
-def decoder(data: bytes):
+# Magic (après décodage anti-`strings`) -> version. V2 encodé par erreur est toléré.
+_VERSIONS_ENCODEES = {
+    MAGIC_V3: "v3",
+    MAGIC_V4: "v4",
+    MAGIC_V5: "v5",
+    MAGIC_V6: "v6",
+    MAGIC_V7: "v7",
+    MAGIC_V2: "v2",
+}
+
+
+def peek_header(data: bytes) -> tuple[str, bytes | None, int | None, int | None, int | None]:
+    """Version et paramètres KDF d'un blob en ne décodant que son en-tête.
+
+    Même résultat que `decoder(data)[:5]` pour un fichier valide, sans décoder
+    tout le fichier (utile pour choisir un chemin avant de déchiffrer).
+    """
+
+    if len(data) >= HEADER_V2.size and data[:4] == MAGIC_V2:
+        _magic, salt, n, r, p = HEADER_V2.unpack_from(data)
+        return ("v2", salt, n, r, p)
+
+    head = _try_decode_no_strings(data[: 2 * HEADER_V2.size])
+    if head is not None:
+        version = _VERSIONS_ENCODEES.get(head[:4])
+        if version == "v7":
+            return ("v7", None, None, None, None)
+        if version is not None and len(head) == HEADER_V2.size:
+            _magic, salt, n, r, p = HEADER_V2.unpack(head)
+            return (version, salt, n, r, p)
+
+    return ("legacy", None, None, None, None)
+
+
+def _decoder_vue(data: bytes):
+    """Comme `decoder`, mais le token est une `memoryview` sur le buffer décodé (aucune copie)."""
+
     # V2 (clair) : commence par MAGIC_V2.
     if len(data) >= HEADER_V2.size and data[:4] == MAGIC_V2:
-        magic, salt, n, r, p = HEADER_V2.unpack(data[: HEADER_V2.size])
-        token = data[HEADER_V2.size :]
-        return ("v2", salt, n, r, p, token)
+        _magic, salt, n, r, p = HEADER_V2.unpack_from(data)
+        return ("v2", salt, n, r, p, memoryview(data)[HEADER_V2.size :])
 
-    # V3 : payload encodé (anti-strings), puis header MAGIC_V3.
+    # V3+ : payload encodé (anti-strings), puis header (magic de version).
     decoded = _try_decode_no_strings(data)
     if decoded is not None and len(decoded) >= HEADER_V2.size:
-        magic = decoded[:4]
-        if magic == MAGIC_V3:
-            _magic, salt, n, r, p = HEADER_V2.unpack(decoded[: HEADER_V2.size])
-            token = decoded[HEADER_V2.size :]
-            return ("v3", salt, n, r, p, token)
-        if magic == MAGIC_V4:
-            _magic, salt, time_cost, memory_cost_kib, parallelism = HEADER_V2.unpack(decoded[: HEADER_V2.size])
-            token = decoded[HEADER_V2.size :]
-            return ("v4", salt, time_cost, memory_cost_kib, parallelism, token)
-        if magic == MAGIC_V5:
-            _magic, salt, time_cost, memory_cost_kib, parallelism = HEADER_V2.unpack(decoded[: HEADER_V2.size])
-            token = decoded[HEADER_V2.size :]
-            return ("v5", salt, time_cost, memory_cost_kib, parallelism, token)
-        # Tolérance: si un fichier V2 a été encodé par erreur.
-        if magic == MAGIC_V2:
-            _magic, salt, n, r, p = HEADER_V2.unpack(decoded[: HEADER_V2.size])
-            token = decoded[HEADER_V2.size :]
-            return ("v2", salt, n, r, p, token)
+        version = _VERSIONS_ENCODEES.get(bytes(decoded[:4]))
+        if version == "v7":
+            # Les paramètres KDF sont propres à chaque slot (voir `slots_v7`).
+            return ("v7", None, None, None, None, memoryview(decoded)[4:])
+        if version is not None:
+            _magic, salt, n, r, p = HEADER_V2.unpack_from(decoded)
+            return (version, salt, n, r, p, memoryview(decoded)[HEADER_V2.size :])
 
     return ("legacy", None, None, None, None, data)
 
 
+def decoder(data: bytes):
+    version, salt, n, r, p, token = _decoder_vue(data)
+    return (version, salt, n, r, p, bytes(token))
+
+
+# ---------- Compression du clair (avant AES-GCM, formats v5/v7)
+
+# En-tête: magic, algorithme, niveau, taille d'origine. 0xFF n'apparaît jamais
+# en UTF-8 ni en tête d'un contenu MDPV/JSON: un clair non compressé (anciens
+# fichiers) n'est pas confondu avec un cadre. L'en-tête est chiffré avec le
+# contenu, donc authentifié par AES-GCM.
+_MAGIC_COMPRESSION = b"\xffMDZ"
+_HEADER_COMPRESSION = struct.Struct(">4sBBQ")
+_ALGOS_COMPRESSION = {"zlib": 1, "lzma": 2, "bz2": 3}
+
+
+def _compresseur(algo: str, niveau: int) -> Callable[[bytes], bytes]:
+    if algo == "zlib":
+        return lambda data: zlib.compress(data, niveau)
+    if algo == "lzma":
+        return lambda data: lzma.compress(data, preset=niveau)
+    return lambda data: bz2.compress(data, compresslevel=max(1, niveau))
+
+
+def _decompresseur(algo_id: int):
+    if algo_id == 1:
+        return zlib.decompressobj()
+    if algo_id == 2:
+        return lzma.LZMADecompressor()
+    if algo_id == 3:
+        return bz2.BZ2Decompressor()
+    raise ValueError(f"Compression inconnue (algorithme {algo_id})")
+
+
+def compresser(contenu: bytes, algo: str | None = None, niveau: int | None = None) -> bytes:
+    """Compresse le clair avant chiffrement (`COMPRESSION_ALGO`/`COMPRESSION_LEVEL` par défaut).
+
+    Renvoie `contenu` tel quel si la compression est désactivée ("none"),
+    si le contenu est petit ou s'il ne rétrécit pas (données aléatoires).
+    """
+
+    algo = COMPRESSION_ALGO if algo is None else algo
+    niveau = COMPRESSION_LEVEL if niveau is None else int(niveau)
+    if algo == "none" or len(contenu) < COMPRESSION_MIN_SIZE:
+        return contenu
+    if algo not in _ALGOS_COMPRESSION:
+        raise ValueError(f"Compression inconnue: {algo!r} (zlib, lzma, bz2 ou none)")
+    if not 0 <= niveau <= 9:
+        raise ValueError(f"Niveau de compression invalide: {niveau} (0-9)")
+    comprime = _compresseur(algo, niveau)(contenu)
+    if _HEADER_COMPRESSION.size + len(comprime) >= len(contenu):
+        return contenu
+    return _HEADER_COMPRESSION.pack(_MAGIC_COMPRESSION, _ALGOS_COMPRESSION[algo], niveau, len(contenu)) + comprime
+
+
+def decompresser(data: bytes) -> bytes:
+    """Inverse de `compresser`; un clair sans en-tête de compression est renvoyé tel quel."""
+
+    if data[:4] != _MAGIC_COMPRESSION or len(data) < _HEADER_COMPRESSION.size:
+        return data
+    _magic, algo_id, _niveau, taille = _HEADER_COMPRESSION.unpack_from(data)
+    d = _decompresseur(algo_id)
+    try:
+        # Sortie bornée par la taille annoncée (+1 pour détecter un excédent).
+        contenu = d.decompress(memoryview(data)[_HEADER_COMPRESSION.size :], taille + 1)
+    except (zlib.error, lzma.LZMAError, OSError, EOFError) as e:
+        raise ValueError("Contenu compressé invalide") from e
+    if len(contenu) != taille or not d.eof:
+        raise ValueError("Contenu compressé invalide (taille)")
+    return contenu
+
+
+def _chiffrer_v5_avec_cle(
+    key: bytes | bytearray, contenu: bytes, *, salt: bytes, time_cost: int, memory_cost_kib: int, parallelism: int
+) -> bytes:
+    # Nonce aléatoire (unique) requis par AES-GCM.
+    nonce = os.urandom(AEAD_NONCE_SIZE)
+    aad = HEADER_V2.pack(MAGIC_V5, salt, int(time_cost), int(memory_cost_kib), int(parallelism))
+    ciphertext = AESGCM(key).encrypt(nonce, compresser(contenu), aad)
+    token = nonce + ciphertext
+    return encoder_v5(
+        token=token,
+        salt=salt,
+        time_cost=time_cost,
+        memory_cost_kib=memory_cost_kib,
+        parallelism=parallelism,
+    )
+
+
+def _dechiffrer_v5_avec_cle(
+    key: bytes | bytearray, token: bytes, *, salt: bytes, time_cost: int, memory_cost_kib: int, parallelism: int
+) -> bytes:
+    if len(token) < AEAD_NONCE_SIZE:
+        raise ValueError("Fichier chiffré v5 invalide (nonce manquant)")
+    nonce = token[:AEAD_NONCE_SIZE]
+    ciphertext = token[AEAD_NONCE_SIZE:]
+    aad = HEADER_V2.pack(MAGIC_V5, salt, int(time_cost), int(memory_cost_kib), int(parallelism))
+    return decompresser(AESGCM(key).decrypt(nonce, ciphertext, aad))
+
+
 def dechiffrer_bytes(mdp: str, data: bytes) -> bytes:
-    version, salt, n, r, p, token = decoder(data)
+    if peek_header(data)[0] == "v6":
+        out = io.BytesIO()
+        decrypt_stream(mdp, io.BytesIO(data), out)
+        return out.getvalue()
+
+    # Un seul décodage du fichier; nonce/ciphertext sont des vues, pas des copies.
+    version, salt, n, r, p, token = _decoder_vue(data)
     if version == "v5":
-        if len(token) < AEAD_NONCE_SIZE:
-            raise ValueError("Fichier chiffré v5 invalide (nonce manquant)")
-        nonce = token[:AEAD_NONCE_SIZE]
-        ciphertext = token[AEAD_NONCE_SIZE:]
-        aad = HEADER_V2.pack(MAGIC_V5, salt, int(n), int(r), int(p))
         key = generer_cle_argon2id_raw(mdp, salt=salt, time_cost=n, memory_cost_kib=r, parallelism=p)
-        return AESGCM(key).decrypt(nonce, ciphertext, aad)
+        return _dechiffrer_v5_avec_cle(key, token, salt=salt, time_cost=n, memory_cost_kib=r, parallelism=p)
+    if version == "v7":
+        entete, slots, corps = _parse_v7(token)
+        dek, _index = _ouvrir_slots(mdp, slots)
+        return _dechiffrer_corps_v7(dek, corps)
+    # Fernet n'accepte que bytes/str: copie inévitable pour les anciens formats.
     if version == "v4":
         cle = generer_cle_argon2id(mdp, salt=salt, time_cost=n, memory_cost_kib=r, parallelism=p)
-        return Fernet(cle).decrypt(token)
+        return Fernet(cle).decrypt(bytes(token))
     if version in {"v2", "v3"}:
         cle = generer_cle_scrypt(mdp, salt=salt, n=n, r=r, p=p)
-        return Fernet(cle).decrypt(token)
+        return Fernet(cle).decrypt(bytes(token))
     cle = generer_cle_legacy_pbkdf2(mdp)
-    return Fernet(cle).decrypt(token)
+    return Fernet(cle).decrypt(bytes(token))
 
 
 def chiffrer_bytes_v2(mdp: str, contenu: bytes, *, salt: bytes) -> bytes:
@@ -193,42 +485,891 @@ def chiffrer_bytes_v3(mdp: str, contenu: bytes, *, salt: bytes) -> bytes:
 def chiffrer_bytes_v4(mdp: str, contenu: bytes, *, salt: bytes) -> bytes:
     """Chiffre en v4: Argon2id + Fernet, encodé anti-`strings`."""
 
+    params = parametres_argon2()
     cle = generer_cle_argon2id(
         mdp,
         salt=salt,
-        time_cost=ARGON2_TIME_COST,
-        memory_cost_kib=ARGON2_MEMORY_COST_KIB,
-        parallelism=ARGON2_PARALLELISM,
+        time_cost=params.time_cost,
+        memory_cost_kib=params.memory_cost_kib,
+        parallelism=params.parallelism,
     )
     token = Fernet(cle).encrypt(contenu)
     return encoder_v4(
         token=token,
         salt=salt,
-        time_cost=ARGON2_TIME_COST,
-        memory_cost_kib=ARGON2_MEMORY_COST_KIB,
-        parallelism=ARGON2_PARALLELISM,
+        time_cost=params.time_cost,
+        memory_cost_kib=params.memory_cost_kib,
+        parallelism=params.parallelism,
     )
 
 
 def chiffrer_bytes_v5(mdp: str, contenu: bytes, *, salt: bytes) -> bytes:
     """Chiffre en v5: Argon2id + AES-GCM (AEAD moderne), encodé anti-`strings`."""
 
+    params = parametres_argon2()
     key = generer_cle_argon2id_raw(
         mdp,
         salt=salt,
-        time_cost=ARGON2_TIME_COST,
-        memory_cost_kib=ARGON2_MEMORY_COST_KIB,
-        parallelism=ARGON2_PARALLELISM,
+        time_cost=params.time_cost,
+        memory_cost_kib=params.memory_cost_kib,
+        parallelism=params.parallelism,
+    )
+    return _chiffrer_v5_avec_cle(key, contenu, salt=salt, **asdict(params))
+
+
+class SessionExpiree(RuntimeError):
+    """La clé de session a été effacée (verrouillage) ou a expiré (inactivité)."""
+
+
+class SessionKey:
+    """Clé v5 dérivée une seule fois au déverrouillage.
+
+    Conserve la clé Argon2id brute avec son sel et ses paramètres, pour que
+    les enregistrements suivants ne fassent qu'un AES-GCM avec un nonce neuf
+    (sans relancer le KDF). La clé est effacée explicitement par `effacer()`
+    ou automatiquement après `idle_timeout_s` secondes sans utilisation.
+
+    Pour un coffre v7 (enveloppe), la clé conservée est la DEK et `entete_v7`
+    garde les slots tels quels: les enregistrements restent en v7.
+    """
+
+    def __init__(
+        self,
+        key: bytes,
+        *,
+        salt: bytes,
+        time_cost: int,
+        memory_cost_kib: int,
+        parallelism: int,
+        idle_timeout_s: float = SESSION_IDLE_TIMEOUT_S,
+        clock: Callable[[], float] = time.monotonic,
+        entete_v7: bytes | None = None,
+    ) -> None:
+        self._key: bytearray | None = bytearray(key)
+        self.entete_v7 = entete_v7
+        self.salt = salt
+        self.time_cost = int(time_cost)
+        self.memory_cost_kib = int(memory_cost_kib)
+        self.parallelism = int(parallelism)
+        self.idle_timeout_s = idle_timeout_s
+        self._clock = clock
+        self._last_used = clock()
+        # Lue une fois (au déverrouillage), pas à chaque `a_jour`.
+        self._calibres = parametres_calibres() if entete_v7 is None else None
+
+    @classmethod
+    def deriver(cls, mdp: str, *, salt: bytes | None = None, **kwargs) -> SessionKey:
+        """Dérive une nouvelle clé v5 (sel neuf par défaut, paramètres courants)."""
+
+        salt = os.urandom(16) if salt is None else salt
+        params = parametres_argon2()
+        key = generer_cle_argon2id_raw(
+            mdp,
+            salt=salt,
+            time_cost=params.time_cost,
+            memory_cost_kib=params.memory_cost_kib,
+            parallelism=params.parallelism,
+        )
+        return cls(key, salt=salt, **asdict(params), **kwargs)
+
+    @property
+    def expiree(self) -> bool:
+        if self._key is None:
+            return True
+        if self.idle_timeout_s and (self._clock() - self._last_used) > self.idle_timeout_s:
+            self.effacer()
+            return True
+        return False
+
+    def _cle(self) -> bytearray:
+        if self.expiree:
+            raise SessionExpiree("Session verrouillée: mot de passe requis")
+        assert self._key is not None
+        self._last_used = self._clock()
+        return self._key
+
+    @property
+    def a_jour(self) -> bool:
+        """Faux seulement si une calibration explicite a fixé d'autres paramètres que ceux de la clé.
+
+        Sans calibration, la clé reste valable quels que soient les défauts
+        courants (un coffre enregistré avec 1 lane n'est pas redérivé parce que
+        la machine a plusieurs cœurs): seuls les nouveaux coffres les suivent.
+        """
+
+        if self._calibres is None:
+            # Pas de calibration, ou v7: les slots ne changent qu'à la rotation du mot de passe.
+            return True
+        return Argon2Params(self.time_cost, self.memory_cost_kib, self.parallelism) == self._calibres
+
+    def _params(self) -> dict[str, int]:
+        return {
+            "time_cost": self.time_cost,
+            "memory_cost_kib": self.memory_cost_kib,
+            "parallelism": self.parallelism,
+        }
+
+    def chiffrer(self, contenu: bytes) -> bytes:
+        """Chiffre en v5 (ou v7) avec la clé de session (nonce neuf, pas de KDF)."""
+
+        if self.entete_v7 is not None:
+            return _encode_no_strings(self.entete_v7) + _chiffrer_corps_v7(self._cle(), contenu)
+        return _chiffrer_v5_avec_cle(self._cle(), contenu, salt=self.salt, **self._params())
+
+    def dechiffrer(self, data: bytes) -> bytes:
+        """Déchiffre un blob v5 produit avec le même sel et les mêmes paramètres."""
+
+        version, salt, n, r, p, token = _decoder_vue(data)
+        if self.entete_v7 is not None:
+            if version != "v7" or MAGIC_V7 + token[: len(self.entete_v7) - 4] != self.entete_v7:
+                raise ValueError("Blob incompatible avec la clé de session")
+            return _dechiffrer_corps_v7(self._cle(), _parse_v7(token)[2])
+        if version != "v5" or salt != self.salt or (n, r, p) != (self.time_cost, self.memory_cost_kib, self.parallelism):
+            raise ValueError("Blob incompatible avec la clé de session")
+        return _dechiffrer_v5_avec_cle(self._cle(), token, salt=salt, **self._params())
+
+    def sceller(self, contenu: bytes, aad: bytes) -> bytes:
+        """AES-GCM sous la clé de session (nonce neuf): nonce + chiffré + tag (ex: enregistrements du journal)."""
+
+        nonce = os.urandom(AEAD_NONCE_SIZE)
+        return nonce + AESGCM(self._cle()).encrypt(nonce, contenu, aad)
+
+    def desceller(self, token: bytes, aad: bytes) -> bytes:
+        """Inverse de `sceller` (InvalidTag si la clé, l'AAD ou le token ne correspondent pas)."""
+
+        if len(token) < AEAD_NONCE_SIZE:
+            raise ValueError("Token scellé invalide (nonce manquant)")
+        return AESGCM(self._cle()).decrypt(token[:AEAD_NONCE_SIZE], token[AEAD_NONCE_SIZE:], aad)
+
+    def effacer(self) -> None:
+        """Écrase la clé en mémoire (best effort) et invalide la session."""
+
+        if self._key is not None:
+            for i in range(len(self._key)):
+                self._key[i] = 0
+            self._key = None
+
+
+# Formats qu'une session réécrit tels quels (pas de migration à l'ouverture).
+FORMATS_SESSION = frozenset({"v5", "v7"})
+
+
+def dechiffrer_bytes_session(mdp: str, data: bytes, **kwargs) -> tuple[bytes, SessionKey]:
+    """Déchiffre `data` et renvoie le clair avec une clé de session prête pour l'enregistrement.
+
+    Pour un blob v5, la clé dérivée au déverrouillage est réutilisée telle quelle.
+    Pour un blob v7, c'est la DEK (et les slots) qui sont conservés.
+    Pour un ancien format, une clé v5 neuve est dérivée (migration).
+    """
+
+    version = peek_header(data)[0]
+    if version in FORMATS_SESSION:
+        version, salt, n, r, p, token = _decoder_vue(data)
+    if version == "v7":
+        entete, slots, corps = _parse_v7(token)
+        session = _session_v7(mdp, entete, slots, **kwargs)
+        return _dechiffrer_corps_v7(session._cle(), corps), session
+    if version == "v5":
+        key = generer_cle_argon2id_raw(mdp, salt=salt, time_cost=n, memory_cost_kib=r, parallelism=p)
+        contenu = _dechiffrer_v5_avec_cle(key, token, salt=salt, time_cost=n, memory_cost_kib=r, parallelism=p)
+        return contenu, SessionKey(key, salt=salt, time_cost=n, memory_cost_kib=r, parallelism=p, **kwargs)
+    return dechiffrer_bytes(mdp, data), SessionKey.deriver(mdp, **kwargs)
+
+
+# ---------- Secrets par entrée (mot de passe + notes), dans le contenu du coffre
+
+_SECRET_AAD = b"MDPS"
+_SECRET_LONGUEUR = struct.Struct(">I")
+
+
+class CleSecrets:
+    """Clé de données des secrets par entrée, chacun scellé séparément (AES-GCM).
+
+    Le contenu du coffre contient la clé et une zone de jetons; une entrée
+    chargée ne garde que (position, longueur) de son jeton dans `zone`: rien
+    n'est déchiffré avant `ouvrir` (copie du mot de passe, dialogue d'édition).
+    Le jeton est lié à l'id de l'entrée (AAD): pas d'échange entre entrées.
+    """
+
+    __slots__ = ("cle", "zone", "_aead")
+
+    def __init__(self, cle: bytes, zone: bytes = b"") -> None:
+        self.cle = bytes(cle)
+        self.zone = zone
+        self._aead = AESGCM(self.cle)
+
+    @classmethod
+    def generer(cls) -> CleSecrets:
+        return cls(os.urandom(32))
+
+    def sceller(self, entry_id: str, password: str, notes: str) -> bytes:
+        pw = password.encode("utf-8", "surrogatepass")
+        clair = _SECRET_LONGUEUR.pack(len(pw)) + pw + notes.encode("utf-8", "surrogatepass")
+        nonce = os.urandom(AEAD_NONCE_SIZE)
+        return nonce + self._aead.encrypt(nonce, clair, _SECRET_AAD + entry_id.encode("utf-8"))
+
+    def jeton(self, debut: int, longueur: int) -> bytes:
+        return self.zone[debut : debut + longueur]
+
+    def ouvrir(self, entry_id: str, debut: int, longueur: int) -> tuple[str, str]:
+        """(mot de passe, notes) du jeton `zone[debut:debut + longueur]`."""
+
+        token = self.jeton(debut, longueur)
+        if len(token) != longueur or longueur < AEAD_NONCE_SIZE:
+            raise ValueError("Jeton de secret invalide (hors zone)")
+        aad = _SECRET_AAD + entry_id.encode("utf-8")
+        clair = self._aead.decrypt(token[:AEAD_NONCE_SIZE], token[AEAD_NONCE_SIZE:], aad)
+        fin = _SECRET_LONGUEUR.size + _SECRET_LONGUEUR.unpack_from(clair)[0]
+        password = clair[_SECRET_LONGUEUR.size : fin].decode("utf-8", "surrogatepass")
+        return password, clair[fin:].decode("utf-8", "surrogatepass")
+
+
+# ---------- V6: flux segmenté (mémoire constante, accès aléatoire par segment)
+
+_V6_COUNTER = struct.Struct(">IB")
+_V6_HEADER_SIZE = HEADER_V2.size + HEADER_V6.size
+
+
+def _nonce_v6(prefix: bytes, index: int, final: bool) -> bytes:
+    if index >= 2**32:
+        raise ValueError("Flux v6 trop long (index de segment > 2^32)")
+    return prefix + _V6_COUNTER.pack(index, 1 if final else 0)
+
+
+def _read_exact(reader: BinaryIO, n: int) -> bytes:
+    buf = reader.read(n)
+    if len(buf) == n or not buf:
+        return buf
+    parts = [buf]
+    got = len(buf)
+    while got < n:
+        chunk = reader.read(n - got)
+        if not chunk:
+            break
+        parts.append(chunk)
+        got += len(chunk)
+    return b"".join(parts)
+
+
+def _read_decoded(reader: BinaryIO, n: int) -> bytes:
+    raw = _read_exact(reader, 2 * n)
+    if not raw:
+        return b""
+    decoded = _try_decode_no_strings(raw)
+    if decoded is None:
+        raise ValueError("Fichier chiffré v6 invalide (encodage)")
+    return decoded
+
+
+def _lire_header_v6(reader: BinaryIO) -> tuple[bytes, bytes, Argon2Params, int, bytes]:
+    header = _read_decoded(reader, _V6_HEADER_SIZE)
+    if len(header) != _V6_HEADER_SIZE or header[:4] != MAGIC_V6:
+        raise ValueError("Fichier chiffré v6 invalide (en-tête)")
+    _magic, salt, time_cost, memory_cost_kib, parallelism = HEADER_V2.unpack(header[: HEADER_V2.size])
+    chunk_size, prefix = HEADER_V6.unpack(header[HEADER_V2.size :])
+    if chunk_size <= 0:
+        raise ValueError("Fichier chiffré v6 invalide (taille de segment)")
+    return header, salt, Argon2Params(time_cost, memory_cost_kib, parallelism), chunk_size, prefix
+
+
+def _cle_v6(mdp: str, salt: bytes, params: Argon2Params) -> bytes:
+    return generer_cle_argon2id_raw(
+        mdp,
+        salt=salt,
+        time_cost=params.time_cost,
+        memory_cost_kib=params.memory_cost_kib,
+        parallelism=params.parallelism,
+    )
+
+
+def encrypt_stream(
+    mdp: str,
+    reader: BinaryIO,
+    writer: BinaryIO,
+    *,
+    chunk_size: int = V6_CHUNK_SIZE,
+    salt: bytes | None = None,
+) -> int:
+    """Chiffre `reader` vers `writer` en v6, segment par segment.
+
+    La mémoire utilisée ne dépend que de `chunk_size` (deux segments en vol),
+    pas de la taille du flux. Renvoie le nombre d'octets clairs chiffrés.
+    """
+
+    salt = os.urandom(16) if salt is None else salt
+    params = parametres_argon2()
+    prefix = os.urandom(7)
+    header = HEADER_V2.pack(
+        MAGIC_V6, salt, params.time_cost, params.memory_cost_kib, params.parallelism
+    ) + HEADER_V6.pack(chunk_size, prefix)
+    aead = AESGCM(_cle_v6(mdp, salt, params))
+
+    writer.write(_encode_no_strings(header))
+    index = 0
+    total = 0
+    current = _read_exact(reader, chunk_size)
+    while True:
+        # Lecture anticipée d'un segment pour savoir si `current` est le dernier.
+        nxt = _read_exact(reader, chunk_size) if len(current) == chunk_size else b""
+        final = not nxt
+        sealed = aead.encrypt(_nonce_v6(prefix, index, final), current, header)
+        writer.write(_encode_no_strings(sealed))
+        total += len(current)
+        if final:
+            return total
+        current = nxt
+        index += 1
+
+
+def decrypt_stream(mdp: str, reader: BinaryIO, writer: BinaryIO) -> int:
+    """Déchiffre un flux v6 de `reader` vers `writer`, segment par segment.
+
+    Chaque segment est authentifié avant d'être écrit; une troncature (dernier
+    segment manquant) ou un réordonnancement lève `InvalidTag`/`ValueError`
+    à la fin. En cas d'exception, la sortie déjà écrite doit être jetée.
+    Renvoie le nombre d'octets clairs écrits.
+    """
+
+    header, salt, params, chunk_size, prefix = _lire_header_v6(reader)
+    return _dechiffrer_segments_v6(AESGCM(_cle_v6(mdp, salt, params)), reader, writer, header, chunk_size, prefix)
+
+
+def _dechiffrer_segments_v6(
+    aead: AESGCM, reader: BinaryIO, writer: BinaryIO, header: bytes, chunk_size: int, prefix: bytes
+) -> int:
+    sealed_size = chunk_size + AEAD_TAG_SIZE
+
+    index = 0
+    total = 0
+    current = _read_decoded(reader, sealed_size)
+    while True:
+        if len(current) < AEAD_TAG_SIZE:
+            raise ValueError("Fichier chiffré v6 invalide (segment tronqué)")
+        nxt = _read_decoded(reader, sealed_size) if len(current) == sealed_size else b""
+        final = not nxt
+        plain = aead.decrypt(_nonce_v6(prefix, index, final), current, header)
+        writer.write(plain)
+        total += len(plain)
+        if final:
+            return total
+        current = nxt
+        index += 1
+
+
+class LecteurV6:
+    """Accès aléatoire aux segments d'un flux v6 (le KDF n'est fait qu'une fois).
+
+    `reader` doit être positionnable (`seek`/`tell`), par exemple un fichier ouvert en binaire.
+    """
+
+    def __init__(self, mdp: str, reader: BinaryIO) -> None:
+        reader.seek(0)
+        self._reader = reader
+        self._header, salt, params, self.chunk_size, self._prefix = _lire_header_v6(reader)
+        self._aead = AESGCM(_cle_v6(mdp, salt, params))
+        self._sealed_size = self.chunk_size + AEAD_TAG_SIZE
+
+        reader.seek(0, os.SEEK_END)
+        body = reader.tell() // 2 - _V6_HEADER_SIZE
+        self.nb_segments = max(1, -(-body // self._sealed_size))
+
+    def segment(self, index: int) -> bytes:
+        """Déchiffre et renvoie le segment clair numéro `index` (0-based)."""
+
+        if not 0 <= index < self.nb_segments:
+            raise IndexError(index)
+        self._reader.seek(2 * (_V6_HEADER_SIZE + index * self._sealed_size))
+        sealed = _read_decoded(self._reader, self._sealed_size)
+        final = index == self.nb_segments - 1
+        return self._aead.decrypt(_nonce_v6(self._prefix, index, final), sealed, self._header)
+
+
+# ---------- V7: enveloppe (DEK aléatoire + slots de clés)
+
+_V7_DEK_SIZE = 32
+
+
+def _parse_v7(token: bytes) -> tuple[bytes, list[tuple], bytes]:
+    """`token` = blob v7 décodé sans son magic. Renvoie (en-tête complet, slots, corps)."""
+
+    if not token:
+        raise ValueError("Fichier chiffré v7 invalide (en-tête)")
+    n = token[0]
+    size = HEADER_V7.size + n * V7_SLOT.size
+    inner = MAGIC_V7 + token[: size - 4]
+    if n == 0 or len(inner) != size:
+        raise ValueError("Fichier chiffré v7 invalide (slots)")
+    slots = [V7_SLOT.unpack_from(inner, HEADER_V7.size + i * V7_SLOT.size) for i in range(n)]
+    return inner, slots, token[size - 4 :]
+
+
+def _aad_slot(salt: bytes, time_cost: int, memory_cost_kib: int, parallelism: int) -> bytes:
+    return HEADER_V2.pack(MAGIC_V7, salt, time_cost, memory_cost_kib, parallelism)
+
+
+def _sceller_slot(secret: str, dek: bytes | bytearray) -> bytes:
+    salt = os.urandom(16)
+    params = parametres_argon2()
+    kek = generer_cle_argon2id_raw(
+        secret,
+        salt=salt,
+        time_cost=params.time_cost,
+        memory_cost_kib=params.memory_cost_kib,
+        parallelism=params.parallelism,
     )
-    # Nonce aléatoire (unique) requis par AES-GCM.
     nonce = os.urandom(AEAD_NONCE_SIZE)
-    aad = HEADER_V2.pack(MAGIC_V5, salt, int(ARGON2_TIME_COST), int(ARGON2_MEMORY_COST_KIB), int(ARGON2_PARALLELISM))
-    ciphertext = AESGCM(key).encrypt(nonce, contenu, aad)
-    token = nonce + ciphertext
-    return encoder_v5(
-        token=token,
+    aad = _aad_slot(salt, params.time_cost, params.memory_cost_kib, params.parallelism)
+    wrapped = AESGCM(kek).encrypt(nonce, bytes(dek), aad)
+    return V7_SLOT.pack(salt, params.time_cost, params.memory_cost_kib, params.parallelism, nonce, wrapped)
+
+
+def _ouvrir_slots(secret: str, slots: list[tuple]) -> tuple[bytes, int]:
+    """Essaie chaque slot (un KDF par slot) et renvoie (DEK, index du slot ouvert)."""
+
+    for index, (salt, t, m, p, nonce, wrapped) in enumerate(slots):
+        kek = generer_cle_argon2id_raw(secret, salt=salt, time_cost=t, memory_cost_kib=m, parallelism=p)
+        try:
+            return AESGCM(kek).decrypt(nonce, wrapped, _aad_slot(salt, t, m, p)), index
+        except InvalidTag:
+            continue
+    raise InvalidTag()
+
+
+def _assembler_entete_v7(slots: list[bytes]) -> bytes:
+    if not 1 <= len(slots) <= V7_MAX_SLOTS:
+        raise ValueError(f"Un coffre v7 doit avoir entre 1 et {V7_MAX_SLOTS} slots")
+    return HEADER_V7.pack(MAGIC_V7, len(slots)) + b"".join(slots)
+
+
+def _chiffrer_corps_v7(dek: bytes | bytearray, contenu: bytes) -> bytes:
+    nonce = os.urandom(AEAD_NONCE_SIZE)
+    return _encode_no_strings(nonce + AESGCM(dek).encrypt(nonce, compresser(contenu), MAGIC_V7))
+
+
+def _dechiffrer_corps_v7(dek: bytes | bytearray, corps: bytes) -> bytes:
+    if len(corps) < AEAD_NONCE_SIZE:
+        raise ValueError("Fichier chiffré v7 invalide (nonce manquant)")
+    return decompresser(AESGCM(dek).decrypt(corps[:AEAD_NONCE_SIZE], corps[AEAD_NONCE_SIZE:], MAGIC_V7))
+
+
+def _entete_v7_encode(data: bytes) -> tuple[list[tuple], list[bytes], int]:
+    """Lit uniquement l'en-tête d'un blob v7 encodé: (slots, slots bruts, taille encodée de l'en-tête)."""
+
+    head = _try_decode_no_strings(data[: 2 * HEADER_V7.size])
+    if head is None or head[:4] != MAGIC_V7:
+        raise ValueError("Ce coffre n'est pas au format v7 (enveloppe)")
+    size = HEADER_V7.size + head[4] * V7_SLOT.size
+    inner = _try_decode_no_strings(data[: 2 * size])
+    if inner is None or len(inner) != size:
+        raise ValueError("Fichier chiffré v7 invalide (slots)")
+    _entete, slots, _corps = _parse_v7(inner[4:])
+    raw = [inner[HEADER_V7.size + i * V7_SLOT.size : HEADER_V7.size + (i + 1) * V7_SLOT.size] for i in range(len(slots))]
+    return slots, raw, 2 * size
+
+
+def _session_v7(mdp: str, entete: bytes, slots: list[tuple], **kwargs) -> SessionKey:
+    dek, index = _ouvrir_slots(mdp, slots)
+    salt, t, m, p = slots[index][:4]
+    return SessionKey(dek, salt=salt, time_cost=t, memory_cost_kib=m, parallelism=p, entete_v7=entete, **kwargs)
+
+
+def ouvrir_session_v7(mdp: str, data: bytes, **kwargs) -> SessionKey:
+    """Session v7 à partir de l'en-tête seul (le corps n'est ni décodé ni déchiffré)."""
+
+    slots, raw, _size = _entete_v7_encode(data)
+    return _session_v7(mdp, _assembler_entete_v7(raw), slots, **kwargs)
+
+
+def empreinte_corps(data: bytes) -> bytes:
+    """SHA-256 d'un blob chiffré, slots v7 exclus: une rotation de mot de passe ne la change pas."""
+
+    if peek_header(data)[0] == "v7":
+        data = data[_entete_v7_encode(data)[2] :]
+    return hashlib.sha256(data).digest()
+
+
+def chiffrer_bytes_v7(mdp: str, contenu: bytes) -> bytes:
+    """Chiffre en v7: DEK aléatoire + AES-GCM, un slot Argon2id pour `mdp`, encodé anti-`strings`."""
+
+    dek = AESGCM.generate_key(bit_length=8 * _V7_DEK_SIZE)
+    entete = _assembler_entete_v7([_sceller_slot(mdp, dek)])
+    return _encode_no_strings(entete) + _chiffrer_corps_v7(dek, contenu)
+
+
+def slots_v7(data: bytes) -> list[Argon2Params]:
+    """Paramètres KDF de chaque slot d'un coffre v7 (sans secret)."""
+
+    slots, _raw, _size = _entete_v7_encode(data)
+    return [Argon2Params(t, m, p) for _salt, t, m, p, _nonce, _wrapped in slots]
+
+
+def ajouter_slot_v7(secret: str, nouveau_secret: str, data: bytes) -> bytes:
+    """Ajoute un slot pour `nouveau_secret`; le corps chiffré est recopié sans être touché."""
+
+    slots, raw, size = _entete_v7_encode(data)
+    dek, _index = _ouvrir_slots(secret, slots)
+    entete = _assembler_entete_v7(raw + [_sceller_slot(nouveau_secret, dek)])
+    return _encode_no_strings(entete) + data[size:]
+
+
+def changer_mdp_v7(ancien: str, nouveau: str, data: bytes) -> bytes:
+    """Remplace le slot ouvert par `ancien` par un slot pour `nouveau` (les autres slots restent)."""
+
+    slots, raw, size = _entete_v7_encode(data)
+    dek, index = _ouvrir_slots(ancien, slots)
+    raw[index] = _sceller_slot(nouveau, dek)
+    return _encode_no_strings(_assembler_entete_v7(raw)) + data[size:]
+
+
+def retirer_slot_v7(secret: str, data: bytes, index: int) -> bytes:
+    """Supprime le slot `index` (il faut un secret valide pour un des slots)."""
+
+    slots, raw, size = _entete_v7_encode(data)
+    _ouvrir_slots(secret, slots)
+    del raw[index]
+    return _encode_no_strings(_assembler_entete_v7(raw)) + data[size:]
+
+
+def generer_cle_recuperation() -> str:
+    """Clé de récupération aléatoire (160 bits), lisible: groupes de 4 caractères base32."""
+
+    b32 = base64.b32encode(os.urandom(20)).decode("ascii")
+    return "-".join(b32[i : i + 4] for i in range(0, len(b32), 4))
+
+
+# ---------- Ouverture en flux (v5/v7): lecture, décodage, déchiffrement et décompression par morceaux
+
+_FLUX_CHUNK = 64 * 1024  # octets décodés par lecture
+_FLUX_SORTIE_MAX = 1 << 20  # sortie maximale d'un appel au décompresseur
+
+
+class _LecteurEmpreinte:
+    """Lecteur qui calcule au passage l'empreinte SHA-256 des octets lus (voir `empreinte_corps`)."""
+
+    def __init__(self, reader: BinaryIO) -> None:
+        self._reader = reader
+        self.sha = hashlib.sha256()
+
+    def read(self, n: int) -> bytes:
+        data = self._reader.read(n)
+        self.sha.update(data)
+        return data
+
+
+def _lire_flux(reader: BinaryIO, n: int) -> bytes | bytearray:
+    decoded = _try_decode_no_strings(_read_exact(reader, 2 * n))
+    if decoded is None or len(decoded) != n:
+        raise ValueError("Fichier chiffré invalide (tronqué ou encodage)")
+    return decoded
+
+
+class _FluxDecompression:
+    """Transmet le clair à `sink`, décompressé au fil de l'eau s'il porte l'en-tête de `compresser`."""
+
+    def __init__(self, sink: Callable[[bytes], None]) -> None:
+        self._sink = sink
+        self._debut = b""
+        self._d = None
+        self._brut = False
+        self._taille = 0
+        self._produit = 0
+
+    def feed(self, data: bytes) -> None:
+        if self._d is None and not self._brut:
+            self._debut += data
+            if len(self._debut) < _HEADER_COMPRESSION.size and _MAGIC_COMPRESSION.startswith(self._debut[:4]):
+                return
+            data, self._debut = self._debut, b""
+            self._demarrer(data)
+            data = data[_HEADER_COMPRESSION.size :] if self._d is not None else data
+        if self._brut:
+            if data:
+                self._sink(data)
+            return
+        self._decompresser(data)
+
+    def _demarrer(self, data: bytes) -> None:
+        if data[:4] == _MAGIC_COMPRESSION and len(data) >= _HEADER_COMPRESSION.size:
+            _magic, algo_id, _niveau, self._taille = _HEADER_COMPRESSION.unpack_from(data)
+            self._d = _decompresseur(algo_id)
+        else:
+            self._brut = True
+
+    def _decompresser(self, data: bytes) -> None:
+        # Sortie bornée par appel et par la taille annoncée: le clair n'est
+        # authentifié qu'en fin de flux, il ne doit pas pouvoir exploser avant.
+        d = self._d
+        try:
+            out = d.decompress(data, _FLUX_SORTIE_MAX)
+            while True:
+                self._produit += len(out)
+                if self._produit > self._taille:
+                    raise ValueError("Contenu compressé invalide (taille)")
+                if out:
+                    self._sink(out)
+                if isinstance(d, (lzma.LZMADecompressor, bz2.BZ2Decompressor)):
+                    if d.needs_input or d.eof:
+                        break
+                    out = d.decompress(b"", _FLUX_SORTIE_MAX)
+                elif d.unconsumed_tail:
+                    out = d.decompress(d.unconsumed_tail, _FLUX_SORTIE_MAX)
+                else:
+                    break
+        except (zlib.error, lzma.LZMAError, OSError, EOFError) as e:
+            raise ValueError("Contenu compressé invalide") from e
+
+    def close(self) -> None:
+        if self._d is None and not self._brut:
+            data, self._debut = self._debut, b""
+            self._demarrer(data)
+            if self._brut:
+                if data:
+                    self._sink(data)
+                return
+            self._decompresser(data[_HEADER_COMPRESSION.size :])
+        if self._d is not None and (self._produit != self._taille or not self._d.eof):
+            raise ValueError("Contenu compressé invalide (taille)")
+
+
+def dechiffrer_flux_session(
+    mdp: str, reader: BinaryIO, sink: Callable[[bytes], None], **kwargs
+) -> tuple[SessionKey, bytes]:
+    """Déchiffre un coffre v5/v7 depuis `reader` par morceaux, sans charger le fichier.
+
+    Le clair (décompressé) est passé à `sink` au fil de l'eau, mais il n'est
+    authentifié qu'en fin de flux: l'appelant ne doit rien en garder si la
+    fonction lève (InvalidTag pour un mauvais mot de passe ou un fichier
+    modifié, même si `sink` a échoué entre-temps sur un clair invalide).
+    Renvoie la clé de session (comme `dechiffrer_bytes_session`) et
+    l'empreinte du fichier (`empreinte_corps`), calculée pendant la lecture.
+    """
+
+    debut = reader.tell()
+    fin = reader.seek(0, io.SEEK_END)
+    reader.seek(debut)
+    lecteur = _LecteurEmpreinte(reader)
+
+    magic = bytes(_lire_flux(lecteur, 4))
+    if magic == MAGIC_V5:
+        header = magic + _lire_flux(lecteur, HEADER_V2.size - 4)
+        _magic, salt, n, r, p = HEADER_V2.unpack(header)
+        key = generer_cle_argon2id_raw(mdp, salt=salt, time_cost=n, memory_cost_kib=r, parallelism=p)
+        session = SessionKey(key, salt=salt, time_cost=n, memory_cost_kib=r, parallelism=p, **kwargs)
+        aad = header
+    elif magic == MAGIC_V7:
+        nb = _lire_flux(lecteur, 1)
+        entete, slots, _corps = _parse_v7(nb + _lire_flux(lecteur, nb[0] * V7_SLOT.size))
+        session = _session_v7(mdp, entete, slots, **kwargs)
+        aad = MAGIC_V7
+        # Empreinte du corps seul: une rotation de mot de passe ne la change pas.
+        lecteur.sha = hashlib.sha256()
+    else:
+        raise ValueError("Ouverture en flux: coffre v5 ou v7 attendu")
+
+    nonce = bytes(_lire_flux(lecteur, AEAD_NONCE_SIZE))
+    reste = (fin - reader.tell()) // 2 - AEAD_TAG_SIZE
+    if reste < 0:
+        raise ValueError("Fichier chiffré invalide (tag manquant)")
+    decryptor = Cipher(algorithms.AES(session._cle()), modes.GCM(nonce)).decryptor()
+    decryptor.authenticate_additional_data(aad)
+    flux = _FluxDecompression(sink)
+    erreur: Exception | None = None
+    while reste:
+        clair = decryptor.update(_lire_flux(lecteur, min(reste, _FLUX_CHUNK)))
+        reste -= min(reste, _FLUX_CHUNK)
+        if erreur is None:
+            try:
+                flux.feed(clair)
+            except Exception as e:
+                # Clair invalide: on va quand même jusqu'au tag (mauvais mot de passe -> InvalidTag).
+                erreur = e
+    try:
+        decryptor.finalize_with_tag(bytes(_lire_flux(lecteur, AEAD_TAG_SIZE)))
+    except InvalidTag:
+        session.effacer()
+        raise
+    if erreur is None:
+        try:
+            flux.close()
+        except Exception as e:
+            erreur = e
+    if erreur is not None:
+        session.effacer()
+        raise erreur
+    return session, lecteur.sha.digest()
+
+
+# ---------- Traitement par lots (un KDF par groupe sel/paramètres)
+
+
+@dataclass
+class ResultatLot:
+    """Résultat d'un fichier du lot: `donnees` (clair ou blob chiffré) ou `erreur`."""
+
+    nom: str
+    donnees: bytes | None = None
+    erreur: Exception | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.erreur is None
+
+
+@dataclass
+class RapportLot:
+    resultats: dict[str, ResultatLot]
+    derivations: int
+    octets: int
+    duree_s: float
+
+    @property
+    def erreurs(self) -> dict[str, Exception]:
+        return {nom: r.erreur for nom, r in self.resultats.items() if r.erreur is not None}
+
+    @property
+    def debit_mo_s(self) -> float:
+        return self.octets / 2**20 / self.duree_s if self.duree_s > 0 else 0.0
+
+    @property
+    def fichiers_s(self) -> float:
+        return len(self.resultats) / self.duree_s if self.duree_s > 0 else 0.0
+
+
+def _groupe_kdf(data: bytes) -> tuple:
+    """Clé de regroupement: deux blobs de même clé se déchiffrent avec la même dérivation."""
+
+    version, salt, n, r, p = peek_header(data)
+    if version in {"v4", "v5", "v6"}:
+        return ("argon2id", salt, n, r, p)
+    if version in {"v2", "v3"}:
+        return ("scrypt", salt, n, r, p)
+    if version == "v7":
+        # Copies d'un même coffre: mêmes slots, donc même DEK.
+        _slots, raw, _size = _entete_v7_encode(data)
+        return ("v7", *raw)
+    return ("pbkdf2",)
+
+
+def _deriver_groupe(mdp: str, groupe: tuple) -> bytes:
+    kind = groupe[0]
+    if kind == "argon2id":
+        _kind, salt, t, m, p = groupe
+        return generer_cle_argon2id_raw(mdp, salt=salt, time_cost=t, memory_cost_kib=m, parallelism=p)
+    if kind == "scrypt":
+        _kind, salt, n, r, p = groupe
+        return generer_cle_scrypt(mdp, salt=salt, n=n, r=r, p=p)
+    if kind == "v7":
+        slots = [V7_SLOT.unpack(raw) for raw in groupe[1:]]
+        return _ouvrir_slots(mdp, slots)[0]
+    return generer_cle_legacy_pbkdf2(mdp)
+
+
+def _dechiffrer_avec_cle(cle: bytes, data: bytes) -> bytes:
+    if peek_header(data)[0] == "v6":
+        reader, out = io.BytesIO(data), io.BytesIO()
+        header, _salt, _params, chunk_size, prefix = _lire_header_v6(reader)
+        _dechiffrer_segments_v6(AESGCM(cle), reader, out, header, chunk_size, prefix)
+        return out.getvalue()
+
+    version, salt, n, r, p, token = _decoder_vue(data)
+    if version == "v5":
+        return _dechiffrer_v5_avec_cle(cle, token, salt=salt, time_cost=n, memory_cost_kib=r, parallelism=p)
+    if version == "v7":
+        _entete, _slots, corps = _parse_v7(token)
+        return _dechiffrer_corps_v7(cle, corps)
+    if version == "v4":
+        return Fernet(base64.urlsafe_b64encode(cle)).decrypt(bytes(token))
+    return Fernet(cle).decrypt(bytes(token))
+
+
+def _dechiffrer_groupe(mdp: str, groupe: tuple, items: list[tuple[str, bytes]]) -> list[ResultatLot]:
+    """Tâche d'un worker: une dérivation, puis tous les fichiers du groupe."""
+
+    try:
+        cle = _deriver_groupe(mdp, groupe)
+    except Exception as e:
+        return [ResultatLot(nom, erreur=e) for nom, _data in items]
+
+    resultats = []
+    for nom, data in items:
+        try:
+            resultats.append(ResultatLot(nom, _dechiffrer_avec_cle(cle, data)))
+        except Exception as e:
+            resultats.append(ResultatLot(nom, erreur=e))
+    return resultats
+
+
+def dechiffrer_lot(mdp: str, blobs: Mapping[str, bytes], *, workers: int | None = None) -> RapportLot:
+    """Déchiffre plusieurs fichiers (tous formats) avec le même mot de passe.
+
+    Les blobs sont regroupés par (version, sel, paramètres KDF): chaque clé
+    n'est dérivée qu'une fois, et les groupes sont répartis sur un pool de
+    processus (`workers`, par défaut un par cœur). Une erreur (mot de passe
+    incorrect, fichier corrompu) n'affecte que le fichier concerné, ou tout
+    son groupe si c'est la dérivation qui échoue.
+    """
+
+    t0 = time.perf_counter()
+    resultats: dict[str, ResultatLot] = {}
+    groupes: dict[tuple, list[tuple[str, bytes]]] = {}
+    for nom, data in blobs.items():
+        try:
+            groupes.setdefault(_groupe_kdf(data), []).append((nom, data))
+        except Exception as e:
+            resultats[nom] = ResultatLot(nom, erreur=e)
+
+    workers = min(len(groupes), workers or os.cpu_count() or 1)
+    if workers <= 1:
+        lots = [_dechiffrer_groupe(mdp, groupe, items) for groupe, items in groupes.items()]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_dechiffrer_groupe, mdp, groupe, items): items for groupe, items in groupes.items()}
+            lots = []
+            for future, items in futures.items():
+                try:
+                    lots.append(future.result())
+                except Exception as e:
+                    # Worker perdu (ex: BrokenProcessPool): tout le groupe est en erreur.
+                    lots.append([ResultatLot(nom, erreur=e) for nom, _data in items])
+
+    for lot in lots:
+        for r in lot:
+            resultats[r.nom] = r
+    return RapportLot(
+        resultats={nom: resultats[nom] for nom in blobs},
+        derivations=len(groupes),
+        octets=sum(len(data) for data in blobs.values()),
+        duree_s=time.perf_counter() - t0,
+    )
+
+
+def chiffrer_lot(mdp: str, contenus: Mapping[str, bytes], *, salt: bytes | None = None) -> RapportLot:
+    """Chiffre plusieurs contenus en v5 avec une seule dérivation Argon2id.
+
+    Tous les blobs partagent le sel et les paramètres (nonce aléatoire propre
+    à chacun), ce qui permet ensuite à `dechiffrer_lot` de les traiter en un
+    seul groupe. Après le KDF, il ne reste que de l'AES-GCM: pas de pool.
+    """
+
+    t0 = time.perf_counter()
+    salt = os.urandom(16) if salt is None else salt
+    params = parametres_argon2()
+    key = generer_cle_argon2id_raw(
+        mdp,
         salt=salt,
-        time_cost=ARGON2_TIME_COST,
-        memory_cost_kib=ARGON2_MEMORY_COST_KIB,
-        parallelism=ARGON2_PARALLELISM,
+        time_cost=params.time_cost,
+        memory_cost_kib=params.memory_cost_kib,
+        parallelism=params.parallelism,
+    )
+    resultats = {}
+    for nom, contenu in contenus.items():
+        try:
+            resultats[nom] = ResultatLot(nom, _chiffrer_v5_avec_cle(key, contenu, salt=salt, **asdict(params)))
+        except Exception as e:
+            resultats[nom] = ResultatLot(nom, erreur=e)
+    return RapportLot(
+        resultats=resultats,
+        derivations=1,
+        octets=sum(len(c) for c in contenus.values()),
+        duree_s=time.perf_counter() - t0,
     )
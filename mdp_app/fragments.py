@@ -0,0 +1,199 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterable
+
+from .config import DOSSIER_FRAGMENTS, FRAGMENTS_NOMBRE
+from .crypto import SessionKey, dechiffrer_bytes_session
+from .storage import ecrire_chiffre, lire_chiffre
+from .vault import Vault, dump_vault_to_bytes, load_vault_from_bytes
+
+# Coffre fragmenté (optionnel): un dossier au lieu du fichier unique du coffre.
+#
+# Les entrées sont réparties en N fragments selon l'empreinte de leur id; chaque
+# fragment est le contenu binaire d'un petit coffre, chiffré indépendamment avec
+# la clé de session (v5 ou v7, comme le fichier unique). Même clé des secrets
+# pour tous les fragments: les jetons sont recopiés sans rechiffrement.
+# Le manifeste (chiffré lui aussi) donne pour chaque fragment sa génération et le
+# SHA-256 de son fichier: un fragment ancien, remplacé ou d'un autre coffre est refusé.
+# Enregistrement copy-on-write: les fragments modifiés sont écrits sous un nom
+# neuf (génération suivante), puis le manifeste est remplacé atomiquement, puis
+# les anciens fichiers sont supprimés. Un arrêt en cours de route laisse l'état
+# précédent lisible; les fichiers orphelins sont supprimés à l'enregistrement suivant.
+MANIFESTE = "manifest.bin"
+MANIFESTE_MAGIC = b"MDPF"
+MANIFESTE_VERSION = 1
+_HEADER = struct.Struct(">4sBH")  # magic, version, nombre de fragments
+_FRAGMENT = struct.Struct(">I32s")  # génération, SHA-256 du fichier
+
+
+def fragment_de(entry_id: str, n: int) -> int:
+    """Index du fragment d'une entrée (ne dépend que de l'id et de `n`)."""
+
+    return int.from_bytes(hashlib.blake2b(entry_id.encode("utf-8"), digest_size=4).digest(), "big") % n
+
+
+def fragmente(dossier: str | Path = DOSSIER_FRAGMENTS) -> bool:
+    """Vrai si `dossier` contient un coffre fragmenté (manifeste présent)."""
+
+    return (Path(dossier) / MANIFESTE).exists()
+
+
+class CoffreFragmente:
+    """État d'un coffre fragmenté sur disque: générations, empreintes et ids de chaque fragment."""
+
+    def __init__(self, dossier: str | Path = DOSSIER_FRAGMENTS, n: int = FRAGMENTS_NOMBRE) -> None:
+        if not 1 <= n <= 0xFFFF:
+            raise ValueError(f"Nombre de fragments invalide: {n}")
+        self.dossier = Path(dossier)
+        self.n = n
+        self.generations = [0] * n
+        self._empreintes = [b""] * n
+        # Ids de chaque fragment, dans l'ordre d'écriture (dict: ensemble ordonné).
+        # None: inconnus (rien d'écrit ni lu), le prochain enregistrement est complet.
+        self._membres: list[dict[str, None]] | None = None
+        # Session qui a chiffré les fragments actuels: une autre session (sel ou
+        # paramètres différents) ne pourrait pas les relire, tout est alors réécrit.
+        self._session: SessionKey | None = None
+
+    def chemin(self, index: int, generation: int | None = None) -> Path:
+        generation = self.generations[index] if generation is None else generation
+        return self.dossier / f"{index:02x}.{generation}.bin"
+
+    @classmethod
+    def ouvrir(
+        cls, mdp: str, dossier: str | Path = DOSSIER_FRAGMENTS, *, workers: int | None = None
+    ) -> tuple[CoffreFragmente, Vault, SessionKey]:
+        """Déverrouille le manifeste (un seul KDF) puis déchiffre les fragments en parallèle.
+
+        Ordre des entrées: fragment par fragment, puis ordre d'écriture dans le
+        fragment. ValueError si un fragment ne correspond pas au manifeste.
+        """
+
+        dossier = Path(dossier)
+        contenu, session = dechiffrer_bytes_session(mdp, lire_chiffre(dossier / MANIFESTE))
+        magic, version, n = _HEADER.unpack_from(contenu) if len(contenu) >= _HEADER.size else (b"", 0, 0)
+        if (
+            magic != MANIFESTE_MAGIC
+            or version != MANIFESTE_VERSION
+            or len(contenu) != _HEADER.size + n * _FRAGMENT.size
+        ):
+            session.effacer()
+            raise ValueError("Manifeste de coffre fragmenté invalide")
+        coffre = cls(dossier, n)
+        for i, (generation, empreinte) in enumerate(_FRAGMENT.iter_unpack(memoryview(contenu)[_HEADER.size :])):
+            coffre.generations[i] = generation
+            coffre._empreintes[i] = empreinte
+        try:
+            vault = coffre._charger(session, workers=workers)
+        except BaseException:
+            session.effacer()
+            raise
+        coffre._session = session
+        return coffre, vault, session
+
+    def _lire(self, session: SessionKey, index: int) -> Vault:
+        data = lire_chiffre(self.chemin(index))
+        if hashlib.sha256(data).digest() != self._empreintes[index]:
+            raise ValueError(f"Fragment {index} incohérent avec le manifeste")
+        return load_vault_from_bytes(session.dechiffrer(data))
+
+    def _charger(self, session: SessionKey, *, workers: int | None) -> Vault:
+        # AES-GCM et zlib libèrent le GIL sur les gros blocs: des threads suffisent.
+        workers = workers or min(self.n, os.cpu_count() or 1)
+        if workers <= 1:
+            parts = [self._lire(session, i) for i in range(self.n)]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                parts = list(pool.map(lambda i: self._lire(session, i), range(self.n)))
+        self._membres = [dict.fromkeys(e.id for e in part) for part in parts]
+        vault = Vault(secrets=parts[0].secrets, identite=parts[0].identite, cle_historique=parts[0].cle_historique)
+        for part in parts:
+            vault.extend(part)
+        return vault
+
+    def enregistrer(self, session: SessionKey, vault: Vault, modifies: Iterable[str] | None = None) -> int:
+        """Écrit les fragments des ids `modifies` (ajoutés, modifiés ou supprimés), puis le manifeste.
+
+        Tous les fragments sont réécrits si `modifies` est None, si `session`
+        n'est pas celle des fragments actuels ou si rien n'a encore été écrit.
+        Renvoie le nombre d'octets écrits.
+        """
+
+        if modifies is None or self._membres is None or session is not self._session:
+            membres: list[dict[str, None]] = [{} for _ in range(self.n)]
+            for e in vault:
+                entry_id = e.id
+                membres[fragment_de(entry_id, self.n)][entry_id] = None
+            sales = set(range(self.n))
+            if self._membres is None:
+                # Dossier existant d'un autre coffre (ex: nouveau coffre): ne jamais écraser un fragment
+                # encore référencé par l'ancien manifeste, les générations repartent au-delà.
+                self.generations = self._generations_disque()
+        else:
+            membres = list(self._membres)
+            sales = set()
+            for entry_id in modifies:
+                i = fragment_de(entry_id, self.n)
+                if i not in sales:
+                    membres[i] = dict(membres[i])
+                    sales.add(i)
+                if entry_id not in vault:
+                    membres[i].pop(entry_id, None)
+                else:
+                    membres[i][entry_id] = None
+            if not sales:
+                return 0
+
+        generations = list(self.generations)
+        empreintes = list(self._empreintes)
+        ecrits = 0
+        for i in sorted(sales):
+            part = Vault(
+                entries=[vault.get(entry_id) for entry_id in membres[i]],
+                secrets=vault.secrets,
+                identite=vault.identite,
+                cle_historique=vault.cle_historique,
+            )
+            data = session.chiffrer(dump_vault_to_bytes(part))
+            generations[i] += 1
+            empreintes[i] = hashlib.sha256(data).digest()
+            ecrire_chiffre(data, self.chemin(i, generations[i]))
+            ecrits += len(data)
+
+        manifeste = _HEADER.pack(MANIFESTE_MAGIC, MANIFESTE_VERSION, self.n) + b"".join(
+            _FRAGMENT.pack(g, h) for g, h in zip(generations, empreintes, strict=True)
+        )
+        data = session.chiffrer(manifeste)
+        ecrire_chiffre(data, self.dossier / MANIFESTE)
+        ecrits += len(data)
+
+        self.generations, self._empreintes, self._membres, self._session = generations, empreintes, membres, session
+        self._nettoyer()
+        return ecrits
+
+    def _generations_disque(self) -> list[int]:
+        generations = [0] * self.n
+        for p in self.dossier.glob("*.*.bin"):
+            index, _, generation = p.stem.partition(".")
+            try:
+                i, g = int(index, 16), int(generation)
+            except ValueError:
+                continue
+            if i < self.n:
+                generations[i] = max(generations[i], g)
+        return generations
+
+    def _nettoyer(self) -> None:
+        # Anciennes générations, et fragments orphelins d'un enregistrement interrompu.
+        actuels = {self.chemin(i).name for i in range(self.n)} | {MANIFESTE}
+        for p in self.dossier.glob("*.bin"):
+            if p.name not in actuels:
+                try:
+                    p.unlink()
+                except OSError:
+                    pass
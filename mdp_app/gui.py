@@ -1,19 +1,145 @@
 from __future__ import annotations
 
+import bisect
 import os
+import queue
+import threading
 import tkinter as tk
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from tkinter import messagebox, ttk
+from typing import Any, Callable, Iterable
 
 from cryptography.exceptions import InvalidTag
 from cryptography.fernet import InvalidToken
 
-from .config import FICHIER
-from .crypto import chiffrer_bytes_v5, dechiffrer_bytes, decoder
+from .audit import NIVEAUX, RapportAudit, auditer
+from .config import (
+    DOSSIER_FRAGMENTS,
+    FICHIER,
+    FICHIER_HISTORIQUE,
+    GUI_FILTER_DEBOUNCE_MS,
+    GUI_VIRTUAL_THRESHOLD,
+    HEADER_V2,
+)
+from .crypto import (
+    FORMATS_SESSION,
+    SessionKey,
+    dechiffrer_bytes_session,
+    dechiffrer_flux_session,
+    peek_header,
+)
 from .editor import avertir_mdp_faible
-from .storage import ecrire_chiffre, lire_chiffre
+from .fragments import CoffreFragmente, fragmente
+from .historique import Historique, Revision
+from .journal import Journal, Operation, appliquer
+from .sauvegarde_auto import SauvegardeAuto
+from .storage import ecrire_chiffre, lire_chiffre, ouvrir_chiffre
 from .ui_style import apply_style
-from .vault import Vault, VaultEntry, dump_vault_to_bytes, load_vault_from_bytes, new_empty_vault
+from .vault import (
+    SearchIndex,
+    Vault,
+    VaultEntry,
+    VaultReader,
+    dump_vault_to_bytes,
+    load_vault_from_bytes,
+    new_empty_vault,
+)
+
+
+def _dechiffrer_coffre(
+    mdp: str, cancel: threading.Event
+) -> tuple[Vault, SessionKey, SearchIndex, Journal | None, CoffreFragmente | None]:
+    """Travail du thread de déverrouillage: lecture, KDF, déchiffrement, journal, parsing et index de recherche."""
+
+    if fragmente(DOSSIER_FRAGMENTS):
+        # Coffre fragmenté: pas de journal, seuls les fragments modifiés sont réécrits.
+        fragments, vault, session = CoffreFragmente.ouvrir(mdp, DOSSIER_FRAGMENTS)
+        return vault, session, SearchIndex(vault.entries), None, fragments
+
+    with ouvrir_chiffre() as f:
+        version = peek_header(f.read(2 * HEADER_V2.size))[0]
+        if version in FORMATS_SESSION:
+            # Lecture, déchiffrement et parsing en flux: le fichier et le clair ne sont jamais entiers en mémoire.
+            f.seek(0)
+            reader = VaultReader()
+            session, empreinte = dechiffrer_flux_session(mdp, f, reader.feed)
+            journal, ops = Journal.ouvrir(session, None, empreinte=empreinte)
+            vault = appliquer(reader.close(), ops)
+            return vault, session, SearchIndex(vault.entries), journal, None
+
+    raw = lire_chiffre()
+    contenu, session = dechiffrer_bytes_session(mdp, raw)
+
+    # Migration automatique: une fois déverrouillé, on réécrit en v5
+    # (AEAD moderne + anti-`strings`).
+    if not cancel.is_set():
+        try:
+            migre = session.chiffrer(contenu)
+            ecrire_chiffre(migre)
+            raw = migre
+        except Exception:
+            pass
+    journal, ops = Journal.ouvrir(session, raw)
+    vault = appliquer(load_vault_from_bytes(contenu), ops)
+    return vault, session, SearchIndex(vault.entries), journal, None
+
+
+def _stable_rows(keep: list[str], position: dict[str, int]) -> set[str]:
+    """Plus longue sous-suite de `keep` déjà dans l'ordre de `position`: ces lignes ne bougent pas."""
+
+    tail_pos: list[int] = []  # tail_pos[k]: plus petite position finale d'une sous-suite de longueur k+1
+    tail_idx: list[int] = []
+    prev = [-1] * len(keep)
+    for i, iid in enumerate(keep):
+        p = position[iid]
+        k = bisect.bisect_left(tail_pos, p)
+        if k:
+            prev[i] = tail_idx[k - 1]
+        if k == len(tail_pos):
+            tail_pos.append(p)
+            tail_idx.append(i)
+        else:
+            tail_pos[k] = p
+            tail_idx[k] = i
+
+    stable: set[str] = set()
+    i = tail_idx[-1] if tail_idx else -1
+    while i >= 0:
+        stable.add(keep[i])
+        i = prev[i]
+    return stable
+
+
+def diff_rows(current: list[str], target: list[str]) -> tuple[list[str], list[tuple[str, str, int]]]:
+    """Opérations pour passer des lignes affichées `current` aux lignes `target` (iids).
+
+    Renvoie (iids à supprimer, [(op, iid, index)]) avec op "insert" ou "move".
+    Appliquer: supprimer, détacher les lignes "move", puis insérer/rattacher
+    chaque ligne à son index, dans l'ordre. Les lignes qui gardent leur ordre
+    relatif (filtre, ajout, suppression) ne génèrent aucune opération.
+    """
+
+    position = {iid: i for i, iid in enumerate(target)}
+    removed = [iid for iid in current if iid not in position]
+    keep = [iid for iid in current if iid in position]
+    stable = _stable_rows(keep, position)
+    current_set = set(current)
+    ops = [
+        ("move" if iid in current_set else "insert", iid, i) for i, iid in enumerate(target) if iid not in stable
+    ]
+    return removed, ops
+
+
+@dataclass
+class _Operation:
+    op_id: int
+    cancel: threading.Event
+    on_ok: Callable[[Any], None]
+    on_error: Callable[[Exception], None] | None = None
+    on_discard: Callable[[Any], None] | None = None
+    # Enregistrement automatique: ni barre de progression ni annulation, l'édition reste possible.
+    arriere_plan: bool = False
 
 
 class PasswordDialog(tk.Toplevel):  # <-- FIX: Toplevel est dans tkinter, pas ttk
@@ -101,8 +227,10 @@ class EntryDialog(tk.Toplevel):
         self.user_var = tk.StringVar(value=(entry.username if entry else ""))
         ttk.Entry(body, textvariable=self.user_var).grid(row=1, column=1, sticky="ew", padx=(8, 0), pady=(8, 0))
 
+        # Secrets déchiffrés ici seulement (un seul déchiffrement pour mot de passe + notes).
+        password, notes = entry.secrets() if entry else ("", "")
         ttk.Label(body, text="Mot de passe").grid(row=2, column=0, sticky="w", pady=(8, 0))
-        self.pw_var = tk.StringVar(value=(entry.password if entry else ""))
+        self.pw_var = tk.StringVar(value=password)
         self.pw_entry = ttk.Entry(body, textvariable=self.pw_var, show="•")
         self.pw_entry.grid(row=2, column=1, sticky="ew", padx=(8, 0), pady=(8, 0))
 
@@ -113,8 +241,8 @@ class EntryDialog(tk.Toplevel):
         self.notes = tk.Text(body, height=8, wrap=tk.WORD)
         self.notes.grid(row=3, column=1, columnspan=2, sticky="nsew", padx=(8, 0), pady=(8, 0))
         body.rowconfigure(3, weight=1)
-        if entry and entry.notes:
-            self.notes.insert("1.0", entry.notes)
+        if notes:
+            self.notes.insert("1.0", notes)
 
         btns = ttk.Frame(body)
         btns.grid(row=4, column=0, columnspan=3, sticky="e", pady=(12, 0))
@@ -162,20 +290,197 @@ class EntryDialog(tk.Toplevel):
         self.destroy()
 
 
+class AuditDialog(tk.Toplevel):
+    """Résultat d'un audit: une ligne par entrée à revoir; double-clic = sélectionner l'entrée dans la liste."""
+
+    def __init__(
+        self, parent: tk.Misc, *, rapport: RapportAudit, vault: Vault, on_select: Callable[[str], None]
+    ) -> None:
+        super().__init__(parent)
+        self.title("Audit des mots de passe")
+        self.transient(parent)
+        self._on_select = on_select
+
+        body = ttk.Frame(self, padding=12)
+        body.grid(row=0, column=0, sticky="nsew")
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+        body.columnconfigure(0, weight=1)
+        body.rowconfigure(1, weight=1)
+
+        reutilises = sum(len(ids) for ids in rapport.reutilises)
+        resume = (
+            f"{reutilises} réutilisés ({len(rapport.reutilises)} groupes) · {len(rapport.faibles)} faibles · "
+            f"{len(rapport.anciens)} anciens — {rapport.entrees} entrées en {rapport.duree_s:.1f} s"
+        )
+        ttk.Label(body, text=resume).grid(row=0, column=0, columnspan=2, sticky="w", pady=(0, 8))
+
+        self.tree = ttk.Treeview(body, columns=("title", "username", "problemes"), show="headings", selectmode="browse")
+        self.tree.heading("title", text="Titre")
+        self.tree.heading("username", text="Identifiant")
+        self.tree.heading("problemes", text="À revoir")
+        self.tree.column("title", width=220, anchor="w")
+        self.tree.column("username", width=180, anchor="w")
+        self.tree.column("problemes", width=260, anchor="w")
+        self.tree.grid(row=1, column=0, sticky="nsew")
+        vsb = ttk.Scrollbar(body, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=vsb.set)
+        vsb.grid(row=1, column=1, sticky="ns")
+
+        # Entrées réutilisées (groupe par groupe), puis faibles, puis anciennes.
+        for entry_id, problemes in rapport.problemes().items():
+            e = vault.get(entry_id)
+            if e is not None:
+                self.tree.insert("", tk.END, iid=entry_id, values=(e.title, e.username, ", ".join(problemes)))
+
+        ttk.Label(
+            body, text=f"Niveaux: {' < '.join(NIVEAUX)}. Double-clic: afficher l'entrée.", style="Muted.TLabel"
+        ).grid(row=2, column=0, columnspan=2, sticky="w", pady=(8, 0))
+
+        self.tree.bind("<Double-1>", lambda _e: self._select())
+        self.bind("<Return>", lambda _e: self._select())
+        self.bind("<Escape>", lambda _e: self.destroy())
+
+    def _select(self) -> None:
+        sel = self.tree.selection()
+        if sel:
+            self._on_select(str(sel[0]))
+
+
+class HistoriqueDialog(tk.Toplevel):
+    """Versions précédentes d'une entrée (la plus récente d'abord): copie du mot de passe ou restauration."""
+
+    def __init__(
+        self,
+        parent: tk.Misc,
+        *,
+        entry: VaultEntry,
+        revisions: list[Revision],
+        on_restore: Callable[[VaultEntry], None],
+    ) -> None:
+        super().__init__(parent)
+        self.title(f"Historique — {entry.title}")
+        self.transient(parent)
+        self._revisions = revisions
+        self._on_restore = on_restore
+
+        body = ttk.Frame(self, padding=12)
+        body.grid(row=0, column=0, sticky="nsew")
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+        body.columnconfigure(0, weight=1)
+        body.rowconfigure(0, weight=1)
+
+        colonnes = ("remplacee", "title", "username", "changements")
+        self.tree = ttk.Treeview(body, columns=colonnes, show="headings", selectmode="browse")
+        self.tree.heading("remplacee", text="Remplacée le")
+        self.tree.heading("title", text="Titre")
+        self.tree.heading("username", text="Identifiant")
+        self.tree.heading("changements", text="Différences avec la version suivante")
+        self.tree.column("remplacee", width=150, anchor="w")
+        self.tree.column("title", width=180, anchor="w")
+        self.tree.column("username", width=160, anchor="w")
+        self.tree.column("changements", width=220, anchor="w")
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        vsb = ttk.Scrollbar(body, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=vsb.set)
+        vsb.grid(row=0, column=1, sticky="ns")
+
+        suivante = entry
+        for i, rev in enumerate(revisions):
+            e = rev.entree
+            # Secrets déchiffrés ici seulement pour comparer (jamais affichés).
+            changements = [
+                nom
+                for nom, avant, apres in (
+                    ("titre", e.title, suivante.title),
+                    ("identifiant", e.username, suivante.username),
+                    ("mot de passe", e.password, suivante.password),
+                    ("notes", e.notes, suivante.notes),
+                )
+                if avant != apres
+            ]
+            quand = rev.remplacee_le.replace("T", " ")[:16]
+            self.tree.insert("", tk.END, iid=str(i), values=(quand, e.title, e.username, ", ".join(changements)))
+            suivante = e
+
+        btns = ttk.Frame(body)
+        btns.grid(row=1, column=0, columnspan=2, sticky="e", pady=(12, 0))
+        ttk.Button(btns, text="Copier le mot de passe", command=self._copier).grid(row=0, column=0, padx=(0, 8))
+        ttk.Button(btns, text="Restaurer cette version", command=self._restaurer).grid(row=0, column=1, padx=(0, 8))
+        ttk.Button(btns, text="Fermer", command=self.destroy).grid(row=0, column=2)
+
+        self.tree.bind("<Double-1>", lambda _e: self._copier())
+        self.bind("<Escape>", lambda _e: self.destroy())
+
+    def _selection(self) -> VaultEntry | None:
+        sel = self.tree.selection()
+        return self._revisions[int(sel[0])].entree if sel else None
+
+    def _copier(self) -> None:
+        e = self._selection()
+        if e is not None:
+            self.clipboard_clear()
+            self.clipboard_append(e.password)
+
+    def _restaurer(self) -> None:
+        e = self._selection()
+        if e is not None and messagebox.askyesno("Restaurer", "Remplacer l'entrée par cette version ?", parent=self):
+            self._on_restore(e)
+            self.destroy()
+
+
 class CoffreGUI(ttk.Frame):
     def __init__(self, master: tk.Tk) -> None:
         super().__init__(master, padding=10)
         self.master = master
 
         self._mdp: str | None = None
+        # Clé dérivée au déverrouillage: les enregistrements ne relancent pas Argon2id.
+        self._session: SessionKey | None = None
+        # Journal du snapshot courant et opérations non enregistrées (id -> entrée, None = supprimée):
+        # un enregistrement n'ajoute que ces opérations au journal au lieu de réécrire le coffre.
+        self._journal: Journal | None = None
+        self._pending: dict[str, VaultEntry | None] = {}
+        # Coffre fragmenté ouvert (à la place du journal): fragments des opérations en attente réécrits.
+        self._fragments: CoffreFragmente | None = None
+        # Révisions non enregistrées (ancienne version, nouvelle), ajoutées à l'historique
+        # après l'enregistrement; historique du coffre courant (voir `_historique_du_coffre`).
+        self._revisions: list[tuple[VaultEntry, VaultEntry]] = []
+        self._historique: Historique | None = None
         self._dirty = False
+        # Enregistrement automatique: planification (rafales regroupées), minuterie Tk
+        # en cours, et actions à reprendre une fois les modifications enregistrées
+        # (fermeture, verrouillage).
+        self._autosave = SauvegardeAuto()
+        self._autosave_after: str | None = None
+        self._apres_sauvegarde: list[Callable[[], None]] = []
         self._theme = "auto"
 
         self._vault: Vault = new_empty_vault()
-        self._filtered_ids: list[str] = []
+        # Index de recherche tenu à jour par ajouter/modifier/supprimer; None = pas de filtre.
+        self._index = SearchIndex()
+        self._filtered_ids: list[str] | None = None
+
+        # Liste: `_view` = ids à afficher, `_rows` = lignes présentes dans le Treeview
+        # (toutes, ou la fenêtre `_offset`.. en mode virtuel), `_stripes` = tag "odd" posé.
+        self._view: list[str] = []
+        self._rows: list[str] = []
+        self._stripes: dict[str, bool] = {}
+        self._offset = 0
+        self._virtual = False
+        self._stripe_pending = False
+        self._filter_after: str | None = None
+        self._last_query = ""
 
         self._status = tk.StringVar(value="Coffre: verrouillé")
 
+        # Opérations longues (Argon2id) dans un thread, résultats relevés par `_poll`.
+        self._q: queue.Queue[tuple[str, int, Any]] = queue.Queue()
+        self._op: _Operation | None = None
+        self._op_seq = 0
+        self._abandoned: dict[int, Callable[[Any], None]] = {}
+
         self._build_menu()
         self._build_toolbar()
         self._build_list()
@@ -184,12 +489,13 @@ class CoffreGUI(ttk.Frame):
         self._refresh_ui_state()
         self._update_title()
 
-        if not os.path.exists(FICHIER):
+        if not (os.path.exists(FICHIER) or fragmente(DOSSIER_FRAGMENTS)):
             self._set_status("Aucun coffre trouvé — Menu > Fichier > Nouveau")
         else:
             self._set_status("Coffre trouvé — Menu > Fichier > Ouvrir")
 
         self.master.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.master.after(50, self._poll)
 
     # ---------- UI building
 
@@ -214,6 +520,11 @@ class CoffreGUI(ttk.Frame):
             m_view.add_command(label="Thème: xpnative", command=lambda: self.set_theme("xpnative"))
         menubar.add_cascade(label="Affichage", menu=m_view)
 
+        m_tools = tk.Menu(menubar, tearoff=0)
+        m_tools.add_command(label="Audit des mots de passe…", command=self.lancer_audit)
+        m_tools.add_command(label="Historique de l'entrée…", command=self.afficher_historique, accelerator="Ctrl+H")
+        menubar.add_cascade(label="Outils", menu=m_tools)
+
         self.master.config(menu=menubar)
 
         # Raccourcis
@@ -221,6 +532,7 @@ class CoffreGUI(ttk.Frame):
         self.master.bind_all("<Control-o>", lambda _e: self.ouvrir())
         self.master.bind_all("<Control-s>", lambda _e: self.enregistrer())
         self.master.bind_all("<Control-l>", lambda _e: self.verrouiller())
+        self.master.bind_all("<Control-h>", lambda _e: self.afficher_historique())
         self.master.bind_all("<Control-q>", lambda _e: self._on_close())
 
     def _build_toolbar(self) -> None:
@@ -265,10 +577,10 @@ class CoffreGUI(ttk.Frame):
         self.search_var = tk.StringVar(value="")
         ent = ttk.Entry(search, textvariable=self.search_var)
         ent.grid(row=0, column=1, sticky="ew", padx=(8, 0))
-        ttk.Label(search, text="(titre, identifiant, notes)", style="Muted.TLabel").grid(
+        ttk.Label(search, text="(titre, identifiant; sans accents, approché)", style="Muted.TLabel").grid(
             row=0, column=2, sticky="w", padx=(8, 0)
         )
-        ent.bind("<KeyRelease>", lambda _e: self._apply_filter())
+        ent.bind("<KeyRelease>", lambda _e: self._schedule_filter())
 
         self.tree = ttk.Treeview(container, columns=("title", "username"), show="headings", selectmode="browse")
         self.tree.heading("title", text="Titre")
@@ -284,9 +596,17 @@ class CoffreGUI(ttk.Frame):
         except tk.TclError:
             pass
 
-        vsb = ttk.Scrollbar(container, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=vsb.set)
-        vsb.grid(row=1, column=1, sticky="ns")
+        self.vsb = ttk.Scrollbar(container, orient="vertical", command=self._on_scrollbar)
+        self.tree.configure(yscrollcommand=self._on_tree_scroll)
+        self.vsb.grid(row=1, column=1, sticky="ns")
+
+        # Mode virtuel: la molette et les flèches aux bords déplacent la fenêtre de lignes.
+        self.tree.bind("<MouseWheel>", lambda e: self._on_wheel(-1 if e.delta > 0 else 1))
+        self.tree.bind("<Button-4>", lambda _e: self._on_wheel(-1))
+        self.tree.bind("<Button-5>", lambda _e: self._on_wheel(1))
+        self.tree.bind("<Up>", lambda _e: self._on_arrow(-1))
+        self.tree.bind("<Down>", lambda _e: self._on_arrow(1))
+        self.tree.bind("<Configure>", lambda _e: self._virtual and self._sync_rows())
 
     def _build_statusbar(self) -> None:
         ttk.Separator(self, orient="horizontal").grid(row=3, column=0, sticky="ew", pady=(10, 6))
@@ -295,8 +615,14 @@ class CoffreGUI(ttk.Frame):
         status.columnconfigure(0, weight=1)
 
         ttk.Label(status, textvariable=self._status).grid(row=0, column=0, sticky="w")
+        self.pbar = ttk.Progressbar(status, orient="horizontal", mode="indeterminate", length=120)
+        self.pbar.grid(row=0, column=1, sticky="e", padx=(8, 0))
+        self.btn_cancel = ttk.Button(status, text="Annuler", command=self.annuler)
+        self.btn_cancel.grid(row=0, column=2, sticky="e", padx=(8, 0))
+        self.pbar.grid_remove()
+        self.btn_cancel.grid_remove()
         self.lbl_lock = ttk.Label(status, text="Verrouillé", foreground="#666")
-        self.lbl_lock.grid(row=0, column=1, sticky="e")
+        self.lbl_lock.grid(row=0, column=3, sticky="e", padx=(8, 0))
 
     # ---------- State / helpers
 
@@ -310,10 +636,13 @@ class CoffreGUI(ttk.Frame):
 
     def _refresh_ui_state(self) -> None:
         locked = self._mdp is None
+        busy = self._op is not None
         self.lbl_lock.configure(text="Verrouillé" if locked else "Déverrouillé")
-        self.btn_save.state(["disabled"] if locked else ["!disabled"])
+        self.btn_save.state(["disabled"] if (locked or busy) else ["!disabled"])
+        for b in (self.btn_new, self.btn_open):
+            b.state(["disabled"] if busy else ["!disabled"])
         for b in (self.btn_add, self.btn_edit, self.btn_del, self.btn_copy):
-            b.state(["disabled"] if locked else ["!disabled"])
+            b.state(["disabled"] if (locked or self._occupe()) else ["!disabled"])
 
     def _ask_password(self, *, title: str, prompt: str, confirm: bool) -> str | None:
         dlg = PasswordDialog(self.master, title=title, prompt=prompt, confirm=confirm)
@@ -322,15 +651,18 @@ class CoffreGUI(ttk.Frame):
 
     def _on_modified(self, _evt=None) -> None:
         # kept for compatibility; list UI sets dirty via _mark_dirty
-        self._dirty = True
-        self._update_title()
+        self._mark_dirty()
 
     def _mark_dirty(self) -> None:
         self._dirty = True
+        self._autosave.modifier()
+        self._planifier_autosave()
         self._update_title()
 
-    def _entries_by_id(self) -> dict[str, VaultEntry]:
-        return {e.id: e for e in self._vault.entries}
+    def _occupe(self) -> bool:
+        """Opération au premier plan en cours (l'enregistrement automatique n'empêche pas d'éditer)."""
+
+        return self._op is not None and not self._op.arriere_plan
 
     def _selected_entry_id(self) -> str | None:
         sel = self.tree.selection()
@@ -338,30 +670,330 @@ class CoffreGUI(ttk.Frame):
             return None
         return str(sel[0])
 
-    def _refresh_tree(self) -> None:
-        self.tree.delete(*self.tree.get_children())
-        by_id = self._entries_by_id()
-        ids = self._filtered_ids or [e.id for e in self._vault.entries]
-        for i, entry_id in enumerate(ids):
-            e = by_id.get(entry_id)
-            if not e:
-                continue
-            tags = ("odd",) if (i % 2 == 1) else ()
-            self.tree.insert("", "end", iid=e.id, values=(e.title, e.username), tags=tags)
-
-    def _apply_filter(self) -> None:
-        q = self.search_var.get().strip().lower()
-        if not q:
-            self._filtered_ids = []
-            self._refresh_tree()
+    def _reset_entries(self) -> None:
+        # Coffre remplacé (Nouveau, Ouvrir): un même id peut avoir d'autres valeurs,
+        # les lignes existantes ne sont pas réutilisées par la différence suivante.
+        if self._rows:
+            self.tree.delete(*self._rows)
+        self._rows = []
+        self._stripes.clear()
+        self._offset = 0
+        self._last_query = ""
+
+    def _refresh_tree(self, changed: Iterable[str] = ()) -> None:
+        """Met la liste à jour par différence: seules les lignes ajoutées/retirées/modifiées touchent Tk."""
+
+        # Sans filtre: tous les ids, dans l'ordre du coffre (l'index suit le même ordre, ids déjà formatés).
+        self._view = self._filtered_ids if self._filtered_ids is not None else self._index.search("")
+        self._sync_rows()
+        for iid in changed:
+            e = self._vault.get(iid)
+            if e is not None and self.tree.exists(iid):
+                self.tree.item(iid, values=(e.title, e.username))
+
+    def _window_size(self) -> int:
+        try:
+            row_h = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        except (tk.TclError, ValueError):
+            row_h = 20
+        height = self.tree.winfo_height()
+        if height <= 1:  # pas encore affiché
+            return int(self.tree.cget("height"))
+        return max(1, (height - row_h) // row_h)
+
+    def _sync_rows(self) -> None:
+        view = self._view
+        self._virtual = len(view) > GUI_VIRTUAL_THRESHOLD
+        if self._virtual:
+            size = self._window_size()
+            self._offset = max(0, min(self._offset, len(view) - size))
+            target = view[self._offset : self._offset + size]
+        else:
+            self._offset = 0
+            target = view
+
+        removed, ops = diff_rows(self._rows, target)
+        if removed:
+            self.tree.delete(*removed)
+            for iid in removed:
+                self._stripes.pop(iid, None)
+        moved = [iid for op, iid, _index in ops if op == "move"]
+        if moved:
+            self.tree.detach(*moved)
+        for op, iid, index in ops:
+            if op == "move":
+                self.tree.move(iid, "", index)
+            else:
+                e = self._vault.get(iid)
+                self.tree.insert("", index, iid=iid, values=(e.title, e.username))
+                self._stripes[iid] = False
+        self._rows = list(target)
+
+        if self._virtual:
+            n = len(view)
+            self.vsb.set(self._offset / n, (self._offset + len(target)) / n)
+        self._schedule_stripes()
+
+    def _schedule_stripes(self) -> None:
+        if not self._stripe_pending:
+            self._stripe_pending = True
+            self.after_idle(self._apply_stripes)
+
+    def _apply_stripes(self) -> None:
+        """Tags pair/impair des seules lignes visibles (recalculés au défilement, pas à chaque diff)."""
+
+        self._stripe_pending = False
+        rows = self._rows
+        if not rows:
             return
-        matched: list[str] = []
-        for e in self._vault.entries:
-            hay = f"{e.title} {e.username} {e.notes}".lower()
-            if q in hay:
-                matched.append(e.id)
-        self._filtered_ids = matched
-        self._refresh_tree()
+        if self._virtual:
+            first, last = 0, len(rows)
+        else:
+            top, bottom = self.tree.yview()
+            first, last = int(top * len(rows)), min(len(rows), int(bottom * len(rows)) + 1)
+        for i in range(first, last):
+            iid = rows[i]
+            odd = (self._offset + i) % 2 == 1
+            if self._stripes.get(iid) != odd:
+                self.tree.item(iid, tags=("odd",) if odd else ())
+                self._stripes[iid] = odd
+
+    def _on_tree_scroll(self, first: str, last: str) -> None:
+        if not self._virtual:
+            self.vsb.set(first, last)
+            self._schedule_stripes()
+
+    def _scroll_to(self, offset: int) -> None:
+        self._offset = offset
+        self._sync_rows()
+
+    def _on_scrollbar(self, *args: str) -> None:
+        if not self._virtual:
+            self.tree.yview(*args)
+            return
+        size = len(self._rows)
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * len(self._view)))
+        elif args[0] == "scroll":
+            step = int(args[1]) * (size if args[2] == "pages" else 1)
+            self._scroll_to(self._offset + step)
+
+    def _on_wheel(self, direction: int) -> str | None:
+        if not self._virtual:
+            return None
+        self._scroll_to(self._offset + 3 * direction)
+        return "break"
+
+    def _on_arrow(self, direction: int) -> str | None:
+        """Flèche haut/bas sur la première/dernière ligne de la fenêtre: on fait défiler d'une ligne."""
+
+        iid = self._selected_entry_id()
+        if not self._virtual or iid is None or iid not in self._rows:
+            return None
+        i = self._rows.index(iid)
+        if not (direction < 0 and i == 0) and not (direction > 0 and i == len(self._rows) - 1):
+            return None
+        index = self._offset + i + direction
+        if not 0 <= index < len(self._view):
+            return "break"
+        self._scroll_to(self._offset + direction)
+        target = self._view[index]
+        self.tree.selection_set(target)
+        self.tree.focus(target)
+        return "break"
+
+    def _schedule_filter(self) -> None:
+        """Frappe dans le champ de recherche: un seul filtrage après une courte pause."""
+
+        if self._filter_after is not None:
+            self.after_cancel(self._filter_after)
+        self._filter_after = self.after(GUI_FILTER_DEBOUNCE_MS, self._apply_filter)
+
+    def _apply_filter(self, changed: Iterable[str] = ()) -> None:
+        if self._filter_after is not None:
+            self.after_cancel(self._filter_after)
+            self._filter_after = None
+        q = self.search_var.get().strip()
+        if q != self._last_query:
+            self._last_query = q
+            self._offset = 0
+        # Toutes les entrées qui correspondent: les `SEARCH_TOP_K` meilleures d'abord, puis les autres.
+        self._filtered_ids = self._index.rank(q, complete=True) if q else None
+        self._refresh_tree(changed)
+
+    # ---------- Worker (KDF / chiffrement hors du thread Tk)
+
+    def _set_busy(self, busy: bool) -> None:
+        if busy:
+            self.pbar.grid()
+            self.btn_cancel.grid()
+            self.pbar.start(15)
+        else:
+            self.pbar.stop()
+            self.pbar.grid_remove()
+            self.btn_cancel.grid_remove()
+        self._refresh_ui_state()
+
+    def _start_worker(
+        self,
+        fn: Callable[[threading.Event], Any],
+        *,
+        status: str,
+        on_ok: Callable[[Any], None],
+        on_error: Callable[[Exception], None] | None = None,
+        on_discard: Callable[[Any], None] | None = None,
+        arriere_plan: bool = False,
+    ) -> None:
+        if self._op is not None:
+            messagebox.showinfo("Info", "Une opération est déjà en cours.")
+            return
+
+        self._op_seq += 1
+        op = _Operation(self._op_seq, threading.Event(), on_ok, on_error, on_discard, arriere_plan)
+        self._op = op
+
+        def run():
+            try:
+                result = fn(op.cancel)
+            except Exception as e:
+                self._q.put(("error", op.op_id, e))
+            else:
+                self._q.put(("done", op.op_id, result))
+
+        threading.Thread(target=run, daemon=True).start()
+        self._set_status(status)
+        if arriere_plan:
+            self._refresh_ui_state()
+        else:
+            self._set_busy(True)
+
+    def _poll(self) -> None:
+        try:
+            while True:
+                kind, op_id, payload = self._q.get_nowait()
+                op = self._op
+                if op is None or op.op_id != op_id:
+                    # Opération annulée: le résultat tardif est ignoré (et nettoyé).
+                    discard = self._abandoned.pop(op_id, None)
+                    if discard is not None and kind == "done":
+                        discard(payload)
+                    continue
+                self._op = None
+                self._set_busy(False)
+                if kind == "done":
+                    op.on_ok(payload)
+                elif op.on_error is not None:
+                    op.on_error(payload)
+                else:
+                    messagebox.showerror("Erreur", str(payload))
+        except queue.Empty:
+            if self._op is None:
+                self._expirer_si_inactif()
+        finally:
+            self.master.after(50, self._poll)
+
+    def annuler(self) -> None:
+        """Annule l'opération en cours.
+
+        Le KDF ne peut pas être interrompu: le thread termine en arrière-plan,
+        mais n'écrit plus rien et son résultat est ignoré.
+        """
+
+        op = self._op
+        if op is None or op.arriere_plan:
+            return
+        op.cancel.set()
+        if op.on_discard is not None:
+            self._abandoned[op.op_id] = op.on_discard
+        self._op = None
+        self._set_busy(False)
+        self._set_status("Opération annulée.")
+
+    def _discard_session(self, result: Any) -> None:
+        session = next((r for r in result if isinstance(r, SessionKey)), None) if isinstance(result, tuple) else result
+        if isinstance(session, SessionKey) and session is not self._session:
+            session.effacer()
+
+    # ---------- Enregistrement automatique
+
+    def _expirer_si_inactif(self) -> bool:
+        """Clé de session expirée (inactivité): verrouille, le mot de passe est oublié avec elle.
+
+        Sinon `_mdp` permettrait de redériver la clé sans rien demander.
+        Renvoie True si le coffre vient d'être verrouillé.
+        """
+
+        s = self._session
+        if s is None or not s.expiree:
+            return False
+        self._verrouiller()
+        if self._dirty:
+            self._set_status("Verrouillé après inactivité: Enregistrer redemande le mot de passe.")
+        else:
+            self._set_status("Verrouillé après inactivité (mot de passe oublié).")
+        return True
+
+    def _session_valide(self) -> bool:
+        """Vrai si un enregistrement peut se faire sans demander le mot de passe.
+
+        Clé de session présente et non expirée, seulement: une clé d'avant une
+        calibration (`a_jour` faux) est redérivée une fois par `_enregistrer`,
+        en arrière-plan, avec le mot de passe déjà connu.
+        """
+
+        s = self._session
+        return self._mdp is not None and s is not None and not s.expiree
+
+    def _annuler_autosave(self) -> None:
+        if self._autosave_after is not None:
+            self.after_cancel(self._autosave_after)
+            self._autosave_after = None
+
+    def _planifier_autosave(self) -> None:
+        # Réarmée à chaque modification: une rafale ne donne qu'un enregistrement
+        # (au plus tard `delai_max` après la première modification).
+        self._annuler_autosave()
+        attente = self._autosave.attente()
+        if attente is None or not self._session_valide():
+            return
+        self._autosave_after = self.after(round(attente * 1000), self._autosave_tick)
+
+    def _autosave_tick(self) -> None:
+        self._autosave_after = None
+        if self._op is not None:
+            # Jamais deux opérations à la fois: nouvel essai quand celle-ci sera terminée.
+            self._autosave_after = self.after(250, self._autosave_tick)
+            return
+        if not self._dirty:
+            return
+        if not self._session_valide() or self._mdp is None:
+            self._set_status("Modifications non enregistrées (session expirée): Enregistrer pour chiffrer.")
+            return
+        self._enregistrer(self._mdp, automatique=True)
+
+    def _vider_autosave(self, ensuite: Callable[[], None] | None = None) -> None:
+        """Enregistre sans attendre les modifications en attente, puis appelle `ensuite`.
+
+        Attend la fin d'un enregistrement automatique en cours (les modifications
+        faites pendant celui-ci sont enregistrées à la suite). Sans session
+        valide, ou si une autre opération est en cours, `ensuite` est appelé
+        directement: `_dirty` indique alors ce qui n'a pas été enregistré.
+        """
+
+        if ensuite is not None:
+            self._apres_sauvegarde.append(ensuite)
+        self._annuler_autosave()
+        if self._op is not None and self._op.arriere_plan:
+            return  # repris par la fin de l'enregistrement en cours
+        if self._op is None and self._dirty and self._session_valide() and self._mdp is not None:
+            self._enregistrer(self._mdp, automatique=True)
+            return
+        self._reprendre()
+
+    def _reprendre(self) -> None:
+        attente, self._apres_sauvegarde = self._apres_sauvegarde, []
+        for f in attente:
+            f()
 
     # ---------- Commands
 
@@ -382,12 +1014,25 @@ class CoffreGUI(ttk.Frame):
                 return
 
     def verrouiller(self) -> None:
+        # Les modifications en attente sont enregistrées tant que la clé de session existe.
+        self._vider_autosave(self._verrouiller)
+
+    def _verrouiller(self) -> None:
+        self._annuler_autosave()
+        self.annuler()
         self._mdp = None
+        if self._session is not None:
+            self._session.effacer()
+            self._session = None
+        # Le journal est scellé par la clé de session: le prochain enregistrement sera complet.
+        self._journal = None
         self._refresh_ui_state()
         self._set_status("Verrouillé (mot de passe oublié).")
         self._update_title()
 
     def nouveau(self) -> None:
+        if self._op is not None:
+            return
         if self._dirty and not messagebox.askyesno("Attention", "Modifications non enregistrées. Continuer ?"):
             return
 
@@ -397,136 +1042,346 @@ class CoffreGUI(ttk.Frame):
         avertir_mdp_faible(mdp)
 
         self._mdp = mdp
+        if self._session is not None:
+            self._session.effacer()
+            self._session = None
+        self._journal = None
+        self._fragments = None
+        self._pending.clear()
+        self._revisions.clear()
         self._vault = new_empty_vault()
+        self._index = SearchIndex()
+        self._reset_entries()
         self.search_var.set("")
-        self._filtered_ids = []
+        self._filtered_ids = None
         self._refresh_tree()
         self._dirty = True
+        # Pas de session avant le premier enregistrement: rien n'est planifié.
+        self._autosave.reinitialiser()
+        self._autosave.modifier()
+        self._annuler_autosave()
         self._refresh_ui_state()
         self._set_status("Nouveau coffre: ajoute des entrées puis Enregistrer.")
         self._update_title()
 
     def ouvrir(self) -> None:
-        if not os.path.exists(FICHIER):
+        if self._op is not None:
+            return
+        if not (os.path.exists(FICHIER) or fragmente(DOSSIER_FRAGMENTS)):
             messagebox.showinfo("Info", "Aucun coffre n'existe. Utilise Nouveau.")
             return
         if self._dirty and not messagebox.askyesno("Attention", "Modifications non enregistrées. Continuer ?"):
             return
+        self._tentative_ouverture(1)
 
-        tentative = 0
-        while tentative < 3:
-            mdp = self._mdp or self._ask_password(title="Déverrouiller", prompt="Mot de passe :", confirm=False)
-            if mdp is None:
-                return
-            tentative += 1
-            try:
-                raw = lire_chiffre()
-                version = decoder(raw)[0]
-                contenu = dechiffrer_bytes(mdp, raw)
-
-                # Migration automatique: une fois déverrouillé, on réécrit en v5
-                # (AEAD moderne + anti-`strings`).
-                if version != "v5":
-                    try:
-                        ecrire_chiffre(chiffrer_bytes_v5(mdp, contenu, salt=os.urandom(16)))
-                    except Exception:
-                        pass
-                self._mdp = mdp
-
-                self._vault = load_vault_from_bytes(contenu)
-                self.search_var.set("")
-                self._filtered_ids = []
-                self._refresh_tree()
-                self._dirty = False
-                self._refresh_ui_state()
+    def _tentative_ouverture(self, tentative: int) -> None:
+        self._expirer_si_inactif()
+        mdp = self._mdp or self._ask_password(title="Déverrouiller", prompt="Mot de passe :", confirm=False)
+        if mdp is None:
+            return
+
+        def on_ok(result: tuple[Vault, SessionKey, SearchIndex, Journal | None, CoffreFragmente | None]) -> None:
+            vault, session, index, journal, fragments = result
+            self._mdp = mdp
+            if self._session is not None:
+                self._session.effacer()
+            self._session = session
+            self._journal = journal
+            self._fragments = fragments
+            self._pending.clear()
+            self._revisions.clear()
+
+            self._vault = vault
+            self._index = index
+            self._reset_entries()
+            self.search_var.set("")
+            self._filtered_ids = None
+            self._refresh_tree()
+            self._dirty = False
+            self._autosave.reinitialiser()
+            self._annuler_autosave()
+            self._refresh_ui_state()
+            if self._autosave.actif and self._session_valide():
+                self._set_status("Déverrouillé. Les modifications sont enregistrées automatiquement.")
+            else:
                 self._set_status("Déverrouillé. Ajoute/modifie puis Enregistrer pour rechiffrer.")
-                self._update_title()
-                return
-            except (InvalidToken, InvalidTag, FileNotFoundError):
-                self._mdp = None
-                self._refresh_ui_state()
-                messagebox.showerror("Erreur", "Mot de passe incorrect ou fichier corrompu.")
+            self._update_title()
 
-        self._set_status("Trop de tentatives. Abandon.")
+        def on_error(exc: Exception) -> None:
+            if not isinstance(exc, (InvalidToken, InvalidTag, FileNotFoundError)):
+                self._set_status("Échec de l'ouverture.")
+                messagebox.showerror("Erreur", f"Impossible d'ouvrir le coffre.\nDétail: {exc}")
+                return
+            self._mdp = None
+            self._refresh_ui_state()
+            messagebox.showerror("Erreur", "Mot de passe incorrect ou fichier corrompu.")
+            if tentative < 3:
+                self._tentative_ouverture(tentative + 1)
+            else:
+                self._set_status("Trop de tentatives. Abandon.")
+
+        self._start_worker(
+            lambda cancel: _dechiffrer_coffre(mdp, cancel),
+            status="Déverrouillage en cours (dérivation de clé)…",
+            on_ok=on_ok,
+            on_error=on_error,
+            on_discard=self._discard_session,
+        )
 
     def enregistrer(self) -> None:
+        if self._op is not None:
+            return
+        self._expirer_si_inactif()
         mdp = self._mdp or self._ask_password(title="Déverrouiller", prompt="Mot de passe :", confirm=False)
         if mdp is None:
             return
         avertir_mdp_faible(mdp)
-
-        contenu = dump_vault_to_bytes(self._vault)
-
-        try:
-            data = chiffrer_bytes_v5(mdp, contenu, salt=os.urandom(16))
-            ecrire_chiffre(data)
+        self._enregistrer(mdp)
+
+    def _enregistrer(self, mdp: str, *, automatique: bool = False) -> None:
+        self._annuler_autosave()
+        # Argon2id n'est relancé que si aucune clé de session valide n'existe
+        # (nouveau coffre, mot de passe redemandé après expiration, ou calibration
+        # enregistrée avec d'autres paramètres que ceux du coffre: une seule fois).
+        session = self._session
+        if session is not None and (session.expiree or not session.a_jour):
+            session = None
+        # Enregistrement incrémental: seules les opérations en attente sont ajoutées au journal.
+        # Snapshot complet (et journal vidé) sans session/journal valide ou au-delà des seuils.
+        journal = self._journal
+        if journal is None or session is None or journal.session is not session or journal.a_compacter:
+            journal = None
+        ops: list[Operation] = list(self._pending.items())
+        revisions = list(self._revisions)
+        historique = self._historique_du_coffre()
+        # Disposition fragmentée sur disque (même pour un nouveau coffre): seuls les fragments
+        # touchés par les opérations en attente sont réécrits (tous pour un nouveau coffre).
+        fragments = self._fragments
+        if fragments is None and fragmente(DOSSIER_FRAGMENTS):
+            fragments = CoffreFragmente(DOSSIER_FRAGMENTS)
+        # Même clé des secrets: les jetons des entrées non modifiées sont recopiés sans rechiffrement.
+        snapshot = self._vault.copy()
+        modifications = self._autosave.commencer()
+
+        def work(cancel: threading.Event) -> tuple[SessionKey, Journal | None, int]:
+            if fragments is not None:
+                s = session or SessionKey.deriver(mdp)
+                octets = fragments.enregistrer(s, snapshot, [entry_id for entry_id, _ in ops])
+                j = None
+            elif journal is not None:
+                octets = journal.ajouter(ops)
+                s, j = journal.session, journal
+            else:
+                s = session or SessionKey.deriver(mdp)
+                data = s.chiffrer(dump_vault_to_bytes(snapshot))
+                if cancel.is_set():
+                    return s, None, 0
+                ecrire_chiffre(data)
+                octets = len(data)
+                j = Journal.nouveau(s, data)
+            # Après les nouvelles versions: au pire, une révision est perdue, jamais l'entrée.
+            octets += historique.ajouter(revisions)
+            if historique.a_compacter:
+                historique.compacter(e.id for e in snapshot)
+            return s, j, octets
+
+        def on_ok(result: tuple[SessionKey, Journal | None, int]) -> None:
+            s, j, octets = result
+            if s is not self._session and self._session is not None:
+                self._session.effacer()
+            self._session = s
+            self._journal = j
+            self._fragments = fragments
+            # Seules les opérations du snapshot sont enregistrées: celles faites
+            # pendant un enregistrement automatique restent en attente.
+            for entry_id, entry in ops:
+                if entry_id in self._pending and self._pending[entry_id] is entry:
+                    del self._pending[entry_id]
+            del self._revisions[: len(revisions)]
             self._mdp = mdp
-            self._dirty = False
+            self._dirty = not self._autosave.terminer(modifications, octets)
             self._refresh_ui_state()
-            self._set_status("Enregistré et chiffré (coffre caché).")
+            n, volume = self._autosave.par_minute()
+            stats = f"{n} enregistrement(s) et {volume / 1024:.1f} Kio écrits sur la dernière minute"
+            if automatique:
+                self._set_status(f"Enregistré automatiquement ({stats}).")
+            else:
+                self._set_status(f"Enregistré et chiffré (coffre caché) — {stats}.")
             self._update_title()
-            messagebox.showinfo("OK", "Rechiffré et sauvegardé.")
-        except Exception as e:
-            messagebox.showerror("Erreur", f"Impossible de rechiffrer/sauvegarder.\nDétail: {e}")
+            if not automatique:
+                messagebox.showinfo("OK", "Rechiffré et sauvegardé.")
+            if historique.ecarte is not None:
+                messagebox.showwarning(
+                    "Historique",
+                    "L'historique des révisions appartenait à un autre coffre: il a été conservé sous\n"
+                    f"{historique.ecarte}\net un nouvel historique a été commencé.",
+                )
+                historique.ecarte = None
+            if self._apres_sauvegarde:
+                self._vider_autosave()
+            else:
+                self._planifier_autosave()
+
+        def on_error(exc: Exception) -> None:
+            self._autosave.terminer(modifications, None)
+            if automatique:
+                # Pas de boîte de dialogue à chaque essai: nouvel essai à la prochaine modification.
+                self._set_status(f"Échec de l'enregistrement automatique: {exc}")
+            else:
+                self._set_status("Échec de l'enregistrement.")
+                messagebox.showerror("Erreur", f"Impossible de rechiffrer/sauvegarder.\nDétail: {exc}")
+            self._reprendre()
+
+        self._start_worker(
+            work,
+            status="Enregistrement automatique…" if automatique else "Chiffrement et enregistrement…",
+            on_ok=on_ok,
+            on_error=on_error,
+            on_discard=self._discard_session,
+            arriere_plan=automatique,
+        )
 
     def _on_close(self) -> None:
+        if self._occupe() and not messagebox.askyesno("Quitter", "Une opération est en cours. Quitter quand même ?"):
+            return
+        self._vider_autosave(self._fermer)
+
+    def _fermer(self) -> None:
         if self._dirty and not messagebox.askyesno("Quitter", "Modifications non enregistrées. Quitter quand même ?"):
             return
-        self.verrouiller()
+        self._verrouiller()
         self.master.destroy()
 
     def ajouter(self) -> None:
-        if self._mdp is None:
+        if self._mdp is None or self._occupe():
             return
         dlg = EntryDialog(self.master, title="Ajouter une entrée", entry=None)
         self.master.wait_window(dlg)
         if dlg.value is None:
             return
-        self._vault.entries.append(dlg.value)
+        self._vault.add(dlg.value)
+        self._index.add(dlg.value)
+        self._pending[dlg.value.id] = dlg.value
         self._apply_filter()
         self._mark_dirty()
 
     def modifier(self) -> None:
-        if self._mdp is None:
+        if self._mdp is None or self._occupe():
             return
         entry_id = self._selected_entry_id()
         if not entry_id:
             return
-        by_id = self._entries_by_id()
-        current = by_id.get(entry_id)
+        current = self._vault.get(entry_id)
         if not current:
             return
         dlg = EntryDialog(self.master, title="Modifier une entrée", entry=current)
         self.master.wait_window(dlg)
         if dlg.value is None:
             return
-        for i, e in enumerate(self._vault.entries):
-            if e.id == entry_id:
-                self._vault.entries[i] = dlg.value
-                break
-        self._apply_filter()
+        e = dlg.value
+        if (e.title, e.username, e.secrets()) == (current.title, current.username, current.secrets()):
+            return  # rien de modifié: pas de nouvelle version
+        self._remplacer(current, e)
+
+    def _remplacer(self, current: VaultEntry, entry: VaultEntry) -> None:
+        self._vault.update(entry)
+        self._index.update(entry)
+        self._pending[entry.id] = entry
+        # La version remplacée rejoindra l'historique au prochain enregistrement.
+        self._revisions.append((current, entry))
+        self._apply_filter(changed=(entry.id,))
         self._mark_dirty()
 
     def supprimer(self) -> None:
-        if self._mdp is None:
+        if self._mdp is None or self._occupe():
             return
         entry_id = self._selected_entry_id()
         if not entry_id:
             return
         if not messagebox.askyesno("Confirmer", "Supprimer cette entrée ?"):
             return
-        self._vault.entries = [e for e in self._vault.entries if e.id != entry_id]
+        self._vault.remove(entry_id)
+        self._index.remove(entry_id)
+        self._pending[entry_id] = None
         self._apply_filter()
         self._mark_dirty()
 
+    def lancer_audit(self) -> None:
+        if self._mdp is None or self._op is not None:
+            return
+        # Entrées remplacées (jamais modifiées sur place) pendant l'audit: la copie reste cohérente.
+        snapshot = self._vault.copy()
+
+        def on_ok(rapport: RapportAudit) -> None:
+            AuditDialog(self.master, rapport=rapport, vault=snapshot, on_select=self._afficher_entree)
+            self._set_status(f"Audit terminé: {len(rapport.problemes())} entrées à revoir.")
+
+        self._start_worker(lambda _cancel: auditer(snapshot), status="Audit des mots de passe…", on_ok=on_ok)
+
+    def _historique_du_coffre(self) -> Historique:
+        # Lié à l'identité du coffre: un autre coffre (Nouveau, Ouvrir) a son propre historique.
+        if self._historique is None or not self._historique.est_celui_de(self._vault):
+            self._historique = Historique.du_coffre(self._vault, path=FICHIER_HISTORIQUE)
+        return self._historique
+
+    def afficher_historique(self) -> None:
+        if self._mdp is None or self._op is not None:
+            return
+        entry_id = self._selected_entry_id()
+        current = self._vault.get(entry_id) if entry_id else None
+        if current is None:
+            return
+        # Versions remplacées depuis le dernier enregistrement (en mémoire), puis l'historique
+        # enregistré, reconstruit depuis la version sur disque (la plus ancienne en attente).
+        en_attente = [(a, n) for a, n in self._revisions if n.id == entry_id]
+        base = en_attente[0][0] if en_attente else current
+        historique = self._historique_du_coffre()
+
+        def work(_cancel: threading.Event) -> list[Revision]:
+            recentes = [Revision(a, n.updated_at) for a, n in reversed(en_attente)]
+            return recentes + historique.revisions(base)
+
+        def on_ok(revisions: list[Revision]) -> None:
+            self._set_status(f"Historique: {len(revisions)} version(s) précédente(s).")
+            if not revisions:
+                messagebox.showinfo("Historique", "Aucune version précédente pour cette entrée.")
+                return
+            HistoriqueDialog(self.master, entry=current, revisions=revisions, on_restore=self._restaurer)
+
+        self._start_worker(work, status="Lecture de l'historique…", on_ok=on_ok)
+
+    def _restaurer(self, ancienne: VaultEntry) -> None:
+        current = self._vault.get(ancienne.id)
+        if current is None or self._occupe():
+            return
+        # Nouvelle version (datée de maintenant): la version actuelle reste dans l'historique.
+        restauree = VaultEntry.new(title=ancienne.title, username=ancienne.username)
+        restauree.id = ancienne.id
+        restauree.password, restauree.notes = ancienne.secrets()
+        self._remplacer(current, restauree)
+        self._afficher_entree(restauree.id)
+        self._set_status("Version restaurée.")
+
+    def _afficher_entree(self, entry_id: str) -> None:
+        """Sélectionne `entry_id` dans la liste complète (filtre effacé), en la faisant défiler si besoin."""
+
+        if entry_id not in self._vault:
+            return
+        self.search_var.set("")
+        self._apply_filter()
+        if self._virtual:
+            self._scroll_to(self._view.index(entry_id))
+        self.tree.selection_set(entry_id)
+        self.tree.focus(entry_id)
+        self.tree.see(entry_id)
+
     def copier_mdp(self) -> None:
-        if self._mdp is None:
+        if self._mdp is None or self._occupe():
             return
         entry_id = self._selected_entry_id()
         if not entry_id:
             return
-        by_id = self._entries_by_id()
-        e = by_id.get(entry_id)
+        e = self._vault.get(entry_id)
         if not e:
             return
         self.master.clipboard_clear()
@@ -0,0 +1,356 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import struct
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Iterable
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from .config import (
+    AEAD_NONCE_SIZE,
+    FICHIER_HISTORIQUE,
+    HISTORIQUE_COMPACTER,
+    HISTORIQUE_MAX_JOURS,
+    HISTORIQUE_MAX_REVISIONS,
+)
+from .crypto import _encode_no_strings, _try_decode_no_strings
+from .storage import ajouter_chiffre, ecrire_chiffre
+from .vault import Vault, VaultEntry, _format_timestamp
+
+# Historique des révisions: versions précédentes des entrées modifiées.
+#
+# Fichier à part (FICHIER_HISTORIQUE), en ajout seul: ni l'ouverture ni
+# l'enregistrement du coffre ne le lisent. Un ajout ne lit que l'en-tête et le
+# dernier cadre (fin de la partie valide et nombre de cadres), puis écrit les
+# révisions ajoutées. Les cadres ne sont parcourus (sans déchiffrer les tokens)
+# que pour afficher l'historique d'une entrée ou compacter.
+# En-tête: magic, version, empreinte de l'identité du coffre (`Vault.identite`,
+# publique, conservée d'un enregistrement à l'autre), empreinte de la clé,
+# nombre de cadres gardés à la dernière compaction. La clé (`Vault.cle_historique`)
+# ne sort jamais du contenu chiffré du coffre: un export JSON en clair ne permet
+# pas de lire l'historique. L'historique d'un autre coffre (ou d'une autre clé)
+# n'est jamais écrasé: il est renommé à côté au premier ajout.
+# Cadre: étiquette de l'entrée (BLAKE2b à clé de son id: l'id n'apparaît pas),
+# date de la révision, longueur, puis nonce + AES-GCM sous une clé dérivée de
+# `Vault.cle_historique` (AAD: magic + id), puis longueur (répétée) et numéro du
+# cadre, qui permettent de vérifier la fin du fichier sans le parcourir.
+# Clair: empreinte de la version suivante, puis delta inverse: pour chaque champ
+# modifié, préfixe et suffixe communs avec la version suivante et le milieu
+# remplacé. Une révision se reconstruit depuis l'entrée courante en remontant les
+# deltas; un delta dont la base ne correspond pas (révision perdue ou en double) est ignoré.
+# Tout le fichier est encodé anti-`strings`, morceau par morceau (comme le journal).
+HISTORIQUE_MAGIC = b"MDPH"
+HISTORIQUE_VERSION = 3
+_HEADER = struct.Struct(">4sB16s16sI")  # magic, version, empreintes de l'identité et de la clé, cadres gardés
+_PROPRIETAIRE = 4 + 1 + 16 + 16  # partie de l'en-tête qui identifie le coffre et sa clé
+_CADRE = struct.Struct(">8sqI")  # étiquette, date (epoch), longueur du token
+_FIN = struct.Struct(">II")  # longueur du token (répétée), numéro du cadre dans le fichier
+_DELTA = struct.Struct(">III")  # préfixe, suffixe (caractères), taille du milieu (octets UTF-8)
+_EMPREINTE = 8
+_CHAMPS = ("title", "username", "password", "notes", "updated_at")  # ordre des arguments de VaultEntry
+
+Champs = tuple[str, str, str, str, str]
+
+
+@dataclass
+class Revision:
+    # Version précédente de l'entrée (même id), et date de la modification qui l'a remplacée.
+    entree: VaultEntry
+    remplacee_le: str
+
+
+def _champs(e: VaultEntry) -> Champs:
+    password, notes = e.secrets()
+    return (e.title, e.username, password, notes, e.updated_at)
+
+
+def encoder_delta(ancien: Champs, nouveau: Champs) -> bytes:
+    """Delta qui reconstruit `ancien` à partir de `nouveau` (champs inchangés omis)."""
+
+    drapeaux = 0
+    parts = []
+    for i, (a, n) in enumerate(zip(ancien, nouveau, strict=True)):
+        if a == n:
+            continue
+        drapeaux |= 1 << i
+        prefixe = len(os.path.commonprefix((a, n)))
+        suffixe = len(os.path.commonprefix((a[prefixe:][::-1], n[prefixe:][::-1])))
+        milieu = a[prefixe : len(a) - suffixe].encode("utf-8", "surrogatepass")
+        parts.append(_DELTA.pack(prefixe, suffixe, len(milieu)) + milieu)
+    return bytes([drapeaux]) + b"".join(parts)
+
+
+def appliquer_delta(nouveau: Champs, delta: bytes) -> Champs:
+    """Inverse de `encoder_delta`: version précédente de `nouveau` (ValueError si le delta ne s'applique pas)."""
+
+    champs = list(nouveau)
+    pos = 1
+    for i in range(len(_CHAMPS)):
+        if not delta[0] & (1 << i):
+            continue
+        prefixe, suffixe, taille = _DELTA.unpack_from(delta, pos)
+        pos += _DELTA.size
+        valeur = champs[i]
+        if prefixe + suffixe > len(valeur) or pos + taille > len(delta):
+            raise ValueError("Delta d'historique invalide")
+        milieu = delta[pos : pos + taille].decode("utf-8", "surrogatepass")
+        champs[i] = valeur[:prefixe] + milieu + valeur[len(valeur) - suffixe :]
+        pos += taille
+    if pos != len(delta):
+        raise ValueError("Delta d'historique invalide")
+    return tuple(champs)
+
+
+def _lire(f: BinaryIO, debut: int, n: int) -> bytes | bytearray | None:
+    # `n` octets décodés à partir de l'octet décodé `debut` (None si absents ou illisibles).
+    f.seek(2 * debut)
+    morceau = f.read(2 * n)
+    if n <= 0 or len(morceau) != 2 * n:
+        return None
+    return _try_decode_no_strings(morceau)
+
+
+class Historique:
+    """Historique des révisions du coffre d'identité `identite`, chiffré sous `cle`.
+
+    `identite` et `cle`: `Vault.identite` et `Vault.cle_historique`.
+
+    `ajouter` ne lit que l'en-tête et le dernier cadre: son coût ne dépend
+    pas de la taille de l'historique (sauf après un ajout interrompu, où la
+    partie valide est retrouvée en parcourant les cadres). L'index par entrée
+    n'est construit que par `revisions` et `compacter`.
+    """
+
+    def __init__(self, identite: bytes, cle: bytes, *, path: str | Path = FICHIER_HISTORIQUE) -> None:
+        self.path = Path(path)
+        self._source = (identite, cle)
+        self.cle = hashlib.blake2b(cle, digest_size=32, person=b"historique").digest()
+        self._aead = AESGCM(self.cle)
+        self._empreintes = (
+            hashlib.blake2b(identite, digest_size=16, person=b"id").digest(),
+            hashlib.blake2b(cle, digest_size=16, person=b"verif").digest(),
+        )
+        # Étiquette -> (date, début du token, longueur), du plus ancien au plus récent (None: pas encore lu).
+        self._index: dict[bytes, list[tuple[int, int, int]]] | None = None
+        # Taille décodée de la partie valide du fichier (None: pas encore lue; 0: fichier à créer),
+        # nombre de cadres, et nombre de cadres gardés à la dernière compaction.
+        self._taille: int | None = None
+        self._cadres = 0
+        self._depart = 0
+        # Fichier d'un autre coffre (autre identité ou autre clé, ancienne version): mis de côté au premier ajout.
+        self._etranger = False
+        self.ecarte: Path | None = None
+
+    @classmethod
+    def du_coffre(cls, vault: Vault, *, path: str | Path = FICHIER_HISTORIQUE) -> Historique:
+        return cls(vault.identite, vault.cle_historique, path=path)
+
+    def est_celui_de(self, vault: Vault) -> bool:
+        return self._source == (vault.identite, vault.cle_historique)
+
+    def _etiquette(self, entry_id: str) -> bytes:
+        return hashlib.blake2b(entry_id.encode("utf-8"), key=self.cle, digest_size=8, person=b"id").digest()
+
+    def _empreinte(self, champs: Champs) -> bytes:
+        h = hashlib.blake2b(key=self.cle, digest_size=_EMPREINTE, person=b"version")
+        for valeur in champs:
+            octets = valeur.encode("utf-8", "surrogatepass")
+            h.update(len(octets).to_bytes(4, "big") + octets)
+        return h.digest()
+
+    def _aad(self, entry_id: str) -> bytes:
+        return HISTORIQUE_MAGIC + entry_id.encode("utf-8")
+
+    def _entete(self, depart: int) -> bytes:
+        return _HEADER.pack(HISTORIQUE_MAGIC, HISTORIQUE_VERSION, *self._empreintes, depart)
+
+    def _ouvrir(self) -> None:
+        # En-tête et dernier cadre seulement: fin de la partie valide et nombre de cadres.
+        if self._taille is not None:
+            return
+        self._taille = self._cadres = self._depart = 0
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            fin = f.seek(0, os.SEEK_END) // 2
+            entete = _lire(f, 0, _HEADER.size)
+            if entete is None or entete[:_PROPRIETAIRE] != self._entete(0)[:_PROPRIETAIRE]:
+                # Seul un fichier vide est réutilisé tel quel; tout autre contenu est mis de côté.
+                self._etranger = fin > 0
+                return
+            self._depart = _HEADER.unpack(entete)[4]
+            self._taille = _HEADER.size
+            if fin == _HEADER.size:
+                return
+            queue = _lire(f, fin - _FIN.size, _FIN.size)
+            if queue is not None:
+                longueur, numero = _FIN.unpack(queue)
+                debut = fin - _FIN.size - longueur - _CADRE.size
+                cadre = _lire(f, debut, _CADRE.size) if debut >= _HEADER.size else None
+                if cadre is not None and _CADRE.unpack(cadre)[2] == longueur:
+                    self._taille, self._cadres = fin, numero
+                    return
+            # Dernier cadre incomplet (ajout interrompu): partie valide retrouvée en parcourant les cadres.
+            self._parcourir(f, fin)
+
+    def _parcourir(self, f: BinaryIO, fin_fichier: int) -> dict[bytes, list[tuple[int, int, int]]]:
+        index: dict[bytes, list[tuple[int, int, int]]] = {}
+        pos = _HEADER.size
+        numero = 0
+        # Arrêt au premier cadre incomplet: écrasé par le prochain ajout.
+        while (cadre := _lire(f, pos, _CADRE.size)) is not None:
+            etiquette, date, longueur = _CADRE.unpack(cadre)
+            fin = pos + _CADRE.size + longueur + _FIN.size
+            queue = _lire(f, fin - _FIN.size, _FIN.size) if fin <= fin_fichier else None
+            if longueur <= AEAD_NONCE_SIZE or queue is None or _FIN.unpack(queue)[0] != longueur:
+                break
+            numero = _FIN.unpack(queue)[1]
+            index.setdefault(etiquette, []).append((date, pos + _CADRE.size, longueur))
+            pos = fin
+        self._index, self._taille, self._cadres = index, pos, numero
+        return index
+
+    def _indexer(self) -> dict[bytes, list[tuple[int, int, int]]]:
+        self._ouvrir()
+        if self._index is not None:
+            return self._index
+        if self._etranger or not self._taille:
+            self._index = {}
+            return self._index
+        with open(self.path, "rb") as f:
+            return self._parcourir(f, self._taille)
+
+    def __len__(self) -> int:
+        self._ouvrir()
+        return 0 if self._etranger else self._cadres
+
+    @property
+    def a_compacter(self) -> bool:
+        """Vrai si HISTORIQUE_COMPACTER révisions ont été ajoutées depuis la dernière compaction."""
+
+        self._ouvrir()
+        return not self._etranger and self._cadres - self._depart >= HISTORIQUE_COMPACTER
+
+    def _ecarter(self) -> None:
+        # Jamais tronqué: l'historique d'un autre coffre est renommé à côté (voir `ecarte`).
+        cible = self.path.with_name(f"{self.path.name}.{time.strftime('%Y%m%d-%H%M%S')}.orphelin")
+        os.replace(self.path, cible)
+        self.ecarte = cible
+        self._etranger = False
+        self._index, self._taille, self._cadres, self._depart = {}, 0, 0, 0
+
+    def ajouter(self, revisions: Iterable[tuple[VaultEntry, VaultEntry]], *, maintenant: int | None = None) -> int:
+        """Ajoute les révisions (ancienne version, version qui la remplace) en une écriture (fsync).
+
+        À appeler après l'enregistrement des nouvelles versions. Renvoie le
+        nombre d'octets écrits (0 si l'historique est désactivé). Un fichier
+        d'un autre coffre est d'abord renommé à côté (`ecarte`).
+        """
+
+        if HISTORIQUE_MAX_REVISIONS <= 0:
+            return 0
+        date = int(time.time()) if maintenant is None else maintenant
+        cadres = []
+        for ancienne, nouvelle in revisions:
+            a, n = _champs(ancienne), _champs(nouvelle)
+            if a == n:
+                continue
+            nonce = os.urandom(AEAD_NONCE_SIZE)
+            clair = self._empreinte(n) + encoder_delta(a, n)
+            token = nonce + self._aead.encrypt(nonce, clair, self._aad(nouvelle.id))
+            cadres.append((self._etiquette(nouvelle.id), token))
+        if not cadres:
+            return 0
+        self._ouvrir()
+        if self._etranger:
+            self._ecarter()
+        taille = self._taille or 0
+        parts = [] if taille else [self._entete(0)]
+        pos = taille or _HEADER.size
+        numero = self._cadres
+        ajouts = []
+        for etiquette, token in cadres:
+            numero += 1
+            parts.append(_CADRE.pack(etiquette, date, len(token)) + token + _FIN.pack(len(token), numero))
+            ajouts.append((etiquette, (date, pos + _CADRE.size, len(token))))
+            pos += _CADRE.size + len(token) + _FIN.size
+        data = b"".join(parts)
+        ajouter_chiffre(_encode_no_strings(data), self.path, offset=2 * taille)
+        # État mis à jour seulement après l'écriture (l'index, s'il a déjà été construit).
+        if self._index is not None:
+            for etiquette, ref in ajouts:
+                self._index.setdefault(etiquette, []).append(ref)
+        self._taille, self._cadres = pos, numero
+        return 2 * len(data)
+
+    def revisions(self, courante: VaultEntry, *, maintenant: int | None = None) -> list[Revision]:
+        """Versions précédentes de `courante` (version enregistrée), de la plus récente à la plus ancienne.
+
+        Seules les révisions de cette entrée sont lues et déchiffrées, dans la
+        limite de la rétention (HISTORIQUE_MAX_REVISIONS, HISTORIQUE_MAX_JOURS).
+        """
+
+        refs = self._indexer().get(self._etiquette(courante.id))
+        if not refs:
+            return []
+        limite = 0
+        if HISTORIQUE_MAX_JOURS > 0:
+            limite = (int(time.time()) if maintenant is None else maintenant) - HISTORIQUE_MAX_JOURS * 86400
+        etat = _champs(courante)
+        aad = self._aad(courante.id)
+        out: list[Revision] = []
+        with open(self.path, "rb") as f:
+            for date, debut, longueur in reversed(refs):
+                if len(out) >= HISTORIQUE_MAX_REVISIONS or date < limite:
+                    break
+                token = _lire(f, debut, longueur)
+                try:
+                    clair = self._aead.decrypt(bytes(token[:AEAD_NONCE_SIZE]), bytes(token[AEAD_NONCE_SIZE:]), aad)
+                    if clair[:_EMPREINTE] != self._empreinte(etat):
+                        continue
+                    etat = appliquer_delta(etat, clair[_EMPREINTE:])
+                except (InvalidTag, TypeError, ValueError, struct.error):
+                    continue
+                out.append(Revision(VaultEntry(courante.id, *etat), _format_timestamp(date)))
+        return out
+
+    def compacter(self, ids: Iterable[str], *, maintenant: int | None = None) -> int:
+        """Réécrit le fichier avec les seules révisions retenues des entrées `ids` (celles du coffre).
+
+        Les tokens sont recopiés tels quels (rien n'est déchiffré). Renvoie la
+        taille du nouveau fichier (0 s'il appartient à un autre coffre: il n'est pas touché).
+        """
+
+        index = self._indexer()
+        if self._etranger:
+            return 0
+        limite = 0
+        if HISTORIQUE_MAX_JOURS > 0:
+            limite = (int(time.time()) if maintenant is None else maintenant) - HISTORIQUE_MAX_JOURS * 86400
+        garder = max(HISTORIQUE_MAX_REVISIONS, 0)
+        parts = []
+        nouvel_index: dict[bytes, list[tuple[int, int, int]]] = {}
+        pos = _HEADER.size
+        numero = 0
+        with open(self.path, "rb") as f:
+            for entry_id in ids:
+                etiquette = self._etiquette(entry_id)
+                for date, debut, longueur in index.get(etiquette, [])[-garder:] if garder else ():
+                    token = _lire(f, debut, longueur)
+                    if date < limite or token is None:
+                        continue
+                    numero += 1
+                    parts.append(_CADRE.pack(etiquette, date, longueur) + token + _FIN.pack(longueur, numero))
+                    nouvel_index.setdefault(etiquette, []).append((date, pos + _CADRE.size, longueur))
+                    pos += _CADRE.size + longueur + _FIN.size
+        data = _encode_no_strings(self._entete(numero) + b"".join(parts))
+        ecrire_chiffre(data, self.path)
+        self._index, self._taille, self._cadres, self._depart = nouvel_index, pos, numero, numero
+        return len(data)
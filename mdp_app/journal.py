@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import struct
+from pathlib import Path
+from typing import Iterable
+
+from cryptography.exceptions import InvalidTag
+
+from .config import FICHIER_JOURNAL, JOURNAL_MAX_BYTES, JOURNAL_MAX_RECORDS
+from .crypto import SessionKey, _encode_no_strings, _try_decode_no_strings, empreinte_corps
+from .storage import ajouter_chiffre, ecrire_chiffre
+from .vault import Vault, VaultEntry, dump_vault_to_bytes, load_vault_from_bytes
+
+# Journal des modifications, à côté du snapshot (fichier du coffre).
+#
+# En-tête: magic, version, empreinte du snapshot (`empreinte_corps`). Un journal
+# dont l'empreinte ne correspond pas au snapshot courant est périmé (snapshot
+# réécrit depuis: compaction, CLI, migration) et ignoré.
+# Enregistrements: longueur (uint32) puis nonce + AES-GCM sous la clé de session,
+# AAD = en-tête + numéro d'ordre: ni déplaçables, ni rejouables sur un autre snapshot.
+# Clair d'un enregistrement: opération, puis l'entrée (contenu binaire d'un
+# coffre à une entrée) ou l'id supprimé.
+# Tout le fichier est encodé anti-`strings`, morceau par morceau (l'encodage
+# est octet par octet, les morceaux se concatènent).
+JOURNAL_MAGIC = b"MDPJ"
+JOURNAL_VERSION = 1
+_HEADER = struct.Struct(">4sB32s")
+_LONGUEUR = struct.Struct(">I")
+_SEQ = struct.Struct(">I")
+_OP_ENTREE = b"E"
+_OP_SUPPRESSION = b"D"
+
+# Opération rejouable: (id, entrée) pour un ajout/une modification, (id, None) pour une suppression.
+Operation = tuple[str, VaultEntry | None]
+
+
+class Journal:
+    """Journal ouvert pour un snapshot donné: ajout d'opérations en O(taille des opérations)."""
+
+    def __init__(
+        self,
+        session: SessionKey,
+        snapshot: bytes | None,
+        *,
+        path: str | Path = FICHIER_JOURNAL,
+        empreinte: bytes | None = None,
+    ) -> None:
+        # `empreinte`: `empreinte_corps(snapshot)` déjà calculée (ouverture en flux, snapshot non conservé).
+        self.session = session
+        self.path = Path(path)
+        if empreinte is None:
+            empreinte = empreinte_corps(snapshot)
+        self._header = _HEADER.pack(JOURNAL_MAGIC, JOURNAL_VERSION, empreinte)
+        # Taille décodée de la partie valide du fichier (0: en-tête à écrire).
+        self._taille = 0
+        self.enregistrements = 0
+
+    @classmethod
+    def ouvrir(
+        cls,
+        session: SessionKey,
+        snapshot: bytes | None,
+        *,
+        path: str | Path = FICHIER_JOURNAL,
+        empreinte: bytes | None = None,
+    ) -> tuple[Journal, list[Operation]]:
+        """Relit le journal de `snapshot` et renvoie les opérations à rejouer.
+
+        La lecture s'arrête au premier enregistrement incomplet ou invalide
+        (écriture interrompue): il est écrasé par le prochain ajout.
+        """
+
+        journal = cls(session, snapshot, path=path, empreinte=empreinte)
+        try:
+            raw = journal.path.read_bytes()
+        except FileNotFoundError:
+            return journal, []
+        header = _decoder_morceau(raw, 0, _HEADER.size)
+        if header is None or bytes(header) != journal._header:
+            return journal, []
+
+        # Décodage morceau par morceau: une fin illisible (ex: zéros après un
+        # crash) n'empêche pas de relire les enregistrements qui la précèdent.
+        ops: list[Operation] = []
+        pos = _HEADER.size
+        while (longueur := _decoder_morceau(raw, pos, _LONGUEUR.size)) is not None:
+            (n,) = _LONGUEUR.unpack(longueur)
+            token = _decoder_morceau(raw, pos + _LONGUEUR.size, n)
+            if token is None:
+                break
+            try:
+                ops.append(_decoder_operation(session.desceller(bytes(token), journal._aad(len(ops)))))
+            except (InvalidTag, ValueError):
+                break
+            pos += _LONGUEUR.size + n
+        journal._taille = pos
+        journal.enregistrements = len(ops)
+        return journal, ops
+
+    @classmethod
+    def nouveau(cls, session: SessionKey, snapshot: bytes, *, path: str | Path = FICHIER_JOURNAL) -> Journal:
+        """Journal vide lié à `snapshot` (à appeler juste après l'écriture du snapshot)."""
+
+        journal = cls(session, snapshot, path=path)
+        ecrire_chiffre(_encode_no_strings(journal._header), journal.path)
+        journal._taille = _HEADER.size
+        return journal
+
+    @property
+    def taille(self) -> int:
+        """Taille sur disque de la partie valide (octets encodés)."""
+
+        return 2 * self._taille
+
+    @property
+    def a_compacter(self) -> bool:
+        return self.enregistrements >= JOURNAL_MAX_RECORDS or self.taille >= JOURNAL_MAX_BYTES
+
+    def _aad(self, seq: int) -> bytes:
+        return self._header + _SEQ.pack(seq)
+
+    def ajouter(self, ops: Iterable[Operation]) -> int:
+        """Scelle et ajoute `ops` en une écriture (fsync). Renvoie le nombre d'octets écrits."""
+
+        parts = [] if self._taille else [self._header]
+        seq = self.enregistrements
+        for op in ops:
+            token = self.session.sceller(_encoder_operation(op), self._aad(seq))
+            parts.append(_LONGUEUR.pack(len(token)) + token)
+            seq += 1
+        data = b"".join(parts)
+        if not data:
+            return 0
+        ajouter_chiffre(_encode_no_strings(data), self.path, offset=self.taille)
+        # Mis à jour seulement après l'écriture: un échec laisse une fin tronquée au prochain ajout.
+        self._taille += len(data)
+        self.enregistrements = seq
+        return 2 * len(data)
+
+
+def _decoder_morceau(raw: bytes, debut: int, n: int) -> bytes | bytearray | None:
+    """Décode `n` octets à partir de l'octet décodé `debut` (None si absent ou illisible)."""
+
+    morceau = raw[2 * debut : 2 * (debut + n)]
+    if n <= 0 or len(morceau) != 2 * n:
+        return None
+    return _try_decode_no_strings(morceau)
+
+
+def _encoder_operation(op: Operation) -> bytes:
+    entry_id, entry = op
+    if entry is None:
+        return _OP_SUPPRESSION + entry_id.encode("utf-8")
+    return _OP_ENTREE + dump_vault_to_bytes(Vault(entries=[entry]))
+
+
+def _decoder_operation(clair: bytes) -> Operation:
+    op, reste = clair[:1], clair[1:]
+    if op == _OP_SUPPRESSION:
+        return reste.decode("utf-8"), None
+    if op == _OP_ENTREE:
+        entries = load_vault_from_bytes(reste).entries
+        if len(entries) == 1:
+            return entries[0].id, entries[0]
+    raise ValueError("Enregistrement de journal invalide")
+
+
+def appliquer(vault: Vault, ops: Iterable[Operation]) -> Vault:
+    """Rejoue `ops` sur `vault` (en place): une entrée existante garde sa position."""
+
+    for entry_id, entry in ops:
+        if entry is None:
+            vault.remove(entry_id)
+        else:
+            vault.update(entry)
+    return vault
+
+
+def contenu_avec_journal(
+    contenu: bytes, snapshot: bytes, session: SessionKey, *, path: str | Path = FICHIER_JOURNAL
+) -> bytes:
+    """Contenu déchiffré de `snapshot` avec les opérations du journal repliées (CLI, outils).
+
+    Sans journal valide, `contenu` est renvoyé tel quel (y compris un ancien contenu texte).
+    """
+
+    _journal, ops = Journal.ouvrir(session, snapshot, path=path)
+    if not ops:
+        return contenu
+    return dump_vault_to_bytes(appliquer(load_vault_from_bytes(contenu), ops))
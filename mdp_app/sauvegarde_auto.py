@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Callable
+
+from .config import AUTOSAVE_DELAI_MAX_MS, AUTOSAVE_DELAI_MS
+
+# Enregistrement automatique: quand enregistrer, indépendamment de Tk.
+#
+# Chaque modification incrémente un compteur; un enregistrement capture la
+# valeur du compteur au moment du snapshot. Les modifications faites pendant
+# l'enregistrement restent donc en attente (et planifient le suivant) au lieu
+# d'être marquées enregistrées. L'échéance est la première de: dernière
+# modification + délai de pause, première modification non enregistrée + délai
+# maximal. Un seul enregistrement à la fois: c'est l'appelant qui sérialise
+# (la GUI attend la fin de l'opération en cours).
+# Statistiques: tous les enregistrements terminés (automatiques ou non).
+_FENETRE_S = 60.0
+
+
+class SauvegardeAuto:
+    def __init__(
+        self,
+        delai_ms: int = AUTOSAVE_DELAI_MS,
+        delai_max_ms: int = AUTOSAVE_DELAI_MAX_MS,
+        *,
+        horloge: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.delai_s = delai_ms / 1000
+        self.delai_max_s = max(delai_max_ms, delai_ms) / 1000
+        self._horloge = horloge
+        self.modifications = 0
+        self.enregistrees = 0
+        # Modifications non encore capturées par un enregistrement.
+        self._premiere: float | None = None
+        self._derniere: float | None = None
+        # Enregistrements terminés: (date, octets écrits) sur la dernière minute, et totaux.
+        self._recents: deque[tuple[float, int]] = deque()
+        self.total_enregistrements = 0
+        self.total_octets = 0
+
+    @property
+    def actif(self) -> bool:
+        return self.delai_s > 0
+
+    @property
+    def propre(self) -> bool:
+        """Vrai si toutes les modifications sont enregistrées."""
+
+        return self.modifications == self.enregistrees
+
+    def modifier(self) -> None:
+        maintenant = self._horloge()
+        self.modifications += 1
+        if self._premiere is None:
+            self._premiere = maintenant
+        self._derniere = maintenant
+
+    def reinitialiser(self) -> None:
+        """Coffre ouvert ou remplacé: plus rien en attente (les statistiques sont gardées)."""
+
+        self.enregistrees = self.modifications
+        self._premiere = self._derniere = None
+
+    def attente(self) -> float | None:
+        """Secondes avant l'enregistrement automatique, None si rien n'est à planifier."""
+
+        if not self.actif or self._premiere is None or self._derniere is None:
+            return None
+        echeance = min(self._derniere + self.delai_s, self._premiere + self.delai_max_s)
+        return max(0.0, echeance - self._horloge())
+
+    def commencer(self) -> int:
+        """Capture les modifications en attente; renvoie le compteur à passer à `terminer`."""
+
+        self._premiere = self._derniere = None
+        return self.modifications
+
+    def terminer(self, modifications: int, octets: int | None) -> bool:
+        """Fin de l'enregistrement commencé à `modifications` (`octets` None: échec).
+
+        Renvoie `propre`. Après un échec (ou une annulation, sans appel), les
+        modifications capturées restent non enregistrées mais ne sont
+        replanifiées qu'à la modification suivante.
+        """
+
+        if octets is not None:
+            self.enregistrees = max(self.enregistrees, modifications)
+            self._recents.append((self._horloge(), octets))
+            self.total_enregistrements += 1
+            self.total_octets += octets
+        return self.propre
+
+    def par_minute(self) -> tuple[int, int]:
+        """Enregistrements et octets écrits sur la dernière minute."""
+
+        limite = self._horloge() - _FENETRE_S
+        while self._recents and self._recents[0][0] <= limite:
+            self._recents.popleft()
+        return len(self._recents), sum(n for _, n in self._recents)
@@ -3,6 +3,7 @@ from __future__ import annotations
 import os
 import subprocess
 from pathlib import Path
+from typing import BinaryIO
 
 from .config import FICHIER, FICHIER_CLAIR, LEGACY_APPDATA_FICHIER, LEGACY_FICHIER
 
@@ -159,6 +160,15 @@ def lire_chiffre(path: str | Path = FICHIER) -> bytes:
     return p.read_bytes()
 
 
+def ouvrir_chiffre(path: str | Path = FICHIER) -> BinaryIO:
+    """Comme `lire_chiffre`, mais renvoie le fichier ouvert (lecture par morceaux)."""
+
+    p = Path(path)
+    if str(p) == FICHIER:
+        _maybe_migrate_legacy(p)
+    return open(p, "rb")
+
+
 def ecrire_chiffre(data: bytes, path: str | Path = FICHIER) -> None:
     p = Path(path)
     _ensure_parent(p)
@@ -185,6 +195,25 @@ def ecrire_chiffre(data: bytes, path: str | Path = FICHIER) -> None:
     _harden_acl_on_windows(p)
 
 
+def ajouter_chiffre(data: bytes, path: str | Path, *, offset: int) -> None:
+    """Ajoute `data` à `path` à partir de `offset` (la fin valide connue), puis fsync.
+
+    Tout ce qui suit `offset` (écriture interrompue) est tronqué d'abord.
+    Contrairement à `ecrire_chiffre`, le fichier n'est pas réécrit: le coût
+    ne dépend que de la taille de `data`.
+    """
+
+    p = Path(path)
+    _ensure_parent(p)
+    with open(p, "r+b" if p.exists() else "wb") as f:
+        f.truncate(offset)
+        f.seek(offset)
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    _hide_on_windows(p)
+
+
 def lire_clair(path: str | Path = FICHIER_CLAIR) -> bytes:
     p = Path(path)
     return p.read_bytes()
@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import csv
+import io
+import itertools
+import json
+import re
+import uuid
+from pathlib import Path
+from typing import Any, Iterable, Iterator, TextIO
+
+from .vault import VAULT_MAGIC, VAULT_VERSION, VaultEntry, _now_iso, fold
+
+# Import/export en masse (migration depuis un autre gestionnaire, export en clair).
+#
+# Les lecteurs sont des générateurs d'entrées: le fichier est lu par morceaux,
+# jamais entier en mémoire, et les entrées vont directement dans le coffre
+# (`Vault.extend`). Colonnes/clés reconnues: celles de nos exports, et les
+# noms usuels des exports CSV/JSON d'autres gestionnaires (Bitwarden, KeePass,
+# 1Password, LastPass, navigateurs). Le coffre n'a pas de champ URL: l'URL est
+# ajoutée en tête des notes, et sert de titre à défaut.
+# Les écrivains produisent une entrée à la fois (secrets déchiffrés un par un):
+# la mémoire ne dépend pas de la taille de l'export.
+
+_CHUNK = 64 * 1024  # caractères lus par morceau (JSON) / échantillon du séparateur (CSV)
+_BLANCS = re.compile(r"[ \t\n\r]*")
+
+_ALIAS = {
+    "id": ("id",),
+    "title": ("title", "name", "titre", "nom", "account"),
+    "username": ("username", "login_username", "login name", "login", "user", "identifiant", "email", "e-mail"),
+    "password": ("password", "login_password", "mot de passe", "mdp"),
+    "notes": ("notes", "note", "extra", "comments", "commentaire", "commentaires"),
+    "url": ("url", "login_uri", "uri", "web site", "website", "site"),
+    "updated_at": ("updated_at",),
+}
+# Nom de colonne/clé (sans accents ni casse) -> champ.
+_CHAMPS = {alias: champ for champ, noms in _ALIAS.items() for alias in noms}
+
+# Colonnes de l'export CSV (relu tel quel par `lire_csv`: ids et dates conservés).
+COLONNES = ("id", "title", "username", "password", "notes", "updated_at")
+# Entrée de l'export JSON, mise en forme comme `json.dumps(..., indent=2)` au niveau de la liste.
+_GABARIT_JSON = "    {\n" + ",\n".join(f'      "{c}": %s' for c in COLONNES) + "\n    }"
+_chaine_json = json.JSONEncoder(ensure_ascii=False).encode
+
+
+def _champ(cle: object) -> str | None:
+    return _CHAMPS.get(fold(str(cle)).strip())
+
+
+def _entree(champs: dict[str, str], maintenant: str) -> VaultEntry | None:
+    """Entrée correspondant à une ligne CSV/un objet JSON (None si aucun champ utile).
+
+    Sans id ni date dans la source: nouvel id, et `maintenant` (date de l'import).
+    """
+
+    url = champs.get("url", "").strip()
+    title = champs.get("title", "").strip() or url
+    username = champs.get("username", "")
+    password = champs.get("password", "")
+    notes = champs.get("notes", "")
+    if url:
+        notes = f"URL: {url}\n{notes}" if notes else f"URL: {url}"
+    if not (title or username or password or notes):
+        return None
+    return VaultEntry(
+        champs.get("id") or str(uuid.uuid4()), title, username, password, notes, champs.get("updated_at") or maintenant
+    )
+
+
+def _aplatir(item: dict[str, Any]) -> dict[str, Any]:
+    # Bitwarden: identifiant, mot de passe et URI dans un sous-objet "login".
+    login = item.get("login")
+    if not isinstance(login, dict):
+        return item
+    item = {**login, **{k: v for k, v in item.items() if k != "login"}}
+    uris = login.get("uris")
+    if isinstance(uris, list) and uris and isinstance(uris[0], dict):
+        item.setdefault("url", uris[0].get("uri"))
+    return item
+
+
+def lire_csv(flux: TextIO) -> Iterator[VaultEntry]:
+    """Entrées d'un CSV avec ligne d'en-tête (séparateur `,`, `;` ou tabulation, détecté).
+
+    `flux` est ouvert en texte avec `newline=""` (champs sur plusieurs lignes).
+    Une erreur de format lève `ValueError` avec le numéro de ligne.
+    """
+
+    # Échantillon complété jusqu'à la fin de sa dernière ligne, puis le reste du fichier.
+    debut = flux.read(_CHUNK)
+    debut += flux.readline()
+    try:
+        # Seul le séparateur est détecté: le reste du dialecte (guillemets doublés...) reste celui d'Excel.
+        separateur = csv.Sniffer().sniff(debut, delimiters=",;\t").delimiter
+    except csv.Error:
+        separateur = ","
+    reader = csv.reader(itertools.chain(io.StringIO(debut, newline=""), flux), delimiter=separateur)
+    maintenant = _now_iso()
+    try:
+        # Colonnes résolues une fois, d'après l'en-tête (première colonne de chaque champ).
+        colonnes: dict[str, int] = {}
+        for i, nom in enumerate(next(reader, ())):
+            champ = _champ(nom)
+            if champ is not None:
+                colonnes.setdefault(champ, i)
+        for ligne in reader:
+            n = len(ligne)
+            entry = _entree({champ: ligne[i] for champ, i in colonnes.items() if i < n}, maintenant)
+            if entry is not None:
+                yield entry
+    except csv.Error as exc:
+        raise ValueError(f"CSV invalide (ligne {reader.line_num}): {exc}") from exc
+
+
+class _LecteurJson:
+    """Décodage incrémental de valeurs JSON successives dans un flux texte."""
+
+    def __init__(self, flux: TextIO) -> None:
+        self._flux = flux
+        self._buf = ""
+        self._pos = 0
+        self._fin = False
+        self._decoder = json.JSONDecoder()
+
+    def _lire(self) -> bool:
+        if self._fin:
+            return False
+        chunk = self._flux.read(_CHUNK)
+        if not chunk:
+            self._fin = True
+            return False
+        self._buf = self._buf[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+    def regarder(self) -> str:
+        """Prochain caractère hors blancs (non consommé), "" en fin de flux."""
+
+        while True:
+            pos = _BLANCS.match(self._buf, self._pos).end()
+            if pos < len(self._buf):
+                self._pos = pos
+                return self._buf[pos]
+            self._buf, self._pos = "", 0
+            if not self._lire():
+                return ""
+
+    def caractere(self) -> str:
+        """Comme `regarder`, mais le caractère est consommé."""
+
+        c = self.regarder()
+        self._pos += len(c)
+        return c
+
+    def valeur(self) -> Any:
+        """Prochaine valeur JSON complète (lit autant de morceaux que nécessaire)."""
+
+        self.regarder()
+        while True:
+            try:
+                obj, fin = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if self._lire():
+                    continue
+                raise
+            # Un nombre en fin de tampon peut continuer dans le morceau suivant.
+            if fin == len(self._buf) and self._lire():
+                continue
+            self._pos = fin
+            return obj
+
+
+def lire_json(flux: TextIO) -> Iterator[VaultEntry]:
+    """Entrées d'un JSON: liste d'objets, ou objet avec une liste "entries" (nos exports) ou "items" (Bitwarden).
+
+    Les objets de la liste sont décodés un par un. Un JSON invalide lève `ValueError`.
+    """
+
+    lecteur = _LecteurJson(flux)
+    c = lecteur.caractere()
+    if c == "{":
+        # Parcours des clés de l'objet jusqu'à la liste des entrées (les autres valeurs sont ignorées).
+        while True:
+            if lecteur.regarder() == "}":
+                return
+            cle = lecteur.valeur()
+            if not isinstance(cle, str) or lecteur.caractere() != ":":
+                raise ValueError("JSON invalide: clé attendue")
+            if cle in ("entries", "items"):
+                if lecteur.caractere() != "[":
+                    raise ValueError(f"JSON invalide: liste attendue pour {cle!r}")
+                break
+            lecteur.valeur()
+            if lecteur.regarder() == ",":
+                lecteur.caractere()
+    elif c != "[":
+        raise ValueError("JSON invalide: liste ou objet attendu")
+
+    maintenant = _now_iso()
+    champs_cles: dict[str, str | None] = {}  # clé -> champ, résolu une fois par clé distincte
+    while lecteur.regarder() != "]":
+        item = lecteur.valeur()
+        if isinstance(item, dict):
+            champs: dict[str, str] = {}
+            for cle, valeur in _aplatir(item).items():
+                champ = champs_cles.get(cle, "")
+                if champ == "":
+                    champ = champs_cles[cle] = _champ(cle)
+                if champ is None or champ in champs or valeur is None or isinstance(valeur, (dict, list)):
+                    continue
+                champs[champ] = str(valeur)
+            entry = _entree(champs, maintenant)
+            if entry is not None:
+                yield entry
+        c = lecteur.caractere()
+        if c == "]":
+            return
+        if c != ",":
+            raise ValueError("JSON invalide: ',' ou ']' attendu")
+
+
+def _ligne(e: VaultEntry) -> tuple[str, ...]:
+    password, notes = e.secrets()
+    return (e.id, e.title, e.username, password, notes, e.updated_at)
+
+
+def ecrire_csv(entries: Iterable[VaultEntry], flux: TextIO) -> int:
+    """Écrit `entries` en CSV (colonnes `COLONNES`), ligne par ligne. Renvoie le nombre d'entrées."""
+
+    writer = csv.writer(flux)
+    writer.writerow(COLONNES)
+    n = 0
+    for e in entries:
+        writer.writerow(_ligne(e))
+        n += 1
+    return n
+
+
+def ecrire_json(entries: Iterable[VaultEntry], flux: TextIO) -> int:
+    """Écrit `entries` au format JSON du coffre (`MDP_VAULT`), entrée par entrée.
+
+    Même texte que `dump_vault_to_bytes(vault, binary=False)`, sans construire
+    le document entier. Renvoie le nombre d'entrées.
+    """
+
+    entete = {"magic": VAULT_MAGIC, "version": VAULT_VERSION, "updated_at": _now_iso()}
+    flux.write(json.dumps(entete, ensure_ascii=False, indent=2)[:-2] + ',\n  "entries": [')
+    n = 0
+    for e in entries:
+        flux.write(",\n" if n else "\n")
+        flux.write(_GABARIT_JSON % tuple(map(_chaine_json, _ligne(e))))
+        n += 1
+    flux.write("\n  ]\n}\n" if n else "]\n}\n")
+    return n
+
+
+# Format -> (lecteur, écrivain).
+FORMATS = {
+    "csv": (lire_csv, ecrire_csv),
+    "json": (lire_json, ecrire_json),
+}
+
+
+def format_fichier(path: str | Path, format: str | None = None) -> str:
+    """Format d'import/export: `format` s'il est donné, sinon d'après l'extension (CSV par défaut)."""
+
+    fmt = format or ("json" if Path(path).suffix.lower() == ".json" else "csv")
+    if fmt not in FORMATS:
+        raise ValueError(f"Format non supporté: {fmt} (attendu: {', '.join(FORMATS)})")
+    return fmt
@@ -1,27 +1,203 @@
 from __future__ import annotations
 
+import bisect
+import hashlib
+import heapq
 import json
+import operator
+import os
+import re
+import struct
+import sys
+import time
+import unicodedata
 import uuid
-from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Any
+from itertools import accumulate, compress, islice, pairwise, repeat
+from typing import Any, Iterable, Iterator
+
+from .config import SEARCH_TOP_K
+from .crypto import CleSecrets
 
 VAULT_MAGIC = "MDP_VAULT"
 VAULT_VERSION = 1
 
+# Format binaire du contenu (voir `_dump_binary`): en-tête, table de chaînes
+# (longueurs puis texte UTF-8 d'un bloc), puis un enregistrement fixe par entrée.
+# Version 2: l'en-tête ajoute la clé des secrets et la taille d'une zone de jetons
+# (après le texte); mot de passe + notes de chaque entrée y sont scellés ensemble,
+# et les champs mdp/notes de l'enregistrement donnent (position, longueur) du jeton.
+# Version 3: l'en-tête ajoute l'identité du coffre (`Vault.identite`).
+# Version 4: l'en-tête ajoute la clé de l'historique (`Vault.cle_historique`).
+VAULT_BINARY_MAGIC = b"MDPV"
+VAULT_BINARY_VERSION = 4
+_BIN_HEADER = struct.Struct(">4sBqIII")  # magic, version, updated_at, nb chaînes, nb entrées, taille du texte
+_BIN_HEADER_V2 = struct.Struct(">4sBqIIII32s")  # ... + taille de la zone de jetons, clé des secrets
+_BIN_HEADER_V3 = struct.Struct(">4sBqIIII32s32s")  # ... + identité du coffre
+_BIN_HEADER_V4 = struct.Struct(">4sBqIIII32s32s32s")  # ... + clé de l'historique
+IDENTITE_SIZE = 32
+CLE_HISTORIQUE_SIZE = 32
+_BIN_RECORD = struct.Struct(">B16sIIIIq")  # flags, id, titre, identifiant, mdp, notes, updated_at
+_BIN_ID_IS_STR = 0x01  # id non-UUID: index dans la table (4 premiers octets du champ id)
+_BIN_TS_IS_STR = 0x02  # date non canonique: index dans la table au lieu d'un epoch
+
 
 def _now_iso() -> str:
     return datetime.now(timezone.utc).replace(microsecond=0).isoformat()
 
 
-@dataclass
+def _pack_id(value: str) -> bytes | str:
+    """UUID canonique (minuscules, tirets) -> 16 octets; tout autre identifiant est conservé tel quel."""
+
+    if len(value) != 36 or value[8] != "-" or value[13] != "-" or value[18] != "-" or value[23] != "-":
+        return value
+    try:
+        raw = bytes.fromhex(value.replace("-", ""))
+    except ValueError:
+        return value
+    # 16 octets <=> exactement 32 chiffres hexadécimaux (ni tiret ni espace ailleurs).
+    return raw if len(raw) == 16 and value == value.lower() else value
+
+
+def _format_id(raw: bytes) -> str:
+    h = raw.hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+def _pack_timestamp(value: str) -> int | str:
+    """Horodatage `YYYY-MM-DDTHH:MM:SS+00:00` (format de `_now_iso`) -> epoch entier.
+
+    Tout autre format est conservé tel quel, pour être réécrit à l'identique.
+    """
+
+    if (
+        len(value) != 25
+        or not value.endswith("+00:00")
+        or value[4] != "-"
+        or value[7] != "-"
+        or value[10] != "T"
+        or value[13] != ":"
+        or value[16] != ":"
+    ):
+        return value
+    try:
+        return int(datetime.fromisoformat(value).timestamp())
+    except ValueError:
+        return value
+
+
+def _format_timestamp(epoch: int) -> str:
+    return datetime.fromtimestamp(epoch, timezone.utc).isoformat()
+
+
 class VaultEntry:
-    id: str
-    title: str
-    username: str
-    password: str
-    notes: str
-    updated_at: str
+    """Entrée du coffre.
+
+    Représentation compacte (100k+ entrées en mémoire): `__slots__` au lieu d'un
+    `__dict__`, id UUID stocké sur 16 octets, date en epoch entier, noms
+    d'utilisateur internés (souvent répétés). Les attributs `id` et `updated_at`
+    restent des chaînes côté API.
+
+    Une entrée chargée d'un contenu binaire v2 est scellée: `_cle` est la
+    `CleSecrets` du contenu, `_password`/`_notes` la position et la longueur
+    du jeton. `password` et `notes` ne sont déchiffrés qu'à la lecture, et
+    jamais gardés en clair.
+    """
+
+    __slots__ = ("_id", "title", "_username", "_password", "_notes", "_cle", "_updated_at")
+
+    def __init__(self, id: str, title: str, username: str, password: str, notes: str, updated_at: str) -> None:
+        # Affectation directe des slots (chemin chaud de `load_vault_from_bytes`).
+        self._id = _pack_id(id)
+        self.title = title
+        self._username = sys.intern(username)
+        self._password = password
+        self._notes = notes
+        self._cle: CleSecrets | None = None
+        self._updated_at = _pack_timestamp(updated_at)
+
+    @property
+    def id(self) -> str:
+        raw = self._id
+        return _format_id(raw) if isinstance(raw, bytes) else raw
+
+    @id.setter
+    def id(self, value: str) -> None:
+        self._id = _pack_id(value)
+
+    @property
+    def username(self) -> str:
+        return self._username
+
+    @username.setter
+    def username(self, value: str) -> None:
+        self._username = sys.intern(value)
+
+    @property
+    def scellee(self) -> bool:
+        return self._cle is not None
+
+    def secrets(self) -> tuple[str, str]:
+        """(mot de passe, notes), avec un seul déchiffrement pour une entrée scellée."""
+
+        if self._cle is None:
+            return self._password, self._notes
+        return self._cle.ouvrir(self.id, self._password, self._notes)
+
+    def _desceller(self) -> None:
+        if self._cle is not None:
+            self._password, self._notes = self.secrets()
+            self._cle = None
+
+    def _jeton(self, cle: CleSecrets) -> bytes:
+        # Même clé: le jeton est recopié tel quel, sans déchiffrement.
+        if self._cle is not None and self._cle.cle == cle.cle:
+            return self._cle.jeton(self._password, self._notes)
+        return cle.sceller(self.id, *self.secrets())
+
+    @property
+    def password(self) -> str:
+        return self.secrets()[0] if self._cle is not None else self._password
+
+    @password.setter
+    def password(self, value: str) -> None:
+        self._desceller()
+        self._password = value
+
+    @property
+    def notes(self) -> str:
+        return self.secrets()[1] if self._cle is not None else self._notes
+
+    @notes.setter
+    def notes(self, value: str) -> None:
+        self._desceller()
+        self._notes = value
+
+    @property
+    def updated_at(self) -> str:
+        raw = self._updated_at
+        return _format_timestamp(raw) if isinstance(raw, int) else raw
+
+    @updated_at.setter
+    def updated_at(self, value: str) -> None:
+        self._updated_at = _pack_timestamp(value)
+
+    def _astuple(self) -> tuple:
+        return (self._id, self.title, self._username, self._updated_at)
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        # Secrets comparés (et déchiffrés) seulement si le reste est identique.
+        return self._astuple() == other._astuple() and self.secrets() == other.secrets()
+
+    __hash__ = None  # mutable, comme l'ancienne dataclass
+
+    def __repr__(self) -> str:
+        return (
+            f"VaultEntry(id={self.id!r}, title={self.title!r}, username={self.username!r}, "
+            f"password={self.password!r}, notes={self.notes!r}, updated_at={self.updated_at!r})"
+        )
 
     @staticmethod
     def new(*, title: str = "", username: str = "", password: str = "", notes: str = "") -> "VaultEntry":
@@ -35,9 +211,145 @@ class VaultEntry:
         )
 
 
-@dataclass
+# Vues triées de `Vault.sorted_ids`: clé de tri d'une entrée (l'id départage les égalités).
+_SORT_KEYS = {
+    "title": lambda e: e.title.casefold(),
+    "username": lambda e: e._username.casefold(),
+    "updated_at": lambda e: e.updated_at,
+}
+
+
 class Vault:
-    entries: list[VaultEntry]
+    """Entrées du coffre, indexées par id, dans l'ordre d'insertion.
+
+    Les mutations (`add`, `update`, `remove`) coûtent O(1), plus O(log n)
+    de recherche par vue triée déjà construite (insertion/suppression dans
+    une liste triée). Les entrées se remplacent, elles ne se modifient pas
+    sur place une fois dans le coffre: l'index et les vues triées ne
+    verraient pas le changement.
+    """
+
+    def __init__(
+        self,
+        entries: Iterable[VaultEntry] = (),
+        secrets: CleSecrets | None = None,
+        identite: bytes | None = None,
+        cle_historique: bytes | None = None,
+    ) -> None:
+        # Clé: id compact (`VaultEntry._id`), sans formater les UUID au chargement.
+        # Un dict garde l'ordre d'insertion, et un remplacement garde la position.
+        self._by_id: dict[bytes | str, VaultEntry] = {}
+        for e in entries:
+            if e._id in self._by_id:
+                # Id en double (contenu édité à la main): l'entrée est gardée sous un nouvel id
+                # (secrets déchiffrés d'abord: un jeton est lié à l'id de son entrée).
+                e._desceller()
+                e._id = _pack_id(str(uuid.uuid4()))
+            self._by_id[e._id] = e
+        # Conservée d'un enregistrement à l'autre: les jetons des entrées scellées sont recopiés, pas rechiffrés.
+        self.secrets = secrets if secrets is not None else CleSecrets.generer()
+        # Identité du coffre (publique: écrite dans le JSON de `payload_texte`), stable d'un
+        # enregistrement à l'autre: relie le fichier d'historique à son coffre.
+        self.identite = identite if identite is not None else os.urandom(IDENTITE_SIZE)
+        # Clé de l'historique des révisions (secrète: seulement dans le contenu binaire chiffré,
+        # jamais dans le JSON), stable elle aussi; voir `contenu_edite` pour l'édition CLI.
+        self.cle_historique = cle_historique if cle_historique is not None else os.urandom(CLE_HISTORIQUE_SIZE)
+        self._views: dict[str, list[tuple[str, str]]] = {}
+
+    @property
+    def entries(self) -> list[VaultEntry]:
+        """Copie ordonnée des entrées (la modifier ne modifie pas le coffre)."""
+
+        return list(self._by_id.values())
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[VaultEntry]:
+        return iter(self._by_id.values())
+
+    def __contains__(self, entry_id: object) -> bool:
+        return isinstance(entry_id, str) and _pack_id(entry_id) in self._by_id
+
+    def __eq__(self, other: object) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return self.entries == other.entries
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"Vault(entries={self.entries!r})"
+
+    def copy(self) -> Vault:
+        """Copie superficielle (mêmes entrées, mêmes clés et identité), sans les vues triées."""
+
+        clone = Vault(secrets=self.secrets, identite=self.identite, cle_historique=self.cle_historique)
+        clone._by_id = self._by_id.copy()
+        return clone
+
+    def get(self, entry_id: str) -> VaultEntry | None:
+        return self._by_id.get(_pack_id(entry_id))
+
+    def add(self, entry: VaultEntry) -> None:
+        """Ajoute `entry` en fin de coffre (une entrée de même id est remplacée sur place)."""
+
+        old = self._by_id.get(entry._id)
+        self._by_id[entry._id] = entry
+        self._reindex(old, entry)
+
+    def update(self, entry: VaultEntry) -> None:
+        """Remplace l'entrée de même id, à sa position (ajoutée en fin si absente)."""
+
+        self.add(entry)
+
+    def extend(self, entries: Iterable[VaultEntry]) -> int:
+        """Ajoute `entries` comme `add`, en un lot (import en masse). Renvoie le nombre d'entrées lues.
+
+        Les vues triées ne sont pas tenues à jour entrée par entrée: elles sont
+        reconstruites une fois, au prochain `sorted_ids`.
+        """
+
+        by_id = self._by_id
+        n = 0
+        try:
+            for e in entries:
+                by_id[e._id] = e
+                n += 1
+        finally:
+            self._views.clear()
+        return n
+
+    def remove(self, entry_id: str) -> VaultEntry | None:
+        old = self._by_id.pop(_pack_id(entry_id), None)
+        self._reindex(old, None)
+        return old
+
+    def sorted_ids(self, key: str, *, reverse: bool = False) -> list[str]:
+        """Ids triés par `key` ("title", "username" ou "updated_at"), sans tenir compte de la casse.
+
+        La vue est construite au premier appel, puis tenue à jour à chaque mutation.
+        """
+
+        view = self._views.get(key)
+        if view is None:
+            sort_key = _SORT_KEYS[key]
+            view = self._views[key] = sorted((sort_key(e), e.id) for e in self._by_id.values())
+        ids = [entry_id for _k, entry_id in view]
+        if reverse:
+            ids.reverse()
+        return ids
+
+    def _reindex(self, old: VaultEntry | None, new: VaultEntry | None) -> None:
+        for key, view in self._views.items():
+            sort_key = _SORT_KEYS[key]
+            if old is not None:
+                item = (sort_key(old), old.id)
+                i = bisect.bisect_left(view, item)
+                if i < len(view) and view[i] == item:
+                    del view[i]
+            if new is not None:
+                bisect.insort(view, (sort_key(new), new.id))
 
 
 def new_empty_vault() -> Vault:
@@ -47,10 +359,14 @@ def new_empty_vault() -> Vault:
 def load_vault_from_bytes(data: bytes) -> Vault:
     """Parse decrypted bytes.
 
+    - If binary vault format (`VAULT_BINARY_MAGIC`): load entries.
     - If JSON vault format: load entries.
     - If not JSON: treat as legacy text and import as a single entry in notes.
     """
 
+    if is_binary_payload(data):
+        return _load_binary(data)
+
     text = data.decode("utf-8", errors="replace").strip("\ufeff")
     if not text:
         return new_empty_vault()
@@ -69,9 +385,10 @@ def load_vault_from_bytes(data: bytes) -> Vault:
         legacy = VaultEntry.new(title="Import (ancien format)", notes=text)
         return Vault(entries=[legacy])
 
+    identite = _identite_json(obj.get("identity"))
     entries_raw = obj.get("entries", [])
     if not isinstance(entries_raw, list):
-        return new_empty_vault()
+        return Vault(identite=identite)
 
     entries: list[VaultEntry] = []
     for item in entries_raw:
@@ -88,24 +405,558 @@ def load_vault_from_bytes(data: bytes) -> Vault:
             )
         )
 
-    return Vault(entries=entries)
+    return Vault(entries=entries, identite=identite)
+
+
+def _identite_json(value: object) -> bytes | None:
+    # Champ "identity" du JSON (hexadécimal); absent ou invalide: nouvelle identité.
+    if not isinstance(value, str) or len(value) != 2 * IDENTITE_SIZE:
+        return None
+    try:
+        return bytes.fromhex(value)
+    except ValueError:
+        return None
+
 
+def _identite_v2(raw_key: bytes) -> bytes:
+    # Contenu binaire v2 (sans identité): dérivée de la clé des secrets, stable jusqu'au prochain enregistrement.
+    return hashlib.blake2b(raw_key, digest_size=IDENTITE_SIZE, person=b"identite").digest()
 
-def dump_vault_to_bytes(vault: Vault) -> bytes:
+
+def _cle_historique_v3(raw_key: bytes) -> bytes:
+    # Contenu binaire v2/v3 (sans clé d'historique): dérivée de la clé des secrets, secrète comme elle.
+    return hashlib.blake2b(raw_key, digest_size=CLE_HISTORIQUE_SIZE, person=b"historique").digest()
+
+
+def dump_vault_to_bytes(vault: Vault, *, binary: bool = True, identite: bool = False) -> bytes:
+    """Sérialise le coffre: format binaire compact par défaut, JSON lisible si `binary=False`.
+
+    Le JSON ne contient l'identité du coffre que si `identite` (contenu du
+    coffre édité puis rechiffré, voir `payload_texte`; pas un export), et
+    jamais la clé de l'historique.
+    """
+
+    if binary:
+        return _dump_binary(vault)
     obj: dict[str, Any] = {
         "magic": VAULT_MAGIC,
         "version": VAULT_VERSION,
         "updated_at": _now_iso(),
-        "entries": [
-            {
-                "id": e.id,
-                "title": e.title,
-                "username": e.username,
-                "password": e.password,
-                "notes": e.notes,
-                "updated_at": e.updated_at,
-            }
-            for e in vault.entries
-        ],
     }
+    if identite:
+        obj["identity"] = vault.identite.hex()
+    obj["entries"] = [
+        {
+            "id": e.id,
+            "title": e.title,
+            "username": e.username,
+            "password": e.password,
+            "notes": e.notes,
+            "updated_at": e.updated_at,
+        }
+        for e in vault.entries
+    ]
     return (json.dumps(obj, ensure_ascii=False, indent=2) + "\n").encode("utf-8")
+
+
+def is_binary_payload(data: bytes) -> bool:
+    return data[:4] == VAULT_BINARY_MAGIC
+
+
+def payload_texte(data: bytes) -> bytes:
+    """Contenu déchiffré sous forme éditable/affichable: le format binaire est converti en JSON.
+
+    Le JSON garde l'identité du coffre (pas la clé de l'historique): voir `contenu_edite`.
+    """
+
+    if not is_binary_payload(data):
+        return data
+    return dump_vault_to_bytes(load_vault_from_bytes(data), binary=False, identite=True)
+
+
+def contenu_edite(texte: bytes, origine: bytes | None) -> bytes:
+    """Contenu à rechiffrer après édition du JSON de `payload_texte` (`origine`: contenu avant édition).
+
+    Si le texte est le même coffre qu'`origine` (même identité), il est
+    réécrit en binaire avec la clé de l'historique d'`origine`: l'historique
+    reste lisible sans que sa clé soit jamais passée par le fichier en clair.
+    Sinon (nouveau coffre, autre contenu), le texte est rechiffré tel quel.
+    """
+
+    if origine is None or is_binary_payload(texte):
+        return texte
+    vault = load_vault_from_bytes(texte)
+    avant = load_vault_from_bytes(origine)
+    if vault.identite != avant.identite:
+        return texte
+    vault.cle_historique = avant.cle_historique
+    return dump_vault_to_bytes(vault)
+
+
+def _dump_binary(vault: Vault) -> bytes:
+    # Table de chaînes dédupliquée (noms d'utilisateur...): index = ordre d'insertion.
+    table: dict[str, int] = {}
+    cle = vault.secrets
+    pack = _BIN_RECORD.pack
+    records = []
+    jetons = []
+    position = 0
+    for e in vault.entries:
+        flags = 0
+        raw_id = e._id
+        if not isinstance(raw_id, bytes):
+            flags |= _BIN_ID_IS_STR
+            raw_id = table.setdefault(raw_id, len(table)).to_bytes(4, "big")
+        ts = e._updated_at
+        if not isinstance(ts, int):
+            flags |= _BIN_TS_IS_STR
+            ts = table.setdefault(ts, len(table))
+        jeton = e._jeton(cle)
+        jetons.append(jeton)
+        records.append(
+            pack(
+                flags,
+                raw_id,
+                table.setdefault(e.title, len(table)),
+                table.setdefault(e._username, len(table)),
+                position,
+                len(jeton),
+                ts,
+            )
+        )
+        position += len(jeton)
+
+    # Longueurs en caractères: le bloc est décodé en une fois au chargement, puis découpé.
+    text = "".join(table).encode("utf-8", "surrogatepass")
+    header = _BIN_HEADER_V4.pack(
+        VAULT_BINARY_MAGIC,
+        VAULT_BINARY_VERSION,
+        int(time.time()),
+        len(table),
+        len(records),
+        len(text),
+        position,
+        cle.cle,
+        vault.identite,
+        vault.cle_historique,
+    )
+    lengths = struct.pack(f">{len(table)}I", *map(len, table))
+    return b"".join([header, lengths, text, *jetons, *records])
+
+
+_BIN_HEADERS = {1: _BIN_HEADER, 2: _BIN_HEADER_V2, 3: _BIN_HEADER_V3, VAULT_BINARY_VERSION: _BIN_HEADER_V4}
+
+# nb chaînes, nb entrées, taille du texte, taille de la zone, clé des secrets, identité,
+# clé de l'historique, taille de l'en-tête.
+_EnteteBinaire = tuple[int, int, int, int, bytes | None, bytes | None, bytes | None, int]
+
+
+def _binary_header(data: bytes) -> _EnteteBinaire:
+    """Champs de l'en-tête binaire, toutes versions (voir `_EnteteBinaire`)."""
+
+    header = _BIN_HEADERS.get(data[4])
+    if header is None:
+        raise ValueError(f"Version de contenu binaire non supportée: {data[4]}")
+    if header is _BIN_HEADER:
+        _magic, _version, _updated_at, n_strings, n_entries, text_size = header.unpack_from(data)
+        return n_strings, n_entries, text_size, 0, None, None, None, header.size
+    if header is _BIN_HEADER_V2:
+        _magic, _version, _updated_at, n_strings, n_entries, text_size, zone_size, raw_key = header.unpack_from(data)
+        identite = _identite_v2(raw_key)
+        return n_strings, n_entries, text_size, zone_size, raw_key, identite, _cle_historique_v3(raw_key), header.size
+    if header is _BIN_HEADER_V3:
+        _magic, _version, _updated_at, n_strings, n_entries, text_size, zone_size, raw_key, identite = (
+            header.unpack_from(data)
+        )
+        return n_strings, n_entries, text_size, zone_size, raw_key, identite, _cle_historique_v3(raw_key), header.size
+    _magic, _version, _updated_at, n_strings, n_entries, text_size, zone_size, raw_key, identite, cle_historique = (
+        header.unpack_from(data)
+    )
+    return n_strings, n_entries, text_size, zone_size, raw_key, identite, cle_historique, header.size
+
+
+def _binary_strings(lengths: Iterable[int], text: bytes) -> list[str]:
+    # Longueurs en caractères: le bloc est décodé en une fois, puis découpé.
+    decoded = bytes(text).decode("utf-8", "surrogatepass")
+    bounds = list(accumulate(lengths, initial=0))
+    if bounds[-1] != len(decoded):
+        raise ValueError("taille incohérente")
+    return [decoded[a:b] for a, b in pairwise(bounds)]
+
+
+def _binary_entries(
+    records: Iterable[tuple], strings: list[str], cle: CleSecrets | None, out: list[VaultEntry]
+) -> None:
+    zone_size = len(cle.zone) if cle is not None else 0
+    new = VaultEntry.__new__
+    for flags, raw_id, title, username, password, notes, ts in records:
+        # Slots affectés directement: les valeurs sont déjà sous forme compacte.
+        e = new(VaultEntry)
+        e._id = strings[int.from_bytes(raw_id[:4], "big")] if flags & _BIN_ID_IS_STR else raw_id
+        e.title = strings[title]
+        e._username = strings[username]
+        if cle is None:
+            e._password = strings[password]
+            e._notes = strings[notes]
+        elif password + notes > zone_size:
+            raise ValueError("jeton hors zone")
+        else:
+            # Entrée scellée: (position, longueur) du jeton dans la zone.
+            e._password = password
+            e._notes = notes
+        e._cle = cle
+        e._updated_at = strings[ts] if flags & _BIN_TS_IS_STR else ts
+        out.append(e)
+
+
+def _binary_vault(entries: list[VaultEntry], cle: CleSecrets | None) -> Vault:
+    return Vault(entries=entries, secrets=cle)
+
+
+def _load_binary(data: bytes) -> Vault:
+    entries: list[VaultEntry] = []
+    try:
+        n_strings, n_entries, text_size, zone_size, raw_key, identite, cle_historique, offset = _binary_header(data)
+        lengths = struct.unpack_from(f">{n_strings}I", data, offset)
+        offset += 4 * n_strings
+        strings = _binary_strings(lengths, data[offset : offset + text_size])
+        offset += text_size
+        cle = None
+        if raw_key is not None:
+            # Une seule copie de la zone de jetons, partagée par toutes les entrées (rien n'est déchiffré ici).
+            cle = CleSecrets(raw_key, bytes(data[offset : offset + zone_size]))
+            offset += zone_size
+        if len(data) != offset + n_entries * _BIN_RECORD.size:
+            raise ValueError("taille incohérente")
+        _binary_entries(_BIN_RECORD.iter_unpack(memoryview(data)[offset:]), strings, cle, entries)
+    except (struct.error, IndexError, ValueError) as exc:
+        raise ValueError(f"Contenu du coffre binaire invalide ({exc})") from exc
+    return Vault(entries=entries, secrets=cle, identite=identite, cle_historique=cle_historique)
+
+
+_READER_RECORDS = 4096  # enregistrements décodés par lot en lecture incrémentale
+
+
+class VaultReader:
+    """Parsing incrémental du contenu déchiffré: `feed` morceau par morceau, puis `close`.
+
+    Même résultat que `load_vault_from_bytes` sur la concaténation des morceaux.
+    Pour le format binaire, les entrées sont construites au fil de l'eau: en
+    plus des entrées, seuls le texte de la table de chaînes, la zone de jetons
+    et un lot d'enregistrements sont tenus en mémoire, jamais tout le contenu.
+    Le JSON et l'ancien format texte (rares, migrés à l'enregistrement) sont
+    accumulés puis confiés à `load_vault_from_bytes`.
+    """
+
+    def __init__(self) -> None:
+        self._buf = bytearray()
+        self._texte: list[bytes] | None = None
+        self._parser = None
+        self._besoin = 0
+        self._entries: list[VaultEntry] = []
+        self._cle: CleSecrets | None = None
+        self._identite: bytes | None = None
+        self._cle_historique: bytes | None = None
+
+    def feed(self, chunk: bytes) -> None:
+        if self._texte is not None:
+            self._texte.append(bytes(chunk))
+            return
+        self._buf += chunk
+        if self._parser is None:
+            if len(self._buf) < len(VAULT_BINARY_MAGIC):
+                return
+            if not is_binary_payload(self._buf):
+                self._texte = [bytes(self._buf)]
+                self._buf = bytearray()
+                return
+            self._parser = self._parse_binary()
+            self._besoin = next(self._parser)
+        self._advance()
+
+    def close(self) -> Vault:
+        if self._texte is not None or self._parser is None:
+            return load_vault_from_bytes(b"".join(self._texte or [bytes(self._buf)]))
+        self._advance()
+        if self._besoin is not None or self._buf:
+            raise ValueError("Contenu du coffre binaire invalide (taille incohérente)")
+        return Vault(
+            entries=self._entries, secrets=self._cle, identite=self._identite, cle_historique=self._cle_historique
+        )
+
+    def _advance(self) -> None:
+        buf = self._buf
+        try:
+            while self._besoin is not None and len(buf) >= self._besoin:
+                n = self._besoin
+                data = bytes(buf[:n])
+                del buf[:n]
+                try:
+                    self._besoin = self._parser.send(data)
+                except StopIteration:
+                    self._besoin = None
+        except (struct.error, IndexError, ValueError) as exc:
+            self._besoin = None
+            raise ValueError(f"Contenu du coffre binaire invalide ({exc})") from exc
+        if self._besoin is None and buf:
+            raise ValueError("Contenu du coffre binaire invalide (taille incohérente)")
+
+    def _parse_binary(self):
+        # Générateur: chaque `yield` annonce le nombre d'octets attendus et reçoit exactement ces octets.
+        debut = yield 5
+        header = _BIN_HEADERS.get(debut[4])
+        if header is None:
+            raise ValueError(f"Version de contenu binaire non supportée: {debut[4]}")
+        n_strings, n_entries, text_size, zone_size, raw_key, self._identite, self._cle_historique, _size = (
+            _binary_header(debut + (yield header.size - 5))
+        )
+        lengths = struct.unpack(f">{n_strings}I", (yield 4 * n_strings))
+        strings = _binary_strings(lengths, (yield text_size))
+        del lengths
+        if raw_key is not None:
+            self._cle = CleSecrets(raw_key, (yield zone_size))
+        while n_entries:
+            lot = min(n_entries, _READER_RECORDS)
+            _binary_entries(_BIN_RECORD.iter_unpack((yield lot * _BIN_RECORD.size)), strings, self._cle, self._entries)
+            n_entries -= lot
+
+
+# Marques diacritiques combinantes (bloc U+0300-U+036F): retirées après décomposition NFKD.
+_DIACRITIQUES = re.compile("[\u0300-\u036f]+")
+
+
+def fold(text: str) -> str:
+    """Clé de recherche: sans accents, sans casse ("Société" -> "societe"), retours à la ligne en blancs."""
+
+    if text.isascii():
+        return text.lower().replace("\n", " ")
+    return _DIACRITIQUES.sub("", unicodedata.normalize("NFKD", text)).casefold().replace("\n", " ")
+
+
+def _search_text(e: VaultEntry) -> tuple[str, int]:
+    # Champs de l'index seulement: les notes sont des secrets (non déchiffrées pour la recherche).
+    # Une requête peut chevaucher les deux champs; la longueur du titre sert au classement.
+    title = fold(e.title)
+    return f"{title} {fold(e._username)}", len(title)
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+_FUZZY_MIN_CHARS = 3  # en dessous, presque tout est une sous-séquence: pas de recherche floue
+_FUZZY_MAX = 2000  # sous-séquences classées au plus par requête
+
+
+class SearchIndex:
+    """Index inversé pour la recherche du filtre (titre et identifiant, sans accents ni casse).
+
+    Deux niveaux, tenus à jour entrée par entrée (`add`/`update`/`remove`):
+    mot (séparé par des blancs) -> entrées, et trigramme -> mots du vocabulaire.
+    Les trigrammes ne portent que sur les mots distincts, pas sur tout le texte,
+    d'où un index compact même avec de grosses notes.
+
+    Un fragment de requête sans blanc est forcément contenu dans un seul mot du
+    texte: les candidats sont l'intersection, sur les fragments, des entrées
+    ayant un mot qui contient le fragment, puis la sous-chaîne complète est
+    vérifiée sur ces seuls candidats. Quand la requête prolonge la précédente
+    (frappe au clavier), on repart des résultats précédents.
+
+    Les résultats de `search` suivent l'ordre d'insertion: celui de
+    `Vault.entries` quand l'index reçoit les mêmes `add`/`update`/`remove` que
+    le coffre. `rank` classe les k meilleurs résultats, sous-séquences
+    comprises.
+
+    Les clés (`fold`) sont calculées une fois par entrée, à l'ajout ou à la
+    modification; seule la requête est normalisée à chaque frappe.
+    """
+
+    def __init__(self, entries: Iterable[VaultEntry] = ()) -> None:
+        self._docs: dict[str, int] = {}
+        self._ids: dict[int, str] = {}
+        self._texts: dict[int, str] = {}
+        self._title_len: dict[int, int] = {}
+        # Listes plutôt qu'ensembles: ~8 octets par occurrence, et `add` ajoute toujours en fin.
+        self._words: dict[str, list[int]] = {}
+        self._grams: dict[str, set[str]] = {}
+        self._next_doc = 0
+        self._last: tuple[str, list[int]] | None = None
+        # Textes concaténés (une ligne par entrée, débuts de ligne, docs) pour les sous-séquences.
+        self._corpus: tuple[str, list[int], list[int]] | None = None
+        for e in entries:
+            self.add(e)
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, entry: VaultEntry) -> None:
+        entry_id = entry.id
+        if entry_id in self._docs:
+            self.update(entry)
+            return
+        doc = self._next_doc
+        self._next_doc += 1
+        self._docs[entry_id] = doc
+        self._ids[doc] = entry_id
+        self._index(doc, *_search_text(entry))
+
+    def update(self, entry: VaultEntry) -> None:
+        """Réindexe une entrée modifiée; elle garde sa position dans les résultats."""
+
+        doc = self._docs.get(entry.id)
+        if doc is None:
+            self.add(entry)
+            return
+        self._unindex(doc)
+        self._index(doc, *_search_text(entry))
+
+    def remove(self, entry_id: str) -> None:
+        doc = self._docs.pop(entry_id, None)
+        if doc is None:
+            return
+        del self._ids[doc]
+        self._unindex(doc)
+        del self._texts[doc]
+        del self._title_len[doc]
+
+    def _index(self, doc: int, text: str, title_len: int) -> None:
+        # `_texts[doc]` est réécrit sur place par `update`: l'ordre du dict reste l'ordre des résultats.
+        self._texts[doc] = text
+        self._title_len[doc] = title_len
+        words = self._words
+        for word in set(text.split()):
+            posting = words.get(word)
+            if posting is None:
+                words[word] = [doc]
+                for gram in _trigrams(word):
+                    self._grams.setdefault(gram, set()).add(word)
+            else:
+                posting.append(doc)
+        self._last = self._corpus = None
+
+    def _unindex(self, doc: int) -> None:
+        words = self._words
+        for word in set(self._texts[doc].split()):
+            posting = words[word]
+            posting.remove(doc)
+            if not posting:
+                del words[word]
+                for gram in _trigrams(word):
+                    vocab = self._grams[gram]
+                    vocab.discard(word)
+                    if not vocab:
+                        del self._grams[gram]
+        self._last = self._corpus = None
+
+    def _docs_for_fragment(self, fragment: str) -> set[int] | None:
+        """Entrées ayant un mot qui contient `fragment` (3 caractères ou plus, sans blanc).
+
+        None si le fragment est trop peu sélectif: vérifier directement les
+        textes (déjà normalisés) coûte alors moins cher que l'union des listes.
+        """
+
+        vocab = sorted((self._grams.get(g, set()) for g in _trigrams(fragment)), key=len)
+        postings = [self._words[word] for word in vocab[0].intersection(*vocab[1:]) if fragment in word]
+        if sum(map(len, postings)) > len(self._texts) // 4:
+            return None
+        docs: set[int] = set()
+        for posting in postings:
+            docs.update(posting)
+        return docs
+
+    def search(self, query: str) -> list[str]:
+        """Ids des entrées contenant `query` (sans accents ni casse), dans l'ordre d'insertion."""
+
+        q = fold(query.strip())
+        if not q:
+            return list(self._docs)
+        return [self._ids[doc] for doc in self._matching(q)]
+
+    def _matching(self, q: str) -> list[int]:
+        texts = self._texts
+        candidates: Iterable[int] = texts
+        if self._last is not None and self._last[0] in q:
+            # Affinage: la requête contient la précédente, ses résultats sont un sur-ensemble.
+            candidates = self._last[1]
+        else:
+            found: set[int] | None = None
+            for fragment in sorted((f for f in q.split() if len(f) >= 3), key=len, reverse=True):
+                docs = self._docs_for_fragment(fragment)
+                if docs is not None:
+                    found = docs if found is None else found & docs
+            if found is not None:
+                candidates = sorted(found)
+
+        # Filtre en C (map/compress): pas de boucle Python par entrée.
+        candidates = list(candidates)
+        docs = list(compress(candidates, map(operator.contains, map(texts.__getitem__, candidates), repeat(q))))
+        self._last = (q, docs)
+        return docs
+
+    def rank(self, query: str, k: int = SEARCH_TOP_K, *, complete: bool = False) -> list[str]:
+        """Ids des `k` entrées les plus pertinentes pour `query`, de la meilleure à la moins bonne.
+
+        Les entrées contenant la requête passent en premier: occurrence dans le
+        titre avant l'identifiant, puis la plus à gauche (préfixe d'abord), puis
+        le texte le plus court. Viennent ensuite, s'il manque des résultats, les
+        sous-séquences ("sgen" trouve "Société Générale"): dans le titre seul
+        d'abord, puis les plus compactes. Un tas garde les k meilleurs sans
+        trier tous les candidats; à score égal, l'ordre d'insertion est conservé.
+
+        Avec `complete`, les autres entrées contenant la requête suivent les k
+        meilleures, dans l'ordre d'insertion: rien n'est écarté, le classement
+        ne fait qu'ordonner le début de la liste.
+        """
+
+        q = fold(query.strip())
+        if not q:
+            return list(self._docs) if complete else list(islice(self._docs, k))
+
+        # Clés (hors titre, position, longueur, doc) construites par map/zip, en C.
+        # Les docs sont numérotés dans l'ordre d'insertion: ils départagent les égalités.
+        docs = self._matching(q)
+        texts = list(map(self._texts.__getitem__, docs))
+        pos = list(map(str.find, texts, repeat(q)))
+        hors_titre = map(operator.gt, map(operator.add, pos, repeat(len(q))), map(self._title_len.__getitem__, docs))
+        top = [key[-1] for key in heapq.nsmallest(k, zip(hors_titre, pos, map(len, texts), docs, strict=True))]
+        if len(top) < k:
+            exact = set(top)
+            fuzzy = (key for key in self._subsequence(q) if key[-1] not in exact)
+            top += [key[-1] for key in heapq.nsmallest(k - len(top), fuzzy)]
+        elif complete and len(docs) > k:
+            best = set(top)
+            top += [doc for doc in docs if doc not in best]
+        return [self._ids[doc] for doc in top]
+
+    def _subsequence(self, q: str) -> Iterator[tuple[bool, int, int, int]]:
+        """Clés de tri (hors titre, étendue, longueur, doc) des entrées contenant `q` en sous-séquence.
+
+        Les caractères (hors blancs) sont cherchés dans l'ordre, chacun au plus
+        tôt, par une seule expression sur tous les textes (une ligne par entrée,
+        classes possessives: pas de retour arrière). Au plus `_FUZZY_MAX`
+        entrées, les premières dans l'ordre d'insertion: le coût reste borné
+        pour une requête qui correspond à presque tout.
+        """
+
+        chars = "".join(q.split())
+        if len(chars) < _FUZZY_MIN_CHARS:
+            return
+        if self._corpus is None:
+            texts = self._texts
+            starts = list(accumulate(map(operator.add, map(len, texts.values()), repeat(1)), initial=0))
+            self._corpus = ("\n".join(texts.values()), starts, list(texts))
+        corpus, starts, docs = self._corpus
+        pattern = re.escape(chars[0]) + "".join(f"[^\\n{re.escape(c)}]*+{re.escape(c)}" for c in chars[1:])
+        found = 0
+        last = -1
+        for m in re.finditer(pattern, corpus):
+            i = bisect.bisect_right(starts, m.start()) - 1
+            if i == last:  # plusieurs correspondances sur une même ligne
+                continue
+            if found == _FUZZY_MAX:
+                return
+            found += 1
+            last = i
+            doc = docs[i]
+            start, end = m.span()
+            yield (end - starts[i] > self._title_len[doc], end - start, starts[i + 1] - starts[i] - 1, doc)
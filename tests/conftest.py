@@ -3,6 +3,8 @@ from __future__ import annotations
 import sys
 from pathlib import Path
 
+import pytest
+
 
 def _ensure_repo_root_on_syspath() -> None:
     repo_root = Path(__file__).resolve().parents[1]
@@ -12,3 +14,33 @@ def _ensure_repo_root_on_syspath() -> None:
 
 
 _ensure_repo_root_on_syspath()
+
+
+@pytest.fixture
+def fast_argon2(monkeypatch, tmp_path):
+    """Paramètres Argon2id réduits pour les tests qui n'évaluent pas le coût du KDF."""
+
+    import mdp_app.crypto as crypto
+
+    monkeypatch.setattr(crypto, "FICHIER_KDF", str(tmp_path / "kdf.json"))
+    monkeypatch.setattr(crypto, "ARGON2_TIME_COST", 1)
+    monkeypatch.setattr(crypto, "ARGON2_MEMORY_COST_KIB", 8192)
+    monkeypatch.setattr(crypto, "ARGON2_PARALLELISM", 1)
+    return crypto
+
+
+@pytest.fixture
+def root():
+    """Fenêtre Tk cachée (test ignoré sans affichage)."""
+
+    tk = pytest.importorskip("tkinter")
+    try:
+        r = tk.Tk()
+    except tk.TclError:
+        pytest.skip("pas d'affichage disponible pour Tk")
+    r.withdraw()
+    yield r
+    try:
+        r.destroy()
+    except tk.TclError:
+        pass
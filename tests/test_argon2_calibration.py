@@ -0,0 +1,78 @@
+import os
+
+from mdp_app.config import ARGON2_MIN_MEMORY_COST_KIB, ARGON2_MIN_TIME_COST
+from mdp_app.crypto import (
+    Argon2Params,
+    calibrer_argon2,
+    chiffrer_bytes_v5,
+    dechiffrer_bytes,
+    decoder,
+    enregistrer_parametres_argon2,
+    lanes_argon2,
+    parametres_argon2,
+)
+
+
+def _fake_machine(ms_per_pass_per_gib: float):
+    def mesurer(params: Argon2Params) -> float:
+        return params.time_cost * ms_per_pass_per_gib * params.memory_cost_kib / (1024 * 1024)
+
+    return mesurer
+
+
+def test_calibration_keeps_max_memory_and_adds_passes_on_fast_machine():
+    params = calibrer_argon2(cible_ms=1000, memoire_max_kib=1024 * 1024, parallelism=1, mesurer=_fake_machine(100))
+    assert params == Argon2Params(time_cost=10, memory_cost_kib=1024 * 1024, parallelism=1)
+
+
+def test_calibration_reduces_memory_on_slow_machine():
+    params = calibrer_argon2(cible_ms=500, memoire_max_kib=1024 * 1024, parallelism=1, mesurer=_fake_machine(2000))
+    assert params.memory_cost_kib == 128 * 1024
+    assert params.time_cost == ARGON2_MIN_TIME_COST
+
+
+def test_calibration_never_goes_below_security_floor():
+    params = calibrer_argon2(cible_ms=1, memoire_max_kib=1024 * 1024, parallelism=1, mesurer=_fake_machine(10_000))
+    assert params == Argon2Params(ARGON2_MIN_TIME_COST, ARGON2_MIN_MEMORY_COST_KIB, 1)
+
+
+def test_persisted_params_are_written_in_new_v5_headers(fast_argon2, tmp_path):
+    tuned = Argon2Params(time_cost=2, memory_cost_kib=ARGON2_MIN_MEMORY_COST_KIB, parallelism=1)
+    enregistrer_parametres_argon2(tuned)
+    assert parametres_argon2() == tuned
+
+    blob = chiffrer_bytes_v5("pw", b"data", salt=os.urandom(16))
+    version, _salt, t, m, p, _token = decoder(blob)
+    assert (version, t, m, p) == ("v5", 2, ARGON2_MIN_MEMORY_COST_KIB, 1)
+    assert dechiffrer_bytes("pw", blob) == b"data"
+
+
+def test_weak_or_corrupt_params_file_falls_back_to_defaults(fast_argon2, tmp_path):
+    path = tmp_path / "kdf.json"
+    path.write_text('{"time_cost": 1, "memory_cost_kib": 8, "parallelism": 1}', encoding="utf-8")
+    assert parametres_argon2(path) == Argon2Params(1, 8192, 1)  # défauts (réduits par la fixture)
+    path.write_text("garbage", encoding="utf-8")
+    assert parametres_argon2(path) == Argon2Params(1, 8192, 1)
+
+
+def test_lanes_follow_configuration_or_cpu_count(monkeypatch):
+    import mdp_app.crypto as crypto
+
+    assert lanes_argon2(3) == 3
+    monkeypatch.setattr(crypto.os, "sched_getaffinity", lambda _pid: set(range(64)), raising=False)
+    assert lanes_argon2() == crypto.ARGON2_MAX_PARALLELISM
+    monkeypatch.setattr(crypto.os, "sched_getaffinity", lambda _pid: {0, 1}, raising=False)
+    assert lanes_argon2() == 2
+
+
+def test_multi_lane_blobs_and_old_single_lane_blobs_both_decode(fast_argon2, monkeypatch):
+    monkeypatch.setattr(fast_argon2, "ARGON2_PARALLELISM", 1)
+    single = chiffrer_bytes_v5("pw", b"one lane", salt=os.urandom(16))
+
+    monkeypatch.setattr(fast_argon2, "ARGON2_PARALLELISM", 4)
+    multi = chiffrer_bytes_v5("pw", b"four lanes", salt=os.urandom(16))
+
+    assert decoder(single)[4] == 1
+    assert decoder(multi)[4] == 4
+    assert dechiffrer_bytes("pw", single) == b"one lane"
+    assert dechiffrer_bytes("pw", multi) == b"four lanes"
@@ -0,0 +1,65 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from mdp_app.audit import NIVEAUX, auditer, score
+from mdp_app.vault import Vault, VaultEntry, dump_vault_to_bytes, load_vault_from_bytes
+
+MAINTENANT = datetime(2025, 6, 1, tzinfo=timezone.utc)
+
+
+@pytest.mark.parametrize(
+    "password, niveau",
+    [
+        ("", 0),
+        ("123456", 0),
+        ("Azerty2024!", 0),  # mot courant + chiffres/symboles finaux
+        ("aaaaaaaaaaaaaaaaaaaa", 0),  # répétitions: longueur utile plafonnée
+        ("x7kq2m", 1),
+        ("Tr0ub4dor&3", 3),
+        ("k9#Lm2!pQz7$Xw4&Vb8^", 4),
+        ("correct horse battery staple", 4),
+        ("mot-de-passe-très-long-éà", 4),  # caractères hors ASCII: classe "autre"
+    ],
+)
+def test_score_levels(password, niveau):
+    assert score(password) == niveau, NIVEAUX[score(password)]
+
+
+def _coffre() -> Vault:
+    def entry(title, password, updated_at="2025-05-01T00:00:00+00:00"):
+        e = VaultEntry.new(title=title, password=password)
+        e.updated_at = updated_at
+        return e
+
+    entries = [
+        entry("a", "k9#Lm2!pQz7$Xw4&Vb8^"),
+        entry("b", "123456"),
+        entry("c", "k9#Lm2!pQz7$Xw4&Vb8^", updated_at="2023-01-01T00:00:00+00:00"),
+        entry("d", "123456"),
+        entry("e", "", updated_at="2020-01-01T10:00:00"),  # note seule, date non canonique
+        entry("f", "k9#Lm2!pQz7$Xw4&Vb8^"),
+        entry("g", "Tr0ub4dor&3", updated_at="pas une date"),
+    ]
+    return Vault(entries=entries)
+
+
+def test_audit_groups_reuse_and_flags_weak_and_stale_entries():
+    vault = _coffre()
+    ids = {e.title: e.id for e in vault}
+    for v in (vault, load_vault_from_bytes(dump_vault_to_bytes(vault))):  # clair, puis secrets scellés
+        rapport = auditer(v, maintenant=MAINTENANT, jours=365)
+        assert rapport.reutilises == [[ids["a"], ids["c"], ids["f"]], [ids["b"], ids["d"]]]
+        assert rapport.faibles == [ids["b"], ids["d"]]
+        assert ids["e"] not in rapport.scores
+        assert rapport.anciens == [ids["c"], ids["e"]]
+        assert rapport.entrees == 7
+        assert rapport.problemes()[ids["d"]] == ["réutilisé (2 entrées)", "très faible"]
+
+
+def test_audit_mixes_sealed_and_plain_entries():
+    vault = load_vault_from_bytes(dump_vault_to_bytes(_coffre()))
+    vault.add(VaultEntry.new(title="non scellée", password="123456"))
+
+    rapport = auditer(vault, maintenant=MAINTENANT)
+    assert len(rapport.reutilises[1]) == 3 and rapport.entrees == 8
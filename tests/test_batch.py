@@ -0,0 +1,99 @@
+import io
+import os
+
+from cryptography.exceptions import InvalidTag
+from cryptography.fernet import InvalidToken
+
+import mdp_app.crypto as crypto
+from mdp_app.crypto import (
+    chiffrer_bytes_v4,
+    chiffrer_bytes_v5,
+    chiffrer_bytes_v7,
+    chiffrer_lot,
+    dechiffrer_lot,
+    encrypt_stream,
+    peek_header,
+)
+
+
+def _v6(mdp: str, contenu: bytes) -> bytes:
+    out = io.BytesIO()
+    encrypt_stream(mdp, io.BytesIO(contenu), out, chunk_size=1024)
+    return out.getvalue()
+
+
+def _blobs():
+    lot = chiffrer_lot("pw", {f"team{i}": f"team {i}".encode() for i in range(3)})
+    assert lot.derivations == 1 and not lot.erreurs
+    v7 = chiffrer_bytes_v7("pw", b"v7")
+    blobs = {nom: r.donnees for nom, r in lot.resultats.items()}
+    blobs.update(
+        {
+            "v4": chiffrer_bytes_v4("pw", b"v4", salt=os.urandom(16)),
+            "v5": chiffrer_bytes_v5("pw", b"v5", salt=os.urandom(16)),
+            "v6": _v6("pw", os.urandom(5000)),
+            "v7": v7,
+            "v7-copie": v7,
+        }
+    )
+    return blobs
+
+
+def test_chiffrer_lot_shares_salt_and_nonce_is_unique(fast_argon2):
+    lot = chiffrer_lot("pw", {"a": b"x", "b": b"x"})
+    a, b = lot.resultats["a"].donnees, lot.resultats["b"].donnees
+    assert peek_header(a) == peek_header(b)
+    assert a != b
+
+
+def test_dechiffrer_lot_derives_once_per_group(fast_argon2, monkeypatch):
+    blobs = _blobs()
+    calls = []
+    real = crypto.generer_cle_argon2id_raw
+
+    def spy(*args, **kwargs):
+        calls.append(kwargs.get("salt"))
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(crypto, "generer_cle_argon2id_raw", spy)
+    rapport = dechiffrer_lot("pw", blobs, workers=1)
+
+    assert not rapport.erreurs
+    assert list(rapport.resultats) == list(blobs)
+    assert rapport.resultats["team2"].donnees == b"team 2"
+    assert rapport.resultats["v7-copie"].donnees == b"v7"
+    assert len(rapport.resultats["v6"].donnees) == 5000
+    # 3 fichiers "team" + v4 + v5 + v6 + (v7, copie) -> 5 dérivations.
+    assert rapport.derivations == 5
+    assert len(calls) == 5
+    assert rapport.octets == sum(len(b) for b in blobs.values())
+    assert rapport.debit_mo_s > 0
+
+
+def test_dechiffrer_lot_reports_errors_per_file(fast_argon2):
+    blobs = _blobs()
+    corrupted = bytearray(blobs["team1"])
+    corrupted[-2] ^= 0x01
+    blobs["team1"] = bytes(corrupted)
+    blobs["autre-mdp"] = chiffrer_bytes_v7("autre", b"x")
+    blobs["vide"] = b""
+
+    rapport = dechiffrer_lot("pw", blobs, workers=1)
+
+    assert set(rapport.erreurs) == {"team1", "autre-mdp", "vide"}
+    assert isinstance(rapport.erreurs["team1"], InvalidTag)
+    assert isinstance(rapport.erreurs["autre-mdp"], InvalidTag)
+    assert isinstance(rapport.erreurs["vide"], InvalidToken)
+    assert rapport.resultats["team0"].ok and rapport.resultats["team0"].donnees == b"team 0"
+
+
+def test_dechiffrer_lot_process_pool_matches_sequential(fast_argon2):
+    blobs = _blobs()
+    blobs["mauvais"] = chiffrer_bytes_v5("autre", b"x", salt=os.urandom(16))
+
+    seq = dechiffrer_lot("pw", blobs, workers=1)
+    par = dechiffrer_lot("pw", blobs, workers=2)
+
+    assert {n: r.donnees for n, r in par.resultats.items()} == {n: r.donnees for n, r in seq.resultats.items()}
+    assert set(par.erreurs) == {"mauvais"}
+    assert type(par.erreurs["mauvais"]) is type(seq.erreurs["mauvais"])
@@ -0,0 +1,36 @@
+import copy
+import json
+
+import mdp_app.crypto as crypto
+from benchmarks import formats
+
+
+def test_format_suite_smoke(tmp_path):
+    out = tmp_path / "bench.json"
+    kdf_avant = crypto.FICHIER_KDF
+
+    assert formats.main(["--fast-kdf", "--sizes", "1", "--repeat", "1", "--json", str(out)]) == 0
+
+    report = json.loads(out.read_text(encoding="utf-8"))
+    assert report["meta"]["fast_kdf"] is True
+    assert [r["format"] for r in report["results"]] == list(formats.FORMATS)
+    for r in report["results"]:
+        assert r["size"] == 1024
+        assert r["open_ms"] > 0 and r["save_ms"] > 0 and r["kdf_ms"] > 0
+        assert r["open_peak_kib"] > 0
+    # Les paramètres réduits ne fuient pas hors du benchmark.
+    assert crypto.FICHIER_KDF == kdf_avant
+    assert crypto.ARGON2_TIME_COST != 1
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    baseline = {"meta": {}, "results": [{"format": "v5", "size": 1024, "open_ms": 10.0, "open_peak_kib": 100.0}]}
+    current = copy.deepcopy(baseline)
+    assert formats.compare(current, baseline) == []
+
+    current["results"][0]["open_ms"] = 12.0  # +20%: sous la tolérance
+    current["results"][0]["open_peak_kib"] = 150.0  # +50% mais sous l'écart absolu minimal
+    assert formats.compare(current, baseline, tolerance=0.25) == []
+
+    current["results"][0]["open_ms"] = 20.0
+    assert formats.compare(current, baseline, tolerance=0.25) == ["v5 1 KiB open_ms: 10.0 -> 20.0"]
@@ -0,0 +1,71 @@
+import os
+
+import pytest
+
+import mdp_app.crypto as crypto
+from mdp_app.crypto import (
+    SessionKey,
+    chiffrer_bytes_v5,
+    chiffrer_bytes_v7,
+    compresser,
+    dechiffrer_bytes,
+    decompresser,
+)
+from mdp_app.vault import Vault, VaultEntry, dump_vault_to_bytes
+
+CLAIR = b'{"title": "site.example", "username": "alice@example.com", "notes": ""}\n' * 200
+
+
+@pytest.mark.parametrize("algo", ["zlib", "lzma", "bz2"])
+@pytest.mark.parametrize("niveau", [1, 9])
+def test_compresser_roundtrip(algo, niveau):
+    data = compresser(CLAIR, algo, niveau)
+    assert len(data) < len(CLAIR) // 10
+    assert decompresser(data) == CLAIR
+
+
+def test_small_random_or_disabled_content_is_left_as_is():
+    alea = os.urandom(4096)
+    assert compresser(b"court") == b"court"
+    assert compresser(alea) == alea
+    assert compresser(CLAIR, "none") == CLAIR
+    assert decompresser(CLAIR) == CLAIR
+
+
+def test_invalid_settings_and_frames_raise():
+    with pytest.raises(ValueError):
+        compresser(CLAIR, "brotli")
+    with pytest.raises(ValueError):
+        compresser(CLAIR, "zlib", 12)
+
+    data = compresser(CLAIR, "zlib", 6)
+    with pytest.raises(ValueError):
+        decompresser(data[:-10])
+    # Taille annoncée plus petite que la sortie réelle: la décompression s'arrête.
+    entete = crypto._HEADER_COMPRESSION
+    menteur = entete.pack(crypto._MAGIC_COMPRESSION, 1, 6, 100) + data[entete.size :]
+    with pytest.raises(ValueError):
+        decompresser(menteur)
+
+
+def test_v5_v7_and_session_blobs_are_compressed(fast_argon2):
+    contenu = dump_vault_to_bytes(
+        Vault(entries=[VaultEntry.new(title=f"site-{i}", username="bob", password="pw") for i in range(500)]),
+        binary=False,
+    )
+    v5 = chiffrer_bytes_v5("pw", contenu, salt=os.urandom(16))
+    v7 = chiffrer_bytes_v7("pw", contenu)
+    session = SessionKey.deriver("pw")
+    for blob in (v5, v7, session.chiffrer(contenu)):
+        assert len(blob) < len(contenu)
+        assert dechiffrer_bytes("pw", blob) == contenu
+    assert session.dechiffrer(session.chiffrer(contenu)) == contenu
+
+
+def test_uncompressed_files_stay_readable(fast_argon2, monkeypatch):
+    monkeypatch.setattr(crypto, "COMPRESSION_ALGO", "none")
+    ancien = chiffrer_bytes_v5("pw", CLAIR, salt=os.urandom(16))
+    assert len(ancien) > 2 * len(CLAIR)
+
+    monkeypatch.setattr(crypto, "COMPRESSION_ALGO", "lzma")
+    assert dechiffrer_bytes("pw", ancien) == CLAIR
@@ -10,6 +10,7 @@ from mdp_app.crypto import (
     chiffrer_bytes_v5,
     dechiffrer_bytes,
     decoder,
+    peek_header,
 )
 
 
@@ -74,3 +75,32 @@ def test_v5_is_encoded_no_strings_style():
     sample = blob[: min(256, len(blob))]
     assert sample, "empty blob"
     assert all((b & 0xF0) == 0x80 for b in sample)
+
+
+def test_peek_header_matches_decoder_without_full_decode(fast_argon2, monkeypatch):
+    import mdp_app.crypto as crypto
+
+    blobs = [
+        chiffrer_bytes_v2("pw", b"x", salt=os.urandom(16)),
+        chiffrer_bytes_v3("pw", b"x", salt=os.urandom(16)),
+        chiffrer_bytes_v4("pw", b"x", salt=os.urandom(16)),
+        chiffrer_bytes_v5("pw", b"x" * 10_000, salt=os.urandom(16)),
+        crypto.chiffrer_bytes_v7("pw", b"x"),
+        b"gAAAAA-legacy-fernet-token",
+    ]
+    for blob in blobs:
+        assert peek_header(blob) == decoder(blob)[:5]
+
+    decoded_sizes = []
+    real = crypto._try_decode_no_strings
+
+    def spy(data):
+        decoded_sizes.append(len(data))
+        return real(data)
+
+    monkeypatch.setattr(crypto, "_try_decode_no_strings", spy)
+    blob = blobs[3]
+    assert peek_header(blob)[0] == "v5"
+    assert crypto.dechiffrer_bytes_session("pw", blob)[0] == b"x" * 10_000
+    # En-tête (64 octets) + un seul décodage complet du fichier.
+    assert sorted(decoded_sizes) == [64, 64, len(blob)]
@@ -0,0 +1,89 @@
+import os
+
+import pytest
+from cryptography.exceptions import InvalidTag
+
+import mdp_app.crypto as crypto
+from mdp_app.crypto import (
+    ajouter_slot_v7,
+    changer_mdp_v7,
+    chiffrer_bytes_v7,
+    dechiffrer_bytes,
+    dechiffrer_bytes_session,
+    decoder,
+    generer_cle_recuperation,
+    ouvrir_session_v7,
+    retirer_slot_v7,
+    slots_v7,
+)
+
+
+def _body(blob: bytes) -> bytes:
+    return blob[2 * (5 + 88 * len(slots_v7(blob))) :]
+
+
+def test_v7_roundtrip(fast_argon2):
+    blob = chiffrer_bytes_v7("pw", b"payload")
+    assert decoder(blob)[0] == "v7"
+    assert len(slots_v7(blob)) == 1
+    assert dechiffrer_bytes("pw", blob) == b"payload"
+    assert all((b & 0xF0) == 0x80 for b in blob[:256])
+    with pytest.raises(InvalidTag):
+        dechiffrer_bytes("wrong", blob)
+
+
+def test_password_change_rewrites_only_the_header(fast_argon2, monkeypatch):
+    blob = chiffrer_bytes_v7("old", os.urandom(50_000))
+    plaintext = dechiffrer_bytes("old", blob)
+
+    def no_body_crypto(*_a, **_kw):
+        raise AssertionError("le corps ne doit pas être rechiffré")
+
+    monkeypatch.setattr(crypto, "_chiffrer_corps_v7", no_body_crypto)
+    monkeypatch.setattr(crypto, "_dechiffrer_corps_v7", no_body_crypto)
+    rotated = changer_mdp_v7("old", "new", blob)
+    monkeypatch.undo()
+
+    assert _body(rotated) == _body(blob)
+    assert len(rotated) == len(blob)
+    assert dechiffrer_bytes("new", rotated) == plaintext
+    with pytest.raises(InvalidTag):
+        dechiffrer_bytes("old", rotated)
+
+
+def test_recovery_key_slot(fast_argon2):
+    blob = chiffrer_bytes_v7("pw", b"data")
+    recovery = generer_cle_recuperation()
+    with_recovery = ajouter_slot_v7("pw", recovery, blob)
+
+    assert len(slots_v7(with_recovery)) == 2
+    assert _body(with_recovery) == _body(blob)
+    assert dechiffrer_bytes("pw", with_recovery) == b"data"
+    assert dechiffrer_bytes(recovery, with_recovery) == b"data"
+
+    # La clé de récupération permet de remplacer un mot de passe oublié.
+    reset = changer_mdp_v7(recovery, "new pw", with_recovery)
+    assert dechiffrer_bytes("new pw", reset) == b"data"
+    assert dechiffrer_bytes("pw", reset) == b"data"  # slot 0 toujours là
+
+    only_recovery = retirer_slot_v7(recovery, with_recovery, 0)
+    with pytest.raises(InvalidTag):
+        dechiffrer_bytes("pw", only_recovery)
+    assert dechiffrer_bytes(recovery, only_recovery) == b"data"
+    with pytest.raises(ValueError):
+        retirer_slot_v7(recovery, only_recovery, 0)
+
+
+def test_session_saves_stay_v7_and_keep_slots(fast_argon2):
+    recovery = generer_cle_recuperation()
+    blob = ajouter_slot_v7("pw", recovery, chiffrer_bytes_v7("pw", b"v1"))
+
+    contenu, session = dechiffrer_bytes_session("pw", blob)
+    assert contenu == b"v1"
+    saved = session.chiffrer(b"v2")
+    assert decoder(saved)[0] == "v7"
+    assert dechiffrer_bytes(recovery, saved) == b"v2"
+    assert session.dechiffrer(saved) == b"v2"
+
+    header_only = ouvrir_session_v7(recovery, saved)
+    assert dechiffrer_bytes("pw", header_only.chiffrer(b"v3")) == b"v3"
@@ -0,0 +1,116 @@
+import pytest
+from cryptography.exceptions import InvalidTag
+
+import mdp_app.cli as cli
+import mdp_app.fragments as fragments_mod
+from mdp_app.crypto import SessionKey
+from mdp_app.fragments import MANIFESTE, CoffreFragmente, fragment_de
+from mdp_app.transfert import ecrire_csv
+from mdp_app.vault import Vault, VaultEntry, dump_vault_to_bytes, load_vault_from_bytes
+
+
+def _secrets(vault: Vault) -> dict[str, tuple[str, str, str]]:
+    return {e.id: (e.title, e.password, e.notes) for e in vault}
+
+
+@pytest.fixture
+def coffre(fast_argon2, tmp_path):
+    session = SessionKey.deriver("pw")
+    vault = Vault(entries=[VaultEntry.new(title=f"site-{i}", password=f"pw{i}", notes="n") for i in range(200)])
+    fragments = CoffreFragmente(tmp_path / "vault.d", n=8)
+    fragments.enregistrer(session, vault)
+    return session, vault, fragments
+
+
+def _fichiers(fragments: CoffreFragmente) -> dict[str, bytes]:
+    return {p.name: p.read_bytes() for p in fragments.dossier.iterdir()}
+
+
+def test_roundtrip_groups_entries_by_shard(coffre):
+    session, vault, fragments = coffre
+    for workers in (1, 4):
+        rouvert, vault2, session2 = CoffreFragmente.ouvrir("pw", fragments.dossier, workers=workers)
+        assert _secrets(vault2) == _secrets(vault)
+        assert [fragment_de(e.id, 8) for e in vault2] == sorted(fragment_de(e.id, 8) for e in vault)
+        assert rouvert.generations == [1] * 8
+        assert not any(0x20 <= b < 0x7F for data in _fichiers(rouvert).values() for b in data)
+
+
+def test_save_rewrites_only_dirty_shards(coffre):
+    _session, vault, fragments = coffre
+    rouvert, vault, session = CoffreFragmente.ouvrir("pw", fragments.dossier)
+    avant = _fichiers(rouvert)
+
+    e = vault.entries[0]
+    vault.update(VaultEntry(e.id, "modifié", e.username, "neuf", e.notes, e.updated_at))
+    ajoutee = VaultEntry.new(title="ajoutée", password="x")
+    vault.add(ajoutee)
+    supprimee = next(x for x in vault.entries if fragment_de(x.id, 8) not in {fragment_de(e.id, 8), fragment_de(ajoutee.id, 8)})
+    vault.remove(supprimee.id)
+    ecrits = rouvert.enregistrer(session, load_vault_from_bytes(dump_vault_to_bytes(vault)), [e.id, ajoutee.id, supprimee.id])
+
+    sales = {fragment_de(i, 8) for i in (e.id, ajoutee.id, supprimee.id)}
+    apres = _fichiers(rouvert)
+    assert {n for n in apres if apres[n] != avant.get(n)} == {MANIFESTE} | {rouvert.chemin(i).name for i in sales}
+    assert len(apres) == 9  # anciennes générations supprimées
+    assert ecrits == sum(len(apres[n]) for n in apres if n not in avant or n == MANIFESTE)
+    assert rouvert.enregistrer(session, vault, []) == 0
+    assert _secrets(CoffreFragmente.ouvrir("pw", fragments.dossier)[1]) == _secrets(vault)
+
+    # Autre session (ex: clé dérivée à nouveau après verrouillage): tout est réécrit.
+    rouvert.enregistrer(SessionKey.deriver("pw"), vault, [e.id])
+    assert all(g >= 2 for g in rouvert.generations)
+    assert _secrets(CoffreFragmente.ouvrir("pw", fragments.dossier)[1]) == _secrets(vault)
+
+
+def test_interrupted_save_keeps_previous_state(coffre, monkeypatch):
+    _session, vault, fragments = coffre
+    rouvert, vault2, session = CoffreFragmente.ouvrir("pw", fragments.dossier)
+    vault2.add(VaultEntry.new(title="perdue"))
+    ecrire = fragments_mod.ecrire_chiffre
+
+    def panne(data, path):
+        if path.name == MANIFESTE:
+            raise OSError("disque plein")
+        ecrire(data, path)
+
+    monkeypatch.setattr(fragments_mod, "ecrire_chiffre", panne)
+    with pytest.raises(OSError):
+        # Nouveau coffre sur le même dossier: les fragments référencés ne sont pas écrasés.
+        CoffreFragmente(fragments.dossier, n=8).enregistrer(session, vault2)
+    monkeypatch.setattr(fragments_mod, "ecrire_chiffre", ecrire)
+    assert _secrets(CoffreFragmente.ouvrir("pw", fragments.dossier)[1]) == _secrets(vault)
+
+    # Les fragments orphelins sont supprimés au prochain enregistrement.
+    rouvert.enregistrer(session, vault2, [vault2.entries[-1].id])
+    assert len(list(fragments.dossier.iterdir())) == 9
+    assert len(CoffreFragmente.ouvrir("pw", fragments.dossier)[1]) == 201
+
+
+def test_stale_or_foreign_shard_is_rejected(coffre):
+    session, vault, fragments = coffre
+    ancien = fragments.chemin(3).read_bytes()
+    e = next(x for x in vault.entries if fragment_de(x.id, 8) == 3)
+    vault.remove(e.id)
+    fragments.enregistrer(session, vault, [e.id])
+
+    # Fragment valide (même clé) mais d'une génération précédente: refusé par le manifeste.
+    fragments.chemin(3).write_bytes(ancien)
+    with pytest.raises(ValueError, match="Fragment 3"):
+        CoffreFragmente.ouvrir("pw", fragments.dossier)
+    with pytest.raises(InvalidTag):
+        CoffreFragmente.ouvrir("autre", fragments.dossier)
+
+
+def test_cli_import_writes_into_sharded_vault(coffre, tmp_path, monkeypatch):
+    _session, vault, fragments = coffre
+    monkeypatch.setattr(cli, "FICHIER", str(tmp_path / "vault.bin"))
+    monkeypatch.setattr(cli, "DOSSIER_FRAGMENTS", str(fragments.dossier))
+    monkeypatch.setattr(cli.getpass, "getpass", lambda _prompt="": "pw")
+    source = tmp_path / "import.csv"
+    with open(source, "w", encoding="utf-8", newline="") as f:
+        ecrire_csv(Vault(entries=[VaultEntry.new(title="importée", password="x")]), f)
+
+    assert cli.importer_fichier(str(source)) == 0
+    assert not (tmp_path / "vault.bin").exists()
+    assert len(CoffreFragmente.ouvrir("pw", fragments.dossier)[1]) == len(vault) + 1
@@ -0,0 +1,93 @@
+import random
+
+import pytest
+
+pytest.importorskip("tkinter")
+
+import mdp_app.gui as gui  # noqa: E402
+from mdp_app.gui import diff_rows  # noqa: E402
+from mdp_app.vault import SearchIndex, Vault, VaultEntry  # noqa: E402
+
+
+def _apply(rows, removed, ops):
+    # Même séquence que `CoffreGUI._sync_rows`: supprimer, détacher les "move", puis (r)insérer.
+    gone = set(removed) | {iid for op, iid, _i in ops if op == "move"}
+    rows = [r for r in rows if r not in gone]
+    for _op, iid, index in ops:
+        rows.insert(index, iid)
+    return rows
+
+
+def test_diff_rows_touches_only_changed_rows():
+    rows = [f"r{i}" for i in range(1000)]
+
+    filtered = rows[::7]
+    removed, ops = diff_rows(rows, filtered)
+    assert ops == [] and len(removed) == len(rows) - len(filtered)
+
+    assert diff_rows(rows, rows + ["new"]) == ([], [("insert", "new", 1000)])
+    assert diff_rows(rows, rows[:500] + rows[501:]) == (["r500"], [])
+    assert diff_rows(rows, rows) == ([], [])
+
+    swapped = rows[:]
+    swapped[10], swapped[20] = swapped[20], swapped[10]
+    removed, ops = diff_rows(rows, swapped)
+    assert removed == [] and len(ops) == 2
+
+
+def test_diff_rows_random_sequences():
+    rng = random.Random(0)
+    pool = [f"r{i}" for i in range(60)]
+    for _ in range(300):
+        current = rng.sample(pool, rng.randrange(len(pool)))
+        target = rng.sample(pool, rng.randrange(len(pool)))
+        removed, ops = diff_rows(current, target)
+        assert _apply(current, removed, ops) == target
+
+
+def _app(root, monkeypatch, n):
+    app = gui.CoffreGUI(root)
+    entries = [VaultEntry.new(title=f"site {i}", username="me") for i in range(n)]
+    app._vault = Vault(entries=entries)
+    app._index = SearchIndex(entries)
+    app._reset_entries()
+    app._mdp = "pw"
+    return app, entries
+
+
+def test_large_vault_materializes_only_a_window(root, monkeypatch):
+    monkeypatch.setattr(gui, "GUI_VIRTUAL_THRESHOLD", 100)
+    app, entries = _app(root, monkeypatch, 1000)
+
+    app._refresh_tree()
+    children = app.tree.get_children()
+    assert app._virtual and 0 < len(children) < 100
+    assert list(children) == [e.id for e in entries[: len(children)]]
+
+    app._on_scrollbar("moveto", "0.5")
+    assert app.tree.get_children()[0] == entries[500].id
+    app._on_wheel(1)
+    assert app.tree.get_children()[0] == entries[503].id
+
+    # Un filtre étroit repasse en mode normal (toutes les lignes).
+    app.search_var.set("site 99")
+    app._apply_filter()
+    assert not app._virtual
+    # Classement: "site 99" (le plus court) puis 990..999, puis les sous-séquences ("site 199"...).
+    children = list(app.tree.get_children())
+    assert children[:11] == [e.id for e in entries if "site 99" in e.title]
+    assert entries[199].id in children[11:]
+
+
+def test_filter_is_debounced(root, monkeypatch):
+    app, _entries = _app(root, monkeypatch, 10)
+    calls = []
+    monkeypatch.setattr(app._index, "rank", lambda q: calls.append(q) or [])
+
+    for text in ("s", "si", "sit"):
+        app.search_var.set(text)
+        app._schedule_filter()
+    root.after(gui.GUI_FILTER_DEBOUNCE_MS + 100, root.quit)
+    root.mainloop()
+
+    assert calls == ["sit"]
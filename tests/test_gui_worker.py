@@ -0,0 +1,237 @@
+import io
+import time
+
+import pytest
+
+tk = pytest.importorskip("tkinter")
+
+import mdp_app.gui as gui  # noqa: E402
+from mdp_app.vault import VaultEntry, dump_vault_to_bytes, new_empty_vault  # noqa: E402
+
+
+def _pump(root, until, timeout_s=5.0):
+    deadline = time.monotonic() + timeout_s
+    while not until() and time.monotonic() < deadline:
+        root.update()
+        time.sleep(0.005)
+
+
+def test_event_loop_keeps_running_during_unlock(root, tmp_path, monkeypatch):
+    vault_file = tmp_path / "vault.bin"
+    vault_file.write_bytes(b"blob")
+    monkeypatch.setattr(gui, "FICHIER", str(vault_file))
+    monkeypatch.setattr(gui, "DOSSIER_FRAGMENTS", str(tmp_path / "vault.d"))
+
+    vault = new_empty_vault()
+    vault.add(VaultEntry.new(title="site", username="me", password="pw"))
+
+    class FakeSession:
+        expiree = False
+
+        def effacer(self):
+            pass
+
+    def slow_unlock(mdp, reader, sink):
+        time.sleep(0.6)  # simule Argon2id
+        sink(dump_vault_to_bytes(vault))
+        return FakeSession(), b"\0" * 32
+
+    monkeypatch.setattr(gui, "ouvrir_chiffre", lambda: io.BytesIO(b"blob"))
+    monkeypatch.setattr(gui, "peek_header", lambda raw: ("v5",))
+    monkeypatch.setattr(gui, "dechiffrer_flux_session", slow_unlock)
+
+    app = gui.CoffreGUI(root)
+    monkeypatch.setattr(app, "_ask_password", lambda **_kw: "pw")
+
+    ticks = []
+
+    def tick():
+        ticks.append(time.monotonic())
+        root.after(10, tick)
+
+    root.after(10, tick)
+    app.ouvrir()
+    assert app._op is not None
+    assert "disabled" in app.btn_open.state()
+
+    _pump(root, lambda: app._op is None)
+
+    assert app._op is None
+    assert app._mdp == "pw"
+    assert [e.title for e in app._vault.entries] == ["site"]
+    # La boucle Tk a tourné pendant toute la "dérivation de clé".
+    assert len(ticks) >= 20
+
+
+def test_cancel_discards_late_result(root, tmp_path, monkeypatch):
+    vault_file = tmp_path / "vault.bin"
+    vault_file.write_bytes(b"blob")
+    monkeypatch.setattr(gui, "FICHIER", str(vault_file))
+    monkeypatch.setattr(gui, "DOSSIER_FRAGMENTS", str(tmp_path / "vault.d"))
+
+    wiped = []
+
+    class FakeSession:
+        expiree = False
+
+        def effacer(self):
+            wiped.append(True)
+
+    def slow_unlock(mdp, reader, sink):
+        time.sleep(0.3)
+        return FakeSession(), b"\0" * 32
+
+    monkeypatch.setattr(gui, "ouvrir_chiffre", lambda: io.BytesIO(b"blob"))
+    monkeypatch.setattr(gui, "peek_header", lambda raw: ("v5",))
+    monkeypatch.setattr(gui, "dechiffrer_flux_session", slow_unlock)
+    monkeypatch.setattr(gui, "SessionKey", FakeSession)
+
+    app = gui.CoffreGUI(root)
+    monkeypatch.setattr(app, "_ask_password", lambda **_kw: "pw")
+
+    app.ouvrir()
+    app.annuler()
+    assert app._op is None
+    assert "disabled" not in app.btn_open.state()
+
+    _pump(root, lambda: bool(wiped), timeout_s=2.0)
+    assert app._mdp is None
+    assert wiped == [True]
+
+
+def test_autosave_coalesces_edits_and_flushes_on_close(root, fast_argon2, tmp_path, monkeypatch):
+    from mdp_app.crypto import SessionKey
+    from mdp_app.fragments import CoffreFragmente
+    from mdp_app.sauvegarde_auto import SauvegardeAuto
+
+    monkeypatch.setattr(gui, "FICHIER", str(tmp_path / "vault.bin"))
+    monkeypatch.setattr(gui, "DOSSIER_FRAGMENTS", str(tmp_path / "vault.d"))
+    monkeypatch.setattr(gui, "FICHIER_HISTORIQUE", str(tmp_path / "vault.hist"))
+    titres = iter(f"site-{i}" for i in range(10))
+
+    class FakeDialog:
+        def __init__(self, *_args, **_kw):
+            self.value = VaultEntry.new(title=next(titres), password="x")
+
+    monkeypatch.setattr(gui, "EntryDialog", FakeDialog)
+    monkeypatch.setattr(root, "wait_window", lambda _w: None)
+    closed = []
+    monkeypatch.setattr(root, "destroy", lambda: closed.append(True))
+    monkeypatch.setattr(gui.messagebox, "askyesno", lambda *_a, **_kw: pytest.fail("aucune question attendue"))
+
+    app = gui.CoffreGUI(root)
+    app._mdp = "pw"
+    app._session = SessionKey.deriver("pw")
+    app._fragments = fragments = CoffreFragmente(tmp_path / "vault.d", n=4)
+    app._autosave = SauvegardeAuto(100, 1000)
+    saves = []
+    enregistrer = fragments.enregistrer
+
+    def slow_save(session, vault, modifies=None):
+        saves.append(len(list(modifies)))
+        time.sleep(0.3)
+        return enregistrer(session, vault, None)
+
+    monkeypatch.setattr(fragments, "enregistrer", slow_save)
+
+    for _ in range(3):
+        app.ajouter()
+    _pump(root, lambda: app._op is not None)
+    assert app._op.arriere_plan and saves == [3]
+    app.ajouter()  # pendant l'enregistrement automatique: édition permise, reste en attente
+    assert len(app._pending) == 1 and app._dirty
+
+    _pump(root, lambda: app._op is None)
+    assert app._dirty
+    app._on_close()  # enregistre sans attendre la fin du délai, puis ferme
+    _pump(root, lambda: bool(closed))
+    assert saves == [3, 1] and not app._dirty
+    _coffre, vault, _session = CoffreFragmente.ouvrir("pw", tmp_path / "vault.d")
+    assert sorted(e.title for e in vault) == [f"site-{i}" for i in range(4)]
+
+
+def test_reopen_replaces_rows_with_same_ids(root, tmp_path, monkeypatch):
+    from mdp_app.vault import SearchIndex, Vault
+
+    monkeypatch.setattr(gui, "DOSSIER_FRAGMENTS", str(tmp_path / "vault.d"))
+    entry = VaultEntry.new(title="modifiée", username="me")
+
+    class FakeSession:
+        expiree = False
+
+        def effacer(self):
+            pass
+
+    app = gui.CoffreGUI(root)
+    app._mdp = "pw"
+    for title in ("modifiée", "sur disque"):
+        vault = Vault(entries=[VaultEntry(entry.id, title, "me", "", "", entry.updated_at)])
+        monkeypatch.setattr(
+            gui, "_dechiffrer_coffre", lambda _mdp, _cancel, v=vault: (v, FakeSession(), SearchIndex(v.entries), None, None)
+        )
+        app._tentative_ouverture(1)
+        _pump(root, lambda: app._op is None)
+        assert app.tree.item(entry.id, "values")[0] == title
+
+
+def test_idle_expiry_forgets_password(root, fast_argon2, tmp_path, monkeypatch):
+    from mdp_app.crypto import SessionKey
+
+    monkeypatch.setattr(gui, "DOSSIER_FRAGMENTS", str(tmp_path / "vault.d"))
+    horloge = [0.0]
+    app = gui.CoffreGUI(root)
+    app._mdp = "pw"
+    app._session = SessionKey.deriver("pw", idle_timeout_s=60, clock=lambda: horloge[0])
+
+    horloge[0] = 61
+    _pump(root, lambda: app._mdp is None)
+    assert app._mdp is None and app._session is None
+
+    # Enregistrer ne redérive plus la clé en silence: le mot de passe est redemandé.
+    demandes = []
+    monkeypatch.setattr(app, "_ask_password", lambda **kw: demandes.append(kw["title"]))
+    app.enregistrer()
+    assert demandes == ["Déverrouiller"] and app._op is None
+
+
+def test_autosave_runs_when_vault_lanes_differ_from_default(root, fast_argon2, tmp_path, monkeypatch):
+    import os
+
+    from mdp_app.crypto import SessionKey
+    from mdp_app.fragments import CoffreFragmente
+    from mdp_app.sauvegarde_auto import SauvegardeAuto
+
+    dossier = tmp_path / "vault.d"
+    monkeypatch.setattr(gui, "DOSSIER_FRAGMENTS", str(dossier))
+    monkeypatch.setattr(gui, "FICHIER_HISTORIQUE", str(tmp_path / "vault.hist"))
+    vault = new_empty_vault()
+    vault.add(VaultEntry.new(title="existante", password="x"))
+    CoffreFragmente(dossier, n=4).enregistrer(SessionKey.deriver("pw"), vault)  # 1 lane
+    # Machine à 8 cœurs: les nouveaux coffres auraient 8 lanes.
+    monkeypatch.setattr(fast_argon2, "ARGON2_PARALLELISM", None)
+    monkeypatch.setattr(os, "sched_getaffinity", lambda _pid: set(range(8)), raising=False)
+
+    class FakeDialog:
+        def __init__(self, *_args, **_kw):
+            self.value = VaultEntry.new(title="ajoutée", password="y")
+
+    monkeypatch.setattr(gui, "EntryDialog", FakeDialog)
+    monkeypatch.setattr(root, "wait_window", lambda _w: None)
+    app = gui.CoffreGUI(root)
+    app._autosave = SauvegardeAuto(100, 1000)
+    monkeypatch.setattr(app, "_ask_password", lambda **_kw: "pw")
+    app._tentative_ouverture(1)
+    _pump(root, lambda: app._op is None and app._session is not None)
+    session = app._session
+    assert session.parallelism == 1 and app._session_valide()
+    assert "automatiquement" in app._status.get()
+
+    derivations = []
+    real = fast_argon2.generer_cle_argon2id_raw
+    monkeypatch.setattr(fast_argon2, "generer_cle_argon2id_raw", lambda *a, **kw: derivations.append(1) or real(*a, **kw))
+    app.ajouter()
+    _pump(root, lambda: app._op is not None)
+    _pump(root, lambda: app._op is None and not app._dirty)
+    assert not app._dirty and app._session is session and derivations == []
+    _coffre, rouvert, _session = CoffreFragmente.ouvrir("pw", dossier)
+    assert sorted(e.title for e in rouvert) == ["ajoutée", "existante"]
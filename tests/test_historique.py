@@ -0,0 +1,173 @@
+import json
+import os
+from itertools import pairwise
+
+import pytest
+
+import mdp_app.historique as historique_mod
+from mdp_app.historique import Historique, appliquer_delta, encoder_delta
+from mdp_app.vault import (
+    Vault,
+    VaultEntry,
+    contenu_edite,
+    dump_vault_to_bytes,
+    load_vault_from_bytes,
+    payload_texte,
+)
+
+JOUR = 86400
+
+
+@pytest.mark.parametrize(
+    "ancien, nouveau",
+    [
+        ("ancien", "nouveau"),
+        ("", "ajouté"),
+        ("supprimé", ""),
+        ("abcabc", "abc"),  # préfixe et suffixe se chevauchent
+        ("notes\nligne 2\nligne 3", "notes\nligne 2 modifiée\nligne 3"),
+        ("é😀\udcff", "é😀"),  # hors BMP et surrogate isolé
+    ],
+)
+def test_delta_roundtrip(ancien, nouveau):
+    a = ("t", "u", ancien, "n", "2024-01-01T00:00:00+00:00")
+    n = ("t", "u2", nouveau, "n", "2024-01-02T00:00:00+00:00")
+    delta = encoder_delta(a, n)
+    assert appliquer_delta(n, delta) == a
+    with pytest.raises(ValueError):
+        appliquer_delta(n, delta + b"x")
+
+
+def _versions(entry: VaultEntry, n: int) -> list[VaultEntry]:
+    notes = "ligne commune\n" * 50
+    return [entry] + [
+        VaultEntry(entry.id, entry.title, entry.username, f"mdp-{k}", notes + str(k), f"2024-02-{k:02d}T00:00:00+00:00")
+        for k in range(1, n + 1)
+    ]
+
+
+@pytest.fixture
+def coffre(tmp_path):
+    vault = load_vault_from_bytes(
+        dump_vault_to_bytes(Vault(entries=[VaultEntry.new(title=f"site-{i}", password=f"pw{i}") for i in range(20)]))
+    )
+    return vault, tmp_path / "vault.hist"
+
+
+def test_revisions_are_rebuilt_from_current_entry(coffre):
+    vault, path = coffre
+    versions = _versions(vault.entries[3], 5)
+    historique = Historique.du_coffre(vault, path=path)
+    tailles = [historique.ajouter([pair], maintenant=1000 + k) for k, pair in enumerate(pairwise(versions))]
+    # Deltas: la note commune n'est pas recopiée à chaque révision, et un ajout ne dépend pas de la taille du fichier.
+    assert max(tailles[1:]) < 2 * 200
+    assert tailles[1] == tailles[-1]
+
+    rouvert = Historique.du_coffre(vault, path=path)
+    revisions = rouvert.revisions(versions[-1])
+    assert [r.entree for r in revisions] == versions[-2::-1]
+    assert revisions[0].remplacee_le == "1970-01-01T00:16:44+00:00"
+    assert rouvert.revisions(vault.entries[4]) == []
+    assert not any(0x20 <= b < 0x7F for b in path.read_bytes())
+
+    # Ajout rejoué (enregistrement relancé): le doublon est ignoré.
+    rouvert.ajouter([(versions[-2], versions[-1])])
+    assert [r.entree for r in rouvert.revisions(versions[-1])] == versions[-2::-1]
+
+
+def test_retention_and_compaction(coffre, monkeypatch):
+    vault, path = coffre
+    versions = _versions(vault.entries[0], 6)
+    supprimee = _versions(vault.entries[1], 2)
+    historique = Historique.du_coffre(vault, path=path)
+    for k, pair in enumerate(pairwise(versions)):
+        historique.ajouter([pair], maintenant=k * JOUR)
+    historique.ajouter(pairwise(supprimee), maintenant=0)
+
+    monkeypatch.setattr(historique_mod, "HISTORIQUE_MAX_REVISIONS", 3)
+    assert [r.entree for r in historique.revisions(versions[-1])] == versions[-2:-5:-1]
+    monkeypatch.setattr(historique_mod, "HISTORIQUE_MAX_JOURS", 1)
+    assert len(historique.revisions(versions[-1], maintenant=5 * JOUR)) == 2
+
+    monkeypatch.setattr(historique_mod, "HISTORIQUE_COMPACTER", 2)
+    assert historique.a_compacter
+    avant = path.stat().st_size
+    historique.compacter([versions[0].id], maintenant=5 * JOUR)
+    assert path.stat().st_size < avant and len(historique) == 2
+    assert not historique.a_compacter
+    monkeypatch.setattr(historique_mod, "HISTORIQUE_MAX_JOURS", 0)
+    rouvert = Historique.du_coffre(vault, path=path)
+    assert [r.entree for r in rouvert.revisions(versions[-1])] == versions[-2:-4:-1]
+    assert rouvert.revisions(supprimee[-1]) == []
+
+
+def test_torn_append_and_foreign_history(coffre):
+    vault, path = coffre
+    versions = _versions(vault.entries[0], 3)
+    historique = Historique.du_coffre(vault, path=path)
+    historique.ajouter([(versions[0], versions[1])])
+    taille = path.stat().st_size
+    historique.ajouter([(versions[1], versions[2])])
+    with open(path, "r+b") as f:
+        f.truncate(taille + 40)  # ajout interrompu
+
+    rouvert = Historique.du_coffre(vault, path=path)
+    assert [r.entree for r in rouvert.revisions(versions[1])] == [versions[0]]
+    rouvert.ajouter([(versions[1], versions[2])])
+    assert [r.entree for r in Historique.du_coffre(vault, path=path).revisions(versions[2])] == versions[1::-1]
+
+    # Même identité, autre clé: illisible, donc ignoré comme celui d'un autre coffre.
+    assert len(Historique(vault.identite, os.urandom(32), path=path)) == 0
+    # Historique d'un autre coffre (autre identité): ignoré, puis mis de côté (jamais tronqué) au premier ajout.
+    avant = path.read_bytes()
+    autre = Historique(os.urandom(32), vault.cle_historique, path=path)
+    assert len(autre) == 0 and autre.revisions(versions[2]) == []
+    autre.ajouter([(versions[0], versions[1])])
+    assert autre.ecarte is not None and autre.ecarte.read_bytes() == avant
+    assert len(Historique.du_coffre(vault, path=path)) == 0
+    assert len(Historique.du_coffre(vault, path=autre.ecarte)) == 2
+
+
+def test_append_reads_only_the_tail(coffre, monkeypatch):
+    vault, path = coffre
+    versions = _versions(vault.entries[0], 4)
+    Historique.du_coffre(vault, path=path).ajouter(pairwise(versions[:3]))
+
+    def parcours(*_args):
+        raise AssertionError("cadres parcourus")
+
+    monkeypatch.setattr(Historique, "_parcourir", parcours)
+    historique = Historique.du_coffre(vault, path=path)
+    historique.ajouter([(versions[2], versions[3])])
+    assert len(historique) == 3 and not historique.a_compacter
+    monkeypatch.undo()
+    assert [r.entree for r in Historique.du_coffre(vault, path=path).revisions(versions[3])] == versions[2::-1]
+
+
+def test_history_survives_cli_text_edit_but_not_its_export(coffre):
+    vault, path = coffre
+    e = vault.entries[0]
+    modifiee = VaultEntry(e.id, e.title, e.username, "nouveau", "", e.updated_at)
+    Historique.du_coffre(vault, path=path).ajouter([(e, modifiee)])
+    vault.update(modifiee)
+
+    # Le JSON en clair (affichage, édition CLI) donne l'identité, jamais la clé de l'historique.
+    origine = dump_vault_to_bytes(vault)
+    texte = payload_texte(origine)
+    assert vault.identite.hex().encode() in texte and vault.cle_historique.hex().encode() not in texte
+    assert len(Historique.du_coffre(load_vault_from_bytes(texte), path=path)) == 0
+
+    # Édition CLI: le JSON modifié est rechiffré avec la clé d'`origine`, puis ouvert et enregistré par la GUI.
+    document = json.loads(texte)
+    document["entries"][1]["title"] = "renommée"
+    rouvert = load_vault_from_bytes(contenu_edite(json.dumps(document).encode("utf-8"), origine))
+    assert rouvert.entries[1].title == "renommée"
+    courante = rouvert.get(e.id)
+    historique = Historique.du_coffre(rouvert, path=path)
+    historique.ajouter([(courante, VaultEntry(e.id, e.title, e.username, "encore", "", e.updated_at))])
+    assert historique.ecarte is None
+    assert [r.entree.password for r in historique.revisions(courante)] == [e.password]
+
+    # Texte d'un autre coffre: rechiffré tel quel.
+    autre = payload_texte(dump_vault_to_bytes(Vault(entries=[VaultEntry.new(title="x")])))
+    assert contenu_edite(autre, origine) == autre
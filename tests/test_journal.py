@@ -0,0 +1,124 @@
+import pytest
+
+import mdp_app.journal as journal_mod
+from mdp_app.crypto import SessionKey, ajouter_slot_v7, changer_mdp_v7, chiffrer_bytes_v7, ouvrir_session_v7
+from mdp_app.journal import Journal, appliquer, contenu_avec_journal
+from mdp_app.vault import Vault, VaultEntry, dump_vault_to_bytes, load_vault_from_bytes
+
+
+def _entries(n: int) -> list[VaultEntry]:
+    return [VaultEntry.new(title=f"site-{i}", username="alice", password=f"pw{i}") for i in range(n)]
+
+
+@pytest.fixture
+def coffre(fast_argon2, tmp_path):
+    session = SessionKey.deriver("pw")
+    vault = Vault(entries=_entries(5))
+    snapshot = session.chiffrer(dump_vault_to_bytes(vault))
+    path = tmp_path / "vault.jnl"
+    return session, vault, snapshot, path
+
+
+def _ops(vault: Vault) -> list:
+    e = vault.entries
+    modifiee = VaultEntry(e[1].id, "modifié", "bob", "neuf", "", e[1].updated_at)
+    ajoutee = VaultEntry.new(title="nouveau")
+    return [(modifiee.id, modifiee), (e[3].id, None), (ajoutee.id, ajoutee)]
+
+
+def _replay(session, snapshot, path, base: Vault) -> list[VaultEntry]:
+    _journal, ops = Journal.ouvrir(session, snapshot, path=path)
+    return appliquer(Vault(entries=list(base.entries)), ops).entries
+
+
+def test_append_then_replay_matches_in_memory_state(coffre):
+    session, vault, snapshot, path = coffre
+    ops = _ops(vault)
+    journal = Journal.nouveau(session, snapshot, path=path)
+    journal.ajouter(ops[:1])
+    journal.ajouter(ops[1:])
+
+    attendu = appliquer(Vault(entries=list(vault.entries)), ops).entries
+    assert [e.title for e in attendu] == ["site-0", "modifié", "site-2", "site-4", "nouveau"]
+    assert _replay(session, snapshot, path, vault) == attendu
+    assert not any(0x20 <= b < 0x7F for b in path.read_bytes())
+
+
+def test_append_cost_does_not_depend_on_vault_size(fast_argon2, tmp_path):
+    session = SessionKey.deriver("pw")
+    tailles = []
+    for n in (10, 5000):
+        snapshot = session.chiffrer(dump_vault_to_bytes(Vault(entries=_entries(n))))
+        journal = Journal.nouveau(session, snapshot, path=tmp_path / f"{n}.jnl")
+        entry = VaultEntry.new(title="x", password="y")
+        tailles.append(journal.ajouter([(entry.id, entry)]))
+    assert tailles[0] == tailles[1] < 1024
+
+
+def test_torn_append_keeps_complete_records_and_is_overwritten(coffre):
+    session, vault, snapshot, path = coffre
+    ops = _ops(vault)
+    journal = Journal.nouveau(session, snapshot, path=path)
+    journal.ajouter(ops[:2])
+    complet = path.read_bytes()
+    journal.ajouter(ops[2:])
+    entier = path.read_bytes()
+
+    deux = appliquer(Vault(entries=list(vault.entries)), ops[:2]).entries
+    for coupe in range(len(complet), len(entier), 7):
+        path.write_bytes(entier[:coupe])
+        assert _replay(session, snapshot, path, vault) == deux
+    # Fin illisible (zéros après un crash): les enregistrements précédents restent lus.
+    path.write_bytes(complet + b"\x00" * 64)
+    reouvert, ops_lues = Journal.ouvrir(session, snapshot, path=path)
+    assert len(ops_lues) == 2
+
+    # Le prochain ajout écrase la fin invalide.
+    reouvert.ajouter(ops[2:])
+    assert _replay(session, snapshot, path, vault) == appliquer(Vault(entries=list(vault.entries)), ops).entries
+
+
+def test_tampered_or_reordered_records_stop_the_replay(coffre):
+    session, vault, snapshot, path = coffre
+    journal = Journal.nouveau(session, snapshot, path=path)
+    journal.ajouter(_ops(vault))
+    raw = bytearray(path.read_bytes())
+    raw[-3] ^= 0x01
+    path.write_bytes(bytes(raw))
+    assert len(Journal.ouvrir(session, snapshot, path=path)[1]) == 2
+
+    autre = SessionKey.deriver("pw")
+    assert Journal.ouvrir(autre, snapshot, path=path)[1] == []
+
+
+def test_stale_journal_is_ignored_after_a_new_snapshot(coffre):
+    session, vault, snapshot, path = coffre
+    Journal.nouveau(session, snapshot, path=path).ajouter(_ops(vault))
+    nouveau_snapshot = session.chiffrer(dump_vault_to_bytes(vault))
+    journal, ops = Journal.ouvrir(session, nouveau_snapshot, path=path)
+    assert ops == []
+
+    journal.ajouter(_ops(vault)[:1])
+    assert len(Journal.ouvrir(session, nouveau_snapshot, path=path)[1]) == 1
+
+
+def test_v7_password_change_keeps_the_journal(fast_argon2, tmp_path):
+    vault = Vault(entries=_entries(5))
+    snapshot = chiffrer_bytes_v7("ancien", dump_vault_to_bytes(vault))
+    path = tmp_path / "vault.jnl"
+    ops = _ops(vault)
+    Journal.nouveau(ouvrir_session_v7("ancien", snapshot), snapshot, path=path).ajouter(ops)
+
+    rotation = ajouter_slot_v7("nouveau", "secours", changer_mdp_v7("ancien", "nouveau", snapshot))
+    contenu = contenu_avec_journal(dump_vault_to_bytes(vault), rotation, ouvrir_session_v7("secours", rotation), path=path)
+    assert load_vault_from_bytes(contenu).entries == appliquer(Vault(entries=list(vault.entries)), ops).entries
+
+
+def test_compaction_threshold(coffre, monkeypatch):
+    session, vault, snapshot, path = coffre
+    monkeypatch.setattr(journal_mod, "JOURNAL_MAX_RECORDS", 3)
+    journal = Journal.nouveau(session, snapshot, path=path)
+    journal.ajouter(_ops(vault)[:2])
+    assert not journal.a_compacter
+    journal.ajouter(_ops(vault)[:1])
+    assert journal.a_compacter
@@ -0,0 +1,38 @@
+import os
+
+from mdp_app.crypto import _encode_no_strings, _try_decode_no_strings
+
+
+def _encode_reference(data: bytes) -> bytes:
+    return bytes(b for x in data for b in (0x80 | (x >> 4), 0x80 | (x & 0x0F)))
+
+
+def test_encode_matches_reference_for_all_byte_values():
+    data = bytes(range(256)) + os.urandom(4096)
+    assert _encode_no_strings(data) == _encode_reference(data)
+
+
+def test_decode_roundtrip():
+    data = os.urandom(10_000)
+    assert _try_decode_no_strings(_encode_no_strings(data)) == data
+
+
+def test_decode_rejects_invalid_input():
+    encoded = _encode_no_strings(os.urandom(200))
+
+    assert _try_decode_no_strings(b"") is None
+    assert _try_decode_no_strings(encoded[:-1]) is None
+    # Octet invalide au-delà de l'échantillon de signature (64 premiers octets).
+    for bad in (0x7F, 0x90, 0x20, 0xFF):
+        corrupted = encoded[:300] + bytes([bad]) + encoded[301:]
+        assert _try_decode_no_strings(corrupted) is None
+    assert _try_decode_no_strings(b"MDP2" + encoded) is None
+
+
+def test_decode_windowed_large_input():
+    data = os.urandom(1_500_000)
+    encoded = _encode_no_strings(data)
+    assert _try_decode_no_strings(encoded) == data
+
+    corrupted = encoded[:-3] + b"\x20" + encoded[-2:]
+    assert _try_decode_no_strings(corrupted) is None
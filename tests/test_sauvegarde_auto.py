@@ -0,0 +1,58 @@
+from mdp_app.sauvegarde_auto import SauvegardeAuto
+
+
+class Horloge:
+    def __init__(self) -> None:
+        self.t = 100.0
+
+    def __call__(self) -> float:
+        return self.t
+
+
+def test_burst_is_coalesced_until_quiet_or_max_delay():
+    h = Horloge()
+    auto = SauvegardeAuto(2000, 5000, horloge=h)
+    assert auto.propre and auto.attente() is None
+
+    for _ in range(3):  # rafale: chaque modification repousse l'échéance
+        auto.modifier()
+        h.t += 1
+    assert auto.attente() == 1.0
+    for _ in range(10):  # modifications continues: plafonné par le délai maximal
+        auto.modifier()
+        h.t += 1.5
+    assert auto.attente() == 0.0
+
+    modifications = auto.commencer()
+    assert auto.attente() is None and not auto.propre
+    assert auto.terminer(modifications, 300)
+    assert auto.par_minute() == (1, 300)
+    h.t += 61
+    assert auto.par_minute() == (0, 0)
+    assert (auto.total_enregistrements, auto.total_octets) == (1, 300)
+
+
+def test_edits_during_save_stay_pending():
+    h = Horloge()
+    auto = SauvegardeAuto(2000, 5000, horloge=h)
+    auto.modifier()
+    modifications = auto.commencer()
+    h.t += 1
+    auto.modifier()  # pendant l'enregistrement: pas dans le snapshot
+    assert not auto.terminer(modifications, 10)
+    assert auto.attente() == 2.0
+
+    # Échec: toujours non enregistré, replanifié seulement à la modification suivante.
+    modifications = auto.commencer()
+    assert not auto.terminer(modifications, None)
+    assert auto.attente() is None and auto.total_enregistrements == 1
+    auto.modifier()
+    assert auto.attente() == 2.0
+    assert auto.terminer(auto.commencer(), 10)
+
+    auto.modifier()
+    auto.reinitialiser()  # coffre rouvert
+    assert auto.propre and auto.attente() is None
+    desactive = SauvegardeAuto(0, 5000)
+    desactive.modifier()
+    assert desactive.attente() is None
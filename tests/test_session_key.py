@@ -0,0 +1,93 @@
+import os
+
+import pytest
+from cryptography.exceptions import InvalidTag
+
+import mdp_app.crypto as crypto
+from mdp_app.crypto import SessionExpiree, SessionKey, chiffrer_bytes_v4, dechiffrer_bytes, dechiffrer_bytes_session
+
+
+@pytest.fixture
+def kdf_calls(fast_argon2, monkeypatch):
+    calls = []
+    real = crypto.generer_cle_argon2id_raw
+
+    def counting(*args, **kwargs):
+        calls.append(1)
+        return real(*args, **kwargs)
+
+    monkeypatch.setattr(crypto, "generer_cle_argon2id_raw", counting)
+    return calls
+
+
+def test_saves_after_unlock_do_not_rerun_kdf(kdf_calls):
+    blob = crypto.chiffrer_bytes_v5("pw", b"v1", salt=os.urandom(16))
+    kdf_calls.clear()
+
+    contenu, session = dechiffrer_bytes_session("pw", blob)
+    assert contenu == b"v1"
+    assert len(kdf_calls) == 1
+
+    saved = [session.chiffrer(f"v{i}".encode()) for i in range(2, 6)]
+    assert len(kdf_calls) == 1
+
+    # Les blobs restent des v5 standards, lisibles avec le mot de passe.
+    assert dechiffrer_bytes("pw", saved[-1]) == b"v5"
+    assert session.dechiffrer(saved[0]) == b"v2"
+    nonces = {crypto.decoder(s)[5][: crypto.AEAD_NONCE_SIZE] for s in saved}
+    assert len(nonces) == len(saved)
+
+
+def test_legacy_format_unlock_derives_a_fresh_v5_session(kdf_calls):
+    blob = chiffrer_bytes_v4("pw", b"old", salt=os.urandom(16))
+    kdf_calls.clear()
+
+    contenu, session = dechiffrer_bytes_session("pw", blob)
+    assert contenu == b"old"
+    migrated = session.chiffrer(contenu)
+    assert crypto.decoder(migrated)[0] == "v5"
+    assert dechiffrer_bytes("pw", migrated) == b"old"
+
+
+def test_wrong_password_raises(fast_argon2):
+    blob = crypto.chiffrer_bytes_v5("pw", b"data", salt=os.urandom(16))
+    with pytest.raises(InvalidTag):
+        dechiffrer_bytes_session("wrong", blob)
+
+
+def test_wipe_and_idle_timeout(fast_argon2):
+    now = [0.0]
+    session = SessionKey.deriver("pw", idle_timeout_s=60, clock=lambda: now[0])
+    session.chiffrer(b"x")
+
+    now[0] = 59.0
+    session.chiffrer(b"x")
+    now[0] = 130.0
+    assert session.expiree
+    with pytest.raises(SessionExpiree):
+        session.chiffrer(b"x")
+
+    other = SessionKey.deriver("pw")
+    other.effacer()
+    assert other.expiree
+    with pytest.raises(SessionExpiree):
+        other.chiffrer(b"x")
+
+
+def test_lane_count_alone_keeps_session_up_to_date(fast_argon2, monkeypatch):
+    blob = crypto.chiffrer_bytes_v5("pw", b"data", salt=os.urandom(16))  # 1 lane, comme les coffres existants
+    monkeypatch.setattr(crypto, "ARGON2_PARALLELISM", None)
+    monkeypatch.setattr(os, "sched_getaffinity", lambda _pid: set(range(8)), raising=False)
+    assert crypto.parametres_argon2().parallelism == 8
+
+    lectures = []
+    real = crypto.parametres_calibres
+    monkeypatch.setattr(crypto, "parametres_calibres", lambda *a: lectures.append(1) or real(*a))
+    _contenu, session = dechiffrer_bytes_session("pw", blob)
+    assert session.parallelism == 1
+    assert all(session.a_jour for _ in range(3)) and len(lectures) == 1  # kdf.json lu au déverrouillage seulement
+
+    # Calibration explicite avec d'autres paramètres: redérivation au prochain enregistrement.
+    crypto.enregistrer_parametres_argon2(crypto.Argon2Params(2, crypto.ARGON2_MIN_MEMORY_COST_KIB, 1))
+    assert session.a_jour
+    assert not dechiffrer_bytes_session("pw", blob)[1].a_jour
@@ -0,0 +1,126 @@
+import gc
+import io
+import os
+import tracemalloc
+
+import pytest
+from cryptography.exceptions import InvalidTag
+
+import mdp_app.crypto as crypto
+from mdp_app.crypto import (
+    SessionKey,
+    chiffrer_bytes_v5,
+    chiffrer_bytes_v7,
+    dechiffrer_bytes_session,
+    dechiffrer_flux_session,
+    empreinte_corps,
+)
+from mdp_app.vault import Vault, VaultEntry, VaultReader, dump_vault_to_bytes, is_binary_payload, load_vault_from_bytes
+
+
+def _vault(n: int) -> Vault:
+    return Vault(
+        entries=[
+            VaultEntry.new(title=f"site-{i}.example", username=f"user{i % 50}", password=f"pw-{i}", notes="n" * (i % 7))
+            for i in range(n)
+        ]
+    )
+
+
+def _ouvrir(mdp: str, blob: bytes) -> tuple[Vault, SessionKey, bytes]:
+    reader = VaultReader()
+    session, empreinte = dechiffrer_flux_session(mdp, io.BytesIO(blob), reader.feed)
+    return reader.close(), session, empreinte
+
+
+def _par_morceaux(contenu: bytes, taille: int) -> Vault:
+    reader = VaultReader()
+    for i in range(0, len(contenu), taille):
+        reader.feed(contenu[i : i + taille])
+    return reader.close()
+
+
+@pytest.mark.parametrize(
+    "contenu",
+    [
+        dump_vault_to_bytes(_vault(300)),
+        dump_vault_to_bytes(_vault(30), binary=False),
+        "ancien format\nligne 2".encode(),
+        b"",
+        b"MD",
+    ],
+    ids=["binaire", "json", "texte", "vide", "court"],
+)
+def test_reader_matches_load_vault_from_bytes(contenu):
+    attendu = load_vault_from_bytes(contenu)
+    for taille in (1, 7, 4096, len(contenu) or 1):
+        obtenu = _par_morceaux(contenu, taille)
+        # Id aléatoire pour l'import d'un ancien contenu texte: comparé hors id.
+        assert [(e.title, e.username, e.secrets()) for e in obtenu.entries] == [
+            (e.title, e.username, e.secrets()) for e in attendu.entries
+        ]
+        if is_binary_payload(contenu):
+            assert obtenu.entries == attendu.entries
+
+
+def test_reader_rejects_truncated_or_padded_binary():
+    contenu = dump_vault_to_bytes(_vault(20))
+    with pytest.raises(ValueError):
+        _par_morceaux(contenu[:-3], 64)
+    with pytest.raises(ValueError):
+        _par_morceaux(contenu + b"\x00", 64)
+
+
+@pytest.mark.parametrize("algo", ["none", "zlib", "lzma", "bz2"])
+def test_stream_open_v5_and_v7_matches_in_memory_path(fast_argon2, monkeypatch, algo):
+    monkeypatch.setattr(crypto, "COMPRESSION_ALGO", algo)
+    monkeypatch.setattr(crypto, "_FLUX_CHUNK", 1000)
+    vault = _vault(500)
+    contenu = dump_vault_to_bytes(vault, binary=False)
+    for blob in (chiffrer_bytes_v5("pw", contenu, salt=os.urandom(16)), chiffrer_bytes_v7("pw", contenu)):
+        obtenu, session, empreinte = _ouvrir("pw", blob)
+        assert obtenu.entries == vault.entries
+        assert empreinte == empreinte_corps(blob)
+        # La session permet d'enregistrer comme après `dechiffrer_bytes_session`.
+        assert dechiffrer_bytes_session("pw", session.chiffrer(contenu))[0] == contenu
+
+
+def test_wrong_password_or_tampering_raises_invalid_tag(fast_argon2):
+    blob = chiffrer_bytes_v5("pw", dump_vault_to_bytes(_vault(50)), salt=os.urandom(16))
+    with pytest.raises(InvalidTag):
+        _ouvrir("autre", blob)
+
+    # Octet du corps modifié (encodage anti-`strings` préservé): le clair est invalide, mais c'est le tag qui échoue.
+    raw = bytearray(blob)
+    raw[len(raw) // 2] ^= 0x01
+    with pytest.raises(InvalidTag):
+        _ouvrir("pw", bytes(raw))
+    with pytest.raises(InvalidTag):
+        _ouvrir("pw", blob[:-40])
+    with pytest.raises(ValueError):
+        _ouvrir("pw", blob[: 2 * (crypto.HEADER_V2.size + 20)])
+
+
+def test_stream_open_peak_memory_is_bounded_by_the_entry_set(fast_argon2):
+    n = 20_000
+    blob = chiffrer_bytes_v7("pw", dump_vault_to_bytes(_vault(n)))
+    gc.collect()
+
+    tracemalloc.start()
+    try:
+        vault = _ouvrir("pw", blob)[0]
+        gc.collect()
+        final, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        del vault
+        gc.collect()
+        base = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        vault = _ouvrir("pw", blob)[0]
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert len(vault.entries) == n
+    entries = final - base
+    # Le blob seul (déjà en mémoire ici) pèse plus que les entrées: aucune copie du fichier ni du clair entier.
+    assert peak - base < 1.5 * entries
@@ -0,0 +1,68 @@
+import io
+import os
+
+import pytest
+from cryptography.exceptions import InvalidTag
+
+from mdp_app.crypto import LecteurV6, dechiffrer_bytes, decoder, decrypt_stream, encrypt_stream
+
+CHUNK = 1024
+
+
+def _encrypt(plaintext: bytes, mdp: str = "pw") -> bytes:
+    out = io.BytesIO()
+    assert encrypt_stream(mdp, io.BytesIO(plaintext), out, chunk_size=CHUNK) == len(plaintext)
+    return out.getvalue()
+
+
+def _decrypt(blob: bytes, mdp: str = "pw") -> bytes:
+    out = io.BytesIO()
+    decrypt_stream(mdp, io.BytesIO(blob), out)
+    return out.getvalue()
+
+
+@pytest.mark.parametrize("size", [0, 1, CHUNK - 1, CHUNK, 3 * CHUNK, 3 * CHUNK + 17])
+def test_v6_roundtrip(fast_argon2, size):
+    plaintext = os.urandom(size)
+    blob = _encrypt(plaintext)
+    assert decoder(blob)[0] == "v6"
+    assert _decrypt(blob) == plaintext
+    assert dechiffrer_bytes("pw", blob) == plaintext
+    assert all((b & 0xF0) == 0x80 for b in blob[:256])
+
+
+def test_v6_detects_truncation_at_chunk_boundary(fast_argon2):
+    blob = _encrypt(os.urandom(3 * CHUNK + 5))
+    sealed = 2 * (CHUNK + 16)
+    truncated = blob[: len(blob) - 2 * (5 + 16)]
+    assert (len(truncated) - 2 * 43) % sealed == 0
+    with pytest.raises(InvalidTag):
+        _decrypt(truncated)
+
+
+def test_v6_detects_reordered_chunks(fast_argon2):
+    blob = _encrypt(os.urandom(3 * CHUNK + 5))
+    head = 2 * 43
+    sealed = 2 * (CHUNK + 16)
+    c0 = blob[head : head + sealed]
+    c1 = blob[head + sealed : head + 2 * sealed]
+    swapped = blob[:head] + c1 + c0 + blob[head + 2 * sealed :]
+    with pytest.raises(InvalidTag):
+        _decrypt(swapped)
+
+
+def test_v6_wrong_password(fast_argon2):
+    blob = _encrypt(b"secret")
+    with pytest.raises(InvalidTag):
+        _decrypt(blob, mdp="wrong")
+
+
+def test_v6_random_access_to_a_single_chunk(fast_argon2):
+    plaintext = os.urandom(5 * CHUNK + 100)
+    reader = LecteurV6("pw", io.BytesIO(_encrypt(plaintext)))
+    assert reader.nb_segments == 6
+    assert reader.segment(3) == plaintext[3 * CHUNK : 4 * CHUNK]
+    assert reader.segment(5) == plaintext[5 * CHUNK :]
+    assert reader.segment(0) == plaintext[:CHUNK]
+    with pytest.raises(IndexError):
+        reader.segment(6)
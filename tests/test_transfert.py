@@ -0,0 +1,122 @@
+import io
+import json
+
+import pytest
+
+import mdp_app.cli as cli
+import mdp_app.transfert as transfert
+import mdp_app.vault as vault_mod
+from mdp_app.transfert import ecrire_csv, ecrire_json, lire_csv, lire_json
+from mdp_app.vault import Vault, VaultEntry, dump_vault_to_bytes, load_vault_from_bytes
+
+
+def _vault(n: int) -> Vault:
+    return Vault(
+        entries=[
+            VaultEntry.new(
+                title=f"Société {i}",
+                username=f"user{i % 7}@example.com",
+                password=f'p,w;"{i}"',
+                notes="ligne 1\nligne 2" if i % 3 else "",
+            )
+            for i in range(n)
+        ]
+    )
+
+
+@pytest.fixture
+def petits_morceaux(monkeypatch):
+    # Morceaux minuscules: les valeurs JSON et les lignes CSV sont coupées entre deux lectures.
+    monkeypatch.setattr(transfert, "_CHUNK", 7)
+
+
+def test_csv_and_json_exports_roundtrip(petits_morceaux, monkeypatch):
+    vault = load_vault_from_bytes(dump_vault_to_bytes(_vault(50)))  # secrets scellés, comme après ouverture
+    for ecrire, lire in ((ecrire_csv, lire_csv), (ecrire_json, lire_json)):
+        flux = io.StringIO(newline="")
+        assert ecrire(vault, flux) == 50
+        flux.seek(0)
+        assert list(lire(flux)) == vault.entries
+
+    # L'export JSON est le JSON du coffre, sans construire le document entier.
+    monkeypatch.setattr(transfert, "_now_iso", lambda: "2024-01-02T03:04:05+00:00")
+    monkeypatch.setattr(vault_mod, "_now_iso", lambda: "2024-01-02T03:04:05+00:00")
+    for n in (0, 3):
+        flux = io.StringIO()
+        ecrire_json(Vault(entries=vault.entries[:n]), flux)
+        assert flux.getvalue().encode("utf-8") == dump_vault_to_bytes(Vault(entries=vault.entries[:n]), binary=False)
+
+
+def test_foreign_exports_are_mapped_onto_entries(petits_morceaux):
+    keepass = 'Account;Login Name;Password;Web Site;Comments\n"Banque";bob;"s3;cret";https://banque.example;"multi\nligne"\n;;;;\n'
+    (e,) = lire_csv(io.StringIO(keepass, newline=""))
+    assert (e.title, e.username, e.password) == ("Banque", "bob", "s3;cret")
+    assert e.notes == "URL: https://banque.example\nmulti\nligne"
+
+    navigateur = "name,url,username,password\n,https://mail.example,alice,pw\n"
+    (e,) = lire_csv(io.StringIO(navigateur, newline=""))
+    assert (e.title, e.username, e.notes) == ("https://mail.example", "alice", "URL: https://mail.example")
+
+    bitwarden = {
+        "encrypted": False,
+        "folders": [{"id": "f1", "name": "Perso"}],
+        "items": [
+            {
+                "name": "Forum",
+                "notes": None,
+                "login": {"username": "carol", "password": "x", "uris": [{"uri": "https://forum.example"}]},
+            },
+            {"type": 2, "name": "", "notes": None},
+        ],
+    }
+    (e,) = lire_json(io.StringIO(json.dumps(bitwarden, indent=1)))
+    assert (e.title, e.username, e.password, e.notes) == ("Forum", "carol", "x", "URL: https://forum.example")
+
+    liste = [{"Titre": "a", "Identifiant": "u", "Mot de passe": 12345}]
+    (e,) = lire_json(io.StringIO(json.dumps(liste, ensure_ascii=False)))
+    assert (e.title, e.username, e.password) == ("a", "u", "12345")
+
+
+@pytest.mark.parametrize("texte", ['{"entries": [{"title": "a"}', '[{"title": "a"} {"title": "b"}]', '"texte"', "{1: []}"])
+def test_invalid_json_raises_value_error(texte):
+    with pytest.raises(ValueError):
+        list(lire_json(io.StringIO(texte)))
+
+
+def test_extend_replaces_by_id_and_rebuilds_sorted_views():
+    vault = _vault(5)
+    assert vault.sorted_ids("title")
+    modifiee = VaultEntry(vault.entries[2].id, "aaa", "u", "p", "", vault.entries[2].updated_at)
+    nouvelles = [VaultEntry.new(title="zzz"), modifiee]
+
+    assert vault.extend(iter(nouvelles)) == 2
+    assert len(vault) == 6 and vault.entries[2] is modifiee
+    attendu = sorted(vault, key=lambda e: (e.title.casefold(), e.id))
+    assert vault.sorted_ids("title") == [e.id for e in attendu]
+
+
+def test_cli_import_then_export(fast_argon2, tmp_path, monkeypatch, capsys):
+    coffre = tmp_path / "vault.bin"
+    monkeypatch.setattr(cli, "FICHIER", str(coffre))
+    monkeypatch.setattr(cli, "DOSSIER_FRAGMENTS", str(tmp_path / "vault.d"))
+    monkeypatch.setattr(cli.getpass, "getpass", lambda _prompt="": "mot de passe solide 42")
+    source = tmp_path / "import.csv"
+    with open(source, "w", encoding="utf-8", newline="") as f:
+        ecrire_csv(_vault(20), f)
+
+    assert cli.importer_fichier(str(source)) == 0
+    assert cli.importer_fichier(str(source)) == 0  # réimport: mêmes ids, entrées remplacées
+    assert "0 ajoutées, 20 remplacées" in capsys.readouterr().out
+
+    export = tmp_path / "export.json"
+    assert cli.exporter_fichier(str(export)) == 0
+    assert "entrées/s" in capsys.readouterr().out
+    with open(source, encoding="utf-8", newline="") as f:
+        assert load_vault_from_bytes(export.read_bytes()).entries == list(lire_csv(f))
+
+    # Fichier invalide: le coffre n'est pas réécrit.
+    avant = coffre.read_bytes()
+    source.write_text('"non fermé', encoding="utf-8")
+    monkeypatch.setattr(transfert, "_CHUNK", 1)
+    assert cli.importer_fichier(str(source), format="json") == 4
+    assert coffre.read_bytes() == avant
@@ -0,0 +1,303 @@
+import json
+import random
+import struct
+import sys
+
+import pytest
+from cryptography.exceptions import InvalidTag
+
+from mdp_app.crypto import CleSecrets
+from mdp_app.vault import (
+    SearchIndex,
+    Vault,
+    VaultEntry,
+    dump_vault_to_bytes,
+    fold,
+    is_binary_payload,
+    load_vault_from_bytes,
+    payload_texte,
+)
+
+
+def test_entry_is_compact_but_keeps_string_api():
+    e = VaultEntry.new(title="site", username="me@example.com", password="pw")
+
+    assert not hasattr(e, "__dict__")
+    assert isinstance(e._id, bytes) and len(e._id) == 16
+    assert isinstance(e._updated_at, int)
+    assert isinstance(e.id, str) and len(e.id) == 36
+    assert e.updated_at.endswith("+00:00")
+
+    e.id = "00000000-0000-4000-8000-000000000001"
+    e.updated_at = "2024-01-02T03:04:05+00:00"
+    assert e.id == "00000000-0000-4000-8000-000000000001"
+    assert e.updated_at == "2024-01-02T03:04:05+00:00"
+
+
+def test_usernames_are_interned():
+    a = VaultEntry.new(username="".join(["al", "ice"]))
+    b = VaultEntry.new(username="".join(["ali", "ce"]))
+    assert a.username is b.username is sys.intern("alice")
+
+
+def test_non_canonical_values_are_kept_verbatim():
+    e = VaultEntry(
+        id="legacy-42",
+        title="t",
+        username="u",
+        password="p",
+        notes="",
+        updated_at="2024-01-02T03:04:05+02:00",
+    )
+    assert e.id == "legacy-42"
+    assert e.updated_at == "2024-01-02T03:04:05+02:00"
+
+    e.id = "ABCDEF00-0000-4000-8000-000000000001"  # majuscules: pas la forme canonique
+    e.updated_at = "2024-01-02T03:04:05Z"
+    assert e.id == "ABCDEF00-0000-4000-8000-000000000001"
+    assert e.updated_at == "2024-01-02T03:04:05Z"
+    e.updated_at = "2024-01-02T03:04:05.250000+00:00"
+    assert e.updated_at == "2024-01-02T03:04:05.250000+00:00"
+
+
+def _mixed_entries():
+    entries = [VaultEntry.new(title=f"t{i}", username="me", password=f"p{i}", notes="n") for i in range(3)]
+    entries.append(VaultEntry(id="x", title="", username="", password="", notes="", updated_at="hier"))
+    entries.append(VaultEntry.new(title="Café ☕", username="me", password="é\x00\n", notes="ligne 1\nligne 2"))
+    return entries
+
+
+@pytest.mark.parametrize("binary", [True, False])
+def test_dump_load_roundtrip_preserves_entries(binary):
+    entries = _mixed_entries()
+
+    data = dump_vault_to_bytes(Vault(entries=entries), binary=binary)
+    loaded = load_vault_from_bytes(data)
+
+    assert is_binary_payload(data) is binary
+    assert loaded.entries == entries
+    assert loaded.entries[0] is not entries[0]
+    assert repr(loaded.entries[3]).startswith("VaultEntry(id='x'")
+
+
+def test_binary_payload_is_smaller_and_converts_to_json():
+    entries = [VaultEntry.new(title=f"site {i}", username=f"user{i % 5}", password="x" * 16) for i in range(200)]
+    vault = Vault(entries=entries)
+
+    binary = dump_vault_to_bytes(vault)
+    as_json = dump_vault_to_bytes(vault, binary=False)
+    assert len(binary) < len(as_json) // 2
+
+    text = payload_texte(binary)
+    assert json.loads(text)["entries"][7]["title"] == "site 7"
+    assert load_vault_from_bytes(text).entries == entries
+    assert payload_texte(b"texte libre") == b"texte libre"
+
+
+def test_corrupt_binary_payload_is_rejected():
+    data = dump_vault_to_bytes(Vault(entries=_mixed_entries()))
+    for bad in (data[:-1], data[:10], data[:5] + b"\xff" * (len(data) - 5), data[:4] + b"\x09" + data[5:]):
+        with pytest.raises(ValueError):
+            load_vault_from_bytes(bad)
+
+
+def test_secrets_stay_sealed_until_read(monkeypatch):
+    entries = _mixed_entries()
+    vault = load_vault_from_bytes(dump_vault_to_bytes(Vault(entries=entries)))
+    calls = []
+    real = CleSecrets.ouvrir
+    monkeypatch.setattr(CleSecrets, "ouvrir", lambda self, *a: calls.append(a[0]) or real(self, *a))
+
+    SearchIndex(vault.entries)
+    assert [e.title for e in vault.entries] == [e.title for e in entries]
+    assert vault.entries.index(vault.entries[4]) == 4
+    assert all(e.scellee for e in vault.entries) and calls == []
+
+    assert vault.entries[4].secrets() == ("é\x00\n", "ligne 1\nligne 2")
+    assert vault.entries[1].password == "p1"
+    assert calls == [entries[4].id, entries[1].id]
+
+    # Même clé: les jetons sont recopiés sans déchiffrement ni rechiffrement.
+    monkeypatch.setattr(CleSecrets, "sceller", None)
+    again = load_vault_from_bytes(dump_vault_to_bytes(vault))
+    assert len(calls) == 2
+    assert again.entries == entries
+
+    e = again.entries[0]
+    e.notes = "modifiée"
+    assert not e.scellee and (e.password, e.notes) == ("p0", "modifiée")
+
+
+def test_sealed_secrets_are_bound_to_their_entry():
+    vault = load_vault_from_bytes(dump_vault_to_bytes(Vault(entries=_mixed_entries())))
+    a, b = vault.entries[0], vault.entries[1]
+    b._password, b._notes = a._password, a._notes
+    with pytest.raises(InvalidTag):
+        b.secrets()
+
+
+def test_version_1_binary_payload_still_loads():
+    strings = ["titre", "me", "pw", "", "hier"]
+    text = "".join(strings).encode()
+    header = struct.pack(">4sBqIII", b"MDPV", 1, 0, len(strings), 1, len(text))
+    # flags 0x03: id et date non canoniques, donnés par leur index dans la table.
+    record = struct.pack(">B16sIIIIq", 0x03, (3).to_bytes(4, "big") + bytes(12), 0, 1, 2, 3, 4)
+    data = header + struct.pack(">5I", *map(len, strings)) + text + record
+
+    (e,) = load_vault_from_bytes(data).entries
+    assert (e.id, e.title, e.username, e.password, e.updated_at) == ("", "titre", "me", "pw", "hier")
+    assert not e.scellee
+
+
+def test_vault_store_keeps_order_and_sorted_views_under_mutations():
+    rng = random.Random(7)
+    titles = ["Banque", "banque pro", "SSH", "wifi", "Mail", "forum"]
+
+    def entry():
+        e = VaultEntry.new(title=rng.choice(titles), username=rng.choice(["alice", "Bob", "root"]))
+        e.updated_at = f"2024-01-{rng.randrange(1, 29):02d}T00:00:00+00:00"
+        return e
+
+    entries = [entry() for _ in range(100)]
+    vault = Vault(entries=entries)
+    assert vault.sorted_ids("title") == [e.id for e in sorted(entries, key=lambda e: (e.title.casefold(), e.id))]
+
+    for _ in range(200):
+        action = rng.choice(["add", "update", "remove"])
+        if action == "add":
+            e = entry()
+            entries.append(e)
+            vault.add(e)
+        elif action == "update":
+            i = rng.randrange(len(entries))
+            new = entry()
+            new.id = entries[i].id
+            entries[i] = new
+            vault.update(new)
+        else:
+            e = entries.pop(rng.randrange(len(entries)))
+            assert vault.remove(e.id) is e
+    assert vault.entries == entries and len(vault) == len(entries)
+    assert vault.get(entries[3].id) is entries[3] and entries[3].id in vault
+    assert vault.remove("absent") is None and vault.get("absent") is None
+    for key, attr in (("title", "title"), ("username", "username"), ("updated_at", "updated_at")):
+        attendu = sorted(entries, key=lambda e, a=attr: (getattr(e, a).casefold(), e.id))
+        assert vault.sorted_ids(key) == [e.id for e in attendu]
+        assert vault.sorted_ids(key, reverse=True) == [e.id for e in reversed(attendu)]
+
+
+def test_duplicate_ids_are_kept_under_a_new_id():
+    a = VaultEntry.new(title="a", password="pa")
+    b = VaultEntry(a.id, "b", "", "pb", "", a.updated_at)
+    vault = load_vault_from_bytes(dump_vault_to_bytes(Vault(entries=[a, b])))
+    assert [(e.title, e.password) for e in vault.entries] == [("a", "pa"), ("b", "pb")]
+    assert vault.entries[0].id == a.id != vault.entries[1].id
+
+
+def _brute_force(entries, q):
+    q = fold(q.strip())
+    # Notes exclues: ce sont des secrets, scellés avec le mot de passe.
+    return [e.id for e in entries if q in fold(f"{e.title} {e.username}")]
+
+
+def _brute_rank(entries, q, k):
+    q = fold(q.strip())
+    chars = "".join(q.split())
+    exact, fuzzy = [], []
+    for order, e in enumerate(entries):
+        title = fold(e.title)
+        text = f"{title} {fold(e.username)}"
+        pos = text.find(q)
+        if pos >= 0:
+            exact.append(((pos + len(q) > len(title), pos, len(text), order), e.id))
+            continue
+        for start in (i for i, c in enumerate(text) if c == chars[0]):
+            end = start
+            for c in chars[1:]:
+                end = text.find(c, end + 1)
+                if end < 0:
+                    break
+            else:
+                fuzzy.append(((end >= len(title), end + 1 - start, len(text), order), e.id))
+                break
+    exact.sort()
+    fuzzy.sort()
+    ranked = [entry_id for _key, entry_id in exact[:k]]
+    if len(chars) >= 3:
+        ranked += [entry_id for _key, entry_id in fuzzy[: k - len(ranked)]]
+    return ranked
+
+
+def test_search_index_matches_linear_scan_under_mutations():
+    rng = random.Random(0)
+    words = ["Banque", "mail", "Git", "serveur", "wifi", "maison", "ssh", "clé", "Société", "ÉLAN"]
+
+    def entry():
+        return VaultEntry.new(
+            title=" ".join(rng.sample(words, 2)),
+            username=rng.choice(["alice", "bob", "Root"]),
+            notes=" ".join(rng.choices(words, k=rng.randrange(4))),
+        )
+
+    entries = [entry() for _ in range(200)]
+    index = SearchIndex(entries)
+    queries = ["", "a", "ba", "ban", "banq", "banque", "ue m", "SSH", "it ali", "zzz", "oot", "clé", "cle", "societe", "élan"]
+
+    for step in range(60):
+        action = rng.choice(["add", "update", "remove"])
+        if action == "add":
+            e = entry()
+            entries.append(e)
+            index.add(e)
+        elif action == "update":
+            i = rng.randrange(len(entries))
+            new = entry()
+            new.id = entries[i].id
+            entries[i] = new
+            index.update(new)
+        else:
+            e = entries.pop(rng.randrange(len(entries)))
+            index.remove(e.id)
+
+        # Frappe progressive (affinage) puis requêtes sans lien avec la précédente.
+        for q in queries if step % 2 else reversed(queries):
+            assert index.search(q) == _brute_force(entries, q), (action, q)
+        for q in ("bq", "bnq", "srvr", "ssh", "mai", "sgen", "git ali", "zzz"):
+            assert index.rank(q, 25) == _brute_rank(entries, q, 25), (action, q)
+            complete = index.rank(q, 5, complete=True)
+            assert complete[:5] == _brute_rank(entries, q, 5), (action, q)
+            if len(complete) > 5:
+                assert complete[5:] == [i for i in _brute_force(entries, q) if i not in complete[:5]], (action, q)
+    assert len(index) == len(entries)
+
+
+def test_rank_prefers_title_prefix_and_folds_accents():
+    entries = [
+        VaultEntry.new(title="Ma Société Générale", username="alice"),
+        VaultEntry.new(title="societe", username="bob"),
+        VaultEntry.new(title="Banque", username="societe@example.org"),
+        VaultEntry.new(title="Sans rapport", username="x"),
+    ]
+    index = SearchIndex(entries)
+    ids = [e.id for e in entries]
+
+    assert index.rank("SOCIÉTÉ") == [ids[1], ids[0], ids[2]]
+    assert index.search("société") == [ids[0], ids[1], ids[2]]
+    # Sous-séquence: après les correspondances exactes, et seulement s'il manque des résultats.
+    assert index.rank("sgen") == [ids[0]]
+    assert index.rank("sgen", 0) == []
+    assert index.rank("") == ids and index.rank("", 2) == ids[:2]
+    # Filtre de la GUI: les k meilleurs d'abord, puis toutes les autres correspondances.
+    assert index.rank("societe", 1, complete=True) == [ids[1], ids[0], ids[2]]
+    assert index.rank("sgen", 0, complete=True) == [] and index.rank("", 2, complete=True) == ids
+
+
+def test_search_narrows_from_previous_results():
+    entries = [VaultEntry.new(title=f"compte {i}", notes="x" * 50) for i in range(50)]
+    index = SearchIndex(entries)
+
+    assert len(index.search("comp")) == 50
+    assert index.search("compte 4") == [e.id for e in entries if "compte 4" in e.title]
+    assert index._last is not None and len(index._last[1]) == 11
+    assert index.search("compte 42") == [entries[42].id]
+    assert index.search("compte 420") == []
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import argparse
 import getpass
 import os
 import sys
@@ -15,59 +16,210 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-from mdp_app.config import FICHIER
-from mdp_app.crypto import chiffrer_bytes_v5, dechiffrer_bytes, decoder
+from mdp_app.config import DOSSIER_FRAGMENTS, FICHIER, FICHIER_JOURNAL
+from mdp_app.crypto import (
+    FORMATS_SESSION,
+    ajouter_slot_v7,
+    changer_mdp_v7,
+    chiffrer_bytes_v5,
+    chiffrer_bytes_v7,
+    dechiffrer_bytes,
+    dechiffrer_bytes_session,
+    generer_cle_recuperation,
+    peek_header,
+)
+from mdp_app.fragments import CoffreFragmente, fragmente
+from mdp_app.journal import contenu_avec_journal
 from mdp_app.storage import ecrire_chiffre
+from mdp_app.vault import dump_vault_to_bytes, load_vault_from_bytes
+
+
+def _parse_args() -> argparse.Namespace:
+    p = argparse.ArgumentParser(
+        description="Migration du coffre (v5 par défaut, ou enveloppe v7 à slots de clés)",
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+    g = p.add_mutually_exclusive_group()
+    g.add_argument("--envelope", action="store_true", help="migrer en v7 (DEK + slots de clés)")
+    g.add_argument("--change-password", action="store_true", help="v7: changer le mot de passe (en-tête seul)")
+    g.add_argument("--add-recovery-key", action="store_true", help="v7: ajouter une clé de récupération")
+    g.add_argument("--shards", action="store_true", help="v5/v7: passer au coffre fragmenté (dossier vault.d)")
+    g.add_argument("--single-file", action="store_true", help="revenir du coffre fragmenté au fichier unique")
+    return p.parse_args()
+
+
+def _backup(vault_path: Path, raw: bytes, version: str) -> bool:
+    # Backup simple à côté du coffre
+    ts = datetime.now().strftime("%Y%m%d-%H%M%S")
+    backup_path = vault_path.with_suffix(vault_path.suffix + f".{version}.{ts}.bak")
+    try:
+        backup_path.write_bytes(raw)
+        print(f"Backup créé: {backup_path}")
+        return True
+    except Exception as e:
+        print(f"Impossible de créer le backup ({e}). Abandon.")
+        return False
+
+
+def _rotation_v7(vault_path: Path, raw: bytes, args: argparse.Namespace) -> int:
+    mdp = getpass.getpass("Mot de passe actuel : ")
+    if args.change_password:
+        nouveau = getpass.getpass("Nouveau mot de passe : ")
+        if nouveau != getpass.getpass("Confirmer : "):
+            print("Les mots de passe ne correspondent pas")
+            return 1
+    else:
+        nouveau = generer_cle_recuperation()
+
+    try:
+        if args.change_password:
+            new_raw = changer_mdp_v7(mdp, nouveau, raw)
+        else:
+            new_raw = ajouter_slot_v7(mdp, nouveau, raw)
+    except InvalidTag:
+        print("Mot de passe incorrect ou coffre corrompu")
+        return 2
+    except ValueError as e:
+        print(f"Opération impossible: {e}")
+        return 4
+
+    if not _backup(vault_path, raw, "v7"):
+        return 3
+    ecrire_chiffre(new_raw)
+
+    if args.change_password:
+        print("OK: mot de passe changé (seul l'en-tête du coffre a été réécrit).")
+    else:
+        print("Clé de récupération (à conserver hors de cet ordinateur) :")
+        print(f"   {nouveau}")
+    return 0
+
+
+def _vers_fragments(vault_path: Path, raw: bytes, version: str) -> int:
+    if version not in FORMATS_SESSION:
+        print("Cette opération nécessite un coffre v5 ou v7 (relancer sans option d'abord).")
+        return 1
+    mdp = getpass.getpass("Mot de passe : ")
+    try:
+        plaintext, session = dechiffrer_bytes_session(mdp, raw)
+        plaintext = contenu_avec_journal(plaintext, raw, session)
+    except (InvalidToken, InvalidTag):
+        print("Mot de passe incorrect ou coffre corrompu")
+        return 2
+
+    if not _backup(vault_path, raw, version):
+        session.effacer()
+        return 3
+    try:
+        # Même session: les fragments gardent le format (et les slots v7) du coffre.
+        fragments = CoffreFragmente()
+        ecrits = fragments.enregistrer(session, load_vault_from_bytes(plaintext))
+    except Exception as e:
+        print(f"Migration échouée: {e}")
+        return 4
+    finally:
+        session.effacer()
+
+    # Le coffre fragmenté est prioritaire; l'ancien fichier (sauvegardé) et son journal sont retirés.
+    vault_path.unlink()
+    Path(FICHIER_JOURNAL).unlink(missing_ok=True)
+    print(f"OK: coffre fragmenté dans {fragments.dossier} ({fragments.n} fragments, {ecrits} octets).")
+    return 0
+
+
+def _vers_fichier_unique(vault_path: Path) -> int:
+    try:
+        fragments, vault, session = CoffreFragmente.ouvrir(getpass.getpass("Mot de passe : "))
+    except (InvalidToken, InvalidTag, ValueError):
+        print("Mot de passe incorrect ou coffre corrompu")
+        return 2
+    try:
+        ecrire_chiffre(session.chiffrer(dump_vault_to_bytes(vault)), vault_path)
+    except Exception as e:
+        print(f"Migration échouée: {e}")
+        return 4
+    finally:
+        session.effacer()
+
+    # Le dossier est gardé comme backup (il ne doit plus être pris pour le coffre courant).
+    backup = fragments.dossier.with_name(fragments.dossier.name + f".{datetime.now():%Y%m%d-%H%M%S}.bak")
+    fragments.dossier.rename(backup)
+    print(f"Backup créé: {backup}")
+    print(f"OK: coffre en fichier unique ({len(vault)} entrées): {vault_path}")
+    return 0
 
 
 def main() -> int:
+    args = _parse_args()
     vault_path = Path(FICHIER)
+    if fragmente():
+        if args.single_file:
+            return _vers_fichier_unique(vault_path)
+        print(f"Coffre fragmenté: {DOSSIER_FRAGMENTS} (relancer avec --single-file pour toute autre opération).")
+        return 1
+    if args.single_file:
+        print("Rien à faire (le coffre n'est pas fragmenté).")
+        return 0
     if not vault_path.exists():
         print(f"Aucun coffre trouvé: {vault_path}")
         return 1
 
     raw = vault_path.read_bytes()
-    version = decoder(raw)[0]
+    version = peek_header(raw)[0]
     print(f"Coffre: {vault_path}")
     print(f"Version actuelle: {version}")
 
-    if version == "v5":
-        print("Rien à faire (déjà en v5).")
+    if args.change_password or args.add_recovery_key:
+        if version != "v7":
+            print("Cette opération nécessite un coffre v7 (relancer avec --envelope d'abord).")
+            return 1
+        return _rotation_v7(vault_path, raw, args)
+    if args.shards:
+        return _vers_fragments(vault_path, raw, version)
+
+    cible = "v7" if args.envelope else "v5"
+    if version == cible or (cible == "v5" and version == "v7"):
+        print(f"Rien à faire (déjà en {version}).")
         return 0
 
-    mdp = getpass.getpass("Mot de passe (pour migrer en v5): ")
+    mdp = getpass.getpass(f"Mot de passe (pour migrer en {cible}): ")
 
     try:
-        plaintext = dechiffrer_bytes(mdp, raw)
+        if version in FORMATS_SESSION:
+            # Les modifications du journal (GUI) sont repliées: le nouveau coffre le rend caduc.
+            plaintext, session = dechiffrer_bytes_session(mdp, raw)
+            plaintext = contenu_avec_journal(plaintext, raw, session)
+            session.effacer()
+        else:
+            plaintext = dechiffrer_bytes(mdp, raw)
     except (InvalidToken, InvalidTag):
         print("Mot de passe incorrect ou coffre corrompu")
         return 2
 
-    # Backup simple à côté du coffre
-    ts = datetime.now().strftime("%Y%m%d-%H%M%S")
-    backup_path = vault_path.with_suffix(vault_path.suffix + f".{version}.{ts}.bak")
-    try:
-        backup_path.write_bytes(raw)
-        print(f"Backup créé: {backup_path}")
-    except Exception as e:
-        print(f"Impossible de créer le backup ({e}). Abandon.")
+    if not _backup(vault_path, raw, version):
         return 3
 
     try:
-        ecrire_chiffre(chiffrer_bytes_v5(mdp, plaintext, salt=os.urandom(16)))
+        if cible == "v7":
+            ecrire_chiffre(chiffrer_bytes_v7(mdp, plaintext))
+        else:
+            ecrire_chiffre(chiffrer_bytes_v5(mdp, plaintext, salt=os.urandom(16)))
     except Exception as e:
         print(f"Migration échouée: {e}")
         return 4
 
     # Vérification rapide
     new_raw = vault_path.read_bytes()
-    new_version = decoder(new_raw)[0]
+    new_version = peek_header(new_raw)[0]
     print(f"Nouvelle version: {new_version}")
-    if new_version != "v5":
-        print("Attention: la migration n'a pas produit du v5.")
+    if new_version != cible:
+        print(f"Attention: la migration n'a pas produit du {cible}.")
         return 5
 
-    print("OK: coffre migré en v5 (Argon2id + AES-GCM + anti-strings).")
+    if cible == "v7":
+        print("OK: coffre migré en v7 (enveloppe: DEK + slots Argon2id, AES-GCM + anti-strings).")
+    else:
+        print("OK: coffre migré en v5 (Argon2id + AES-GCM + anti-strings).")
     return 0
 
 